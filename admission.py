@@ -0,0 +1,90 @@
+import math
+import threading
+import time
+from collections import deque
+
+
+class AdmissionRejected(Exception):
+    """Raised when the limiter is saturated; carries a Retry-After hint"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded FIFO wait queue and work-based Retry-After.
+
+    ``capacity`` is the number of runs that can really execute at once (one
+    per engine lock or worker process), so ``inFlight`` is what is running.
+    Further requests wait in arrival order, up to ``max_queue`` waiters and
+    at most ``max_wait`` seconds each, and are rejected beyond that. Every
+    request states the seconds of work it is planned to take; Retry-After
+    is the planned work still ahead (what is left of the running requests
+    plus everything queued), corrected by the observed ratio of actual to
+    planned run time.
+    """
+
+    def __init__(self, capacity, max_queue, max_wait):
+        self.capacity = max(1, int(capacity))
+        self.max_queue = max(0, int(max_queue))
+        self.max_wait = float(max_wait)
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._running = {}
+        # Smoothed actual seconds per planned second
+        self._time_scale = 1.0
+
+    def _retry_after(self):
+        now = time.monotonic()
+        running = sum(max(seconds - (now - started), 0.0) for seconds, started in self._running.values())
+        queued = sum(seconds for _, seconds in self._queue)
+        return max(1, math.ceil((running + queued) * self._time_scale))
+
+    def acquire(self, seconds):
+        """Wait for a slot for a run planned to take ``seconds``; returns the ticket to release"""
+        seconds = max(float(seconds), 0.0)
+        ticket = object()
+        with self._cond:
+            if len(self._queue) >= self.max_queue and (self._queue or len(self._running) >= self.capacity):
+                raise AdmissionRejected("Optimizer is busy, please retry later", self._retry_after())
+            self._queue.append((ticket, seconds))
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while not (self._queue[0][0] is ticket and len(self._running) < self.capacity):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionRejected("Timed out waiting for optimizer capacity", self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self._queue.remove((ticket, seconds))
+                self._cond.notify_all()
+            self._running[ticket] = (seconds, time.monotonic())
+        return ticket
+
+    def release(self, ticket):
+        with self._cond:
+            seconds, started = self._running.pop(ticket)
+            if seconds > 0:
+                elapsed = time.monotonic() - started
+                self._time_scale = 0.8 * self._time_scale + 0.2 * (elapsed / seconds)
+            self._cond.notify_all()
+
+    def run(self, seconds, fn):
+        """Run ``fn`` once admitted, raising AdmissionRejected when saturated"""
+        ticket = self.acquire(seconds)
+        try:
+            return fn()
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "inFlight": len(self._running),
+                "plannedSeconds": sum(seconds for seconds, _ in self._running.values()),
+                "queued": len(self._queue),
+                "queuedSeconds": sum(seconds for _, seconds in self._queue),
+                "capacity": self.capacity,
+                "maxQueue": self.max_queue,
+            }
@@ -1,11 +1,41 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
+import atexit
 import csv
-import random
 import numpy as np
 import os
 import tempfile
 import json
+import hashlib
+import sqlite3
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from tariff import TariffModel, load_slabs_from_dict, load_carbon_from_dict, DEFAULT_BILLING_DAYS
+from planner import (plan_search, nominal_evaluation_cost, LEGACY_GREEDY_EVERY,
+                     EVALS_PER_INDIVIDUAL, PARETO_EVALS_PER_INDIVIDUAL, FINALIZE_SHARE, DEFAULT_TARGET_SECONDS)
+from singleflight import SingleFlight
+from admission import AdmissionController, AdmissionRejected
+from storage import load_energy_system_from_dict, DEFAULT_SOC_STEPS
+from loads import load_profiles_from_dict
+from fleet import (coordinate_fleet, DEFAULT_ROUNDS, DEFAULT_STEP, DEFAULT_BATCHES, DEFAULT_HOUSEHOLD_SECONDS,
+                   FLEET_SNAPSHOT_KEYS)
+from checkpoint import CheckpointWriter, checkpoint_path, load_checkpoint, json_array, array_json, SNAPSHOT_KEYS
+from schedule_store import ScheduleStore, SCHEDULE_DB
+from pareto import fast_non_dominated_sort, nsga_select, spread_selection
+from sensitivity import (scenario_prices, scenario_count, separable_optimum, DEFAULT_SCENARIO_SECONDS,
+                         MAX_SCENARIOS, MAX_SEARCH_SCENARIOS)
+from demand_response import load_event_from_dict, load_shift, DEFAULT_EVENT_HOUSEHOLD_SECONDS
+from exact import branch_and_bound, subset_masks, mask_bits, DEFAULT_TIME_LIMIT
+from streaming import ImprovementStream
+from optimizer.compact import memory_probe, fit_population, ARCHIVE_SLOTS_PER_LEVEL
+from optimizer import (Problem, gapso_optimize, get_engine, repair_schedule, random_schedule, crossover, mutation,
+                       pso_update, greedy_improve, greedy_schedule, warm_start_population, baseline_schedule)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend
@@ -18,6 +48,42 @@ LOAD_NAMES = []
 n_loads = 0
 hourly_price = []
 peak_hours = []
+POWER_KW = np.zeros(0)
+TARIFF = None
+ENERGY_SYSTEM = None
+LOAD_PROFILES = None
+RUN_COST_TABLE = None
+REQUESTED_HOURS = {}
+# (24, n_loads) mask of slots outside each appliance's requested hours
+OUTSIDE_REQUESTED = np.zeros((24, 0))
+# The problem as the optimizer engines see it (see optimizer.Problem)
+PROBLEM = None
+# Candidates timed to calibrate the planner, and the measured costs per
+# (engine, appliance count, cost model)
+CALIBRATION_EVALUATIONS = 16
+EVALUATION_COSTS = {}
+
+# Last optimized schedule per household, used to warm-start re-optimizations
+HOUSEHOLD_SCHEDULES = OrderedDict()
+MAX_STORED_HOUSEHOLDS = 1024
+
+# Persistent run history (SQLite), opened on first use; SCHEDULE_DB='' disables it
+SCHEDULE_STORE = None
+_STORE_LOCK = threading.Lock()
+
+ENGINE_LOCK = threading.Lock()
+OPTIMIZE_FLIGHTS = SingleFlight()
+
+# Admission control: ENGINE_LOCK runs one search at a time, so one request
+# is admitted at a time; each states its planned seconds for Retry-After.
+OPTIMIZE_ADMISSION = AdmissionController(
+    capacity=1,
+    max_queue=int(os.environ.get('OPTIMIZE_MAX_QUEUE', 16)),
+    max_wait=float(os.environ.get('OPTIMIZE_MAX_WAIT', 10))
+)
+
+# Low-memory profile (e.g. on a home gateway): default memory cap for every request
+DEFAULT_MEMORY_LIMIT_MB = float(os.environ['OPTIMIZER_MEMORY_LIMIT_MB']) if os.environ.get('OPTIMIZER_MEMORY_LIMIT_MB') else None
 
 def load_tariff_data_from_dict(tariff_rates):
     """Load tariff data from dictionary format"""
@@ -29,362 +95,489 @@ def load_tariff_data_from_dict(tariff_rates):
     peak = [i for i, p in enumerate(prices) if p == max(prices)]
     return prices, peak
 
+def dispatch_energy(hourly_kwh):
+    """Grid import, export and battery SoC for appliance load after PV and storage.
+
+    The battery is steered by the hourly price plus the marginal slab rate at
+    the consumption level the household would have without it.
+    """
+    if ENERGY_SYSTEM is None:
+        return hourly_kwh, np.zeros_like(hourly_kwh), None
+    net_import = np.maximum(hourly_kwh - ENERGY_SYSTEM.pv_kwh, 0)
+    slab_rate = TARIFF.cost_weight * TARIFF.marginal_rate(TARIFF.monthly_kwh(net_import))
+    prices = TARIFF.hourly_price + np.asarray(slab_rate)[..., None]
+    return ENERGY_SYSTEM.grid_exchange(hourly_kwh, prices, export_credit())
+
+def export_credit():
+    """Objective credit per exported kWh (exports are not counted against emissions)"""
+    return TARIFF.cost_weight * ENERGY_SYSTEM.export_price
+
+def energy_cost(hourly_kwh):
+    """Daily cost of appliance energy per hour, shape (..., 24)"""
+    if ENERGY_SYSTEM is None:
+        return TARIFF.daily_cost(hourly_kwh)
+    imports, exports, _ = dispatch_energy(hourly_kwh)
+    return TARIFF.daily_cost(imports) - export_credit() * exports.sum(axis=-1)
+
+def schedule_energy(schedules):
+    """Appliance energy per hour for schedules of shape (..., 24, n)"""
+    if LOAD_PROFILES is not None:
+        return LOAD_PROFILES.hourly_kwh(schedules)
+    return np.asarray(schedules, dtype=float) @ POWER_KW
+
+def appliance_energy(schedules):
+    """Energy of each appliance per hour, shape (..., 24, n), with the draw the cost model uses"""
+    if LOAD_PROFILES is not None:
+        return LOAD_PROFILES.appliance_kwh(schedules)
+    return np.asarray(schedules, dtype=float) * POWER_KW
+
+def schedule_cost(schedules):
+    """Daily cost for schedules of shape (..., 24, n).
+
+    With power profiles and a plain time-of-use tariff the cost comes straight
+    from the precomputed profile/price run table.
+    """
+    if RUN_COST_TABLE is not None:
+        return LOAD_PROFILES.run_cost(schedules, RUN_COST_TABLE)
+    return energy_cost(schedule_energy(schedules))
+
 def calculate_cost(schedule):
-    """Calculate total cost of schedule"""
-    return sum(
-        (sum(schedule[h][i] * LOAD_POWER[LOAD_NAMES[i]] for i in range(n_loads)) / 1000)
-        * hourly_price[h]
-        for h in range(24)
+    """Calculate total cost of schedule (daily share of the monthly bill)"""
+    return float(schedule_cost(np.asarray(schedule, dtype=np.int8)))
+
+def calculate_monthly_bill(schedule):
+    """Calculate the monthly bill the schedule leads to, including slab charges"""
+    hourly_kwh = schedule_energy(np.asarray(schedule, dtype=np.int8))
+    if ENERGY_SYSTEM is None:
+        return float(TARIFF.monthly_bill(hourly_kwh))
+    imports, exports, _ = dispatch_energy(hourly_kwh)
+    credit = ENERGY_SYSTEM.export_price * exports.sum() * TARIFF.billing_days
+    return float(TARIFF.monthly_bill(imports) - credit)
+
+def calculate_emissions(schedule):
+    """Daily kg CO2 of the grid energy a schedule imports"""
+    imports = dispatch_energy(schedule_energy(np.asarray(schedule, dtype=np.int8)))[0]
+    return float(TARIFF.emissions_kg(imports))
+
+def cost_report(schedule, cost):
+    """Response fields for a schedule whose objective value is ``cost``.
+
+    ``cost`` is the daily bill share unless carbon is weighted into the
+    objective; then the bill is recomputed and the objective reported apart.
+    """
+    report = {"cost": cost}
+    if TARIFF.is_blended:
+        report = {"cost": calculate_monthly_bill(schedule) / TARIFF.billing_days, "objective": cost}
+    if TARIFF.carbon_kg is not None:
+        report["co2Kg"] = calculate_emissions(schedule)
+    return report
+
+def energy_dispatch_summary(schedule):
+    """Per-hour grid exchange and battery state for a schedule, for the response"""
+    imports, exports, soc = dispatch_energy(schedule_energy(np.asarray(schedule, dtype=np.int8)))
+    summary = {"gridImportKwh": imports.tolist(), "gridExportKwh": exports.tolist()}
+    if soc is not None:
+        summary["batterySocKwh"] = soc.tolist()
+    return summary
+
+def cost_model_key():
+    """What makes the current cost model slower or faster to evaluate, apart from the appliance count"""
+    battery = ENERGY_SYSTEM.battery if ENERGY_SYSTEM is not None else None
+    return (
+        ENERGY_SYSTEM is not None,
+        battery.levels.size if battery is not None else 0,
+        LOAD_PROFILES.length if LOAD_PROFILES is not None else 0,
+        RUN_COST_TABLE is not None,
+        TARIFF.has_slabs
     )
 
-def repair_schedule(schedule):
-    """Repair schedule to meet minimum hour requirements"""
-    for i, name in enumerate(LOAD_NAMES):
-        if name in ESSENTIAL_LOADS:
-            for h in range(24):
-                schedule[h][i] = 1
-            continue
+def measure_evaluation_cost(engine=None):
+    """Measure seconds per candidate evaluation and per greedy_improve call.
 
-        needed = MIN_ON_HOURS[name]
-        current = sum(schedule[h][i] for h in range(24))
-
-        if current < needed:
-            hours_with_price = [(h, hourly_price[h]) for h in range(24) if schedule[h][i] == 0]
-            non_peak = [(h, p) for h, p in hours_with_price if h not in peak_hours]
-            peak = [(h, p) for h, p in hours_with_price if h in peak_hours]
-            
-            non_peak.sort(key=lambda x: x[1])
-            peak.sort(key=lambda x: x[1])
-            
-            hours_to_use = [h for h, _ in non_peak] + [h for h, _ in peak]
-            
-            for h in hours_to_use:
-                if current >= needed:
-                    break
-                schedule[h][i] = 1
-                current += 1
-                
-        elif current > needed:
-            on_hours = [(h, hourly_price[h]) for h in range(24) if schedule[h][i] == 1]
-            on_hours.sort(key=lambda x: x[1], reverse=True)
-            
-            for h, _ in on_hours:
-                if current <= needed:
-                    break
-                schedule[h][i] = 0
-                current -= 1
-                
-    return schedule
-
-def random_schedule():
-    """Generate random initial schedule"""
-    sch = []
-    for h in range(24):
-        row = []
-        for name in LOAD_NAMES:
-            if name in ESSENTIAL_LOADS:
-                row.append(1)
-            elif h in peak_hours:
-                row.append(0)
-            else:
-                prob_on = 0.7 if hourly_price[h] < np.mean(hourly_price) else 0.3
-                row.append(1 if random.random() < prob_on else 0)
-        sch.append(row)
-    return repair_schedule(sch)
-
-def crossover(a, b):
-    """Crossover operation"""
-    p = random.randint(1, 23)
-    return repair_schedule(a[:p] + b[p:])
-
-def mutation(s, rate=0.1):
-    """Mutation operation"""
-    for h in range(24):
-        for i, name in enumerate(LOAD_NAMES):
-            if name in ESSENTIAL_LOADS or h in peak_hours:
-                continue
-            if random.random() < rate:
-                s[h][i] ^= 1
-    return repair_schedule(s)
-
-def pso_update(p, pb, gb, w=0.5, c1=1.5, c2=1.5):
-    """PSO update operation"""
-    new = []
-    for h in range(24):
-        row = p[h][:]
-        for i, name in enumerate(LOAD_NAMES):
-            if name in ESSENTIAL_LOADS:
-                row[i] = 1
-                continue
-            if h in peak_hours:
-                row[i] = 0
-                continue
-                
-            prob_on = 0.0
-            if pb[h][i] == 1:
-                prob_on += c1 * random.random()
-            if gb[h][i] == 1:
-                prob_on += c2 * random.random()
-            if p[h][i] == 1:
-                prob_on += w * random.random()
-            
-            prob_on = min(prob_on / (w + c1 + c2), 1.0)
-            
-            price_factor = 1.0 - (hourly_price[h] / max(hourly_price))
-            prob_on = prob_on * 0.7 + price_factor * 0.3
-            
-            if random.random() < prob_on:
-                row[i] = 1
-            else:
-                row[i] = 0
-        new.append(row)
-    return repair_schedule(new)
-
-def greedy_improve(schedule, max_iterations=10):
-    """Local search improvement"""
-    improved = True
-    iteration = 0
-    
-    while improved and iteration < max_iterations:
-        improved = False
-        iteration += 1
-        
-        for i, name in enumerate(LOAD_NAMES):
-            if name in ESSENTIAL_LOADS:
-                continue
-                
-            on_hours = [h for h in range(24) if schedule[h][i] == 1]
-            off_hours = [h for h in range(24) if schedule[h][i] == 0 and h not in peak_hours]
-            
-            if not on_hours or not off_hours:
-                continue
-            
-            on_hours.sort(key=lambda h: hourly_price[h], reverse=True)
-            off_hours.sort(key=lambda h: hourly_price[h])
-            
-            for h_on in on_hours:
-                for h_off in off_hours:
-                    if hourly_price[h_off] < hourly_price[h_on]:
-                        schedule[h_on][i] = 0
-                        schedule[h_off][i] = 1
-                        
-                        current_on = sum(schedule[h][i] for h in range(24))
-                        if current_on >= MIN_ON_HOURS[name]:
-                            improved = True
-                            break
-                        else:
-                            schedule[h_on][i] = 1
-                            schedule[h_off][i] = 0
-                if improved:
-                    break
-    
-    return schedule
+    Times CALIBRATION_EVALUATIONS children of ``engine``, half from the PSO
+    update and half from crossover + mutation, built and scored the way the
+    engine does it (per operator batch, or one individual at a time), and
+    one greedy_improve call. It draws from its own fixed stream so the run's
+    generator is left untouched. The result is kept per engine, appliance
+    count and cost model, so only the first such request pays for it.
+    """
+    engine = get_engine(engine)
+    key = (engine.name, n_loads, cost_model_key())
+    if key in EVALUATION_COSTS:
+        return EVALUATION_COSTS[key]
+    ops = engine.operators(PROBLEM)
+    rng = np.random.default_rng(0)
+    pop = ops.random(rng, CALIBRATION_EVALUATIONS)
+    half = len(pop) // 2
+    if engine.batched:
+        pairs = [(pop[:half], pop[half:2 * half])]
+    else:
+        pairs = [(pop[i:i + 1], pop[half + i:half + i + 1]) for i in range(half)]
+    start = time.perf_counter()
+    for pso_parents, ga_parents in pairs:
+        ops.evaluate(ops.pso(pso_parents, pso_parents, pop[0], rng))
+        ops.evaluate(ops.mutation(ops.crossover(ga_parents, pso_parents, rng), rng))
+    eval_seconds = (time.perf_counter() - start) / (2 * half)
+
+    start = time.perf_counter()
+    ops.greedy(pop[:1])
+    greedy_seconds = time.perf_counter() - start
+    EVALUATION_COSTS[key] = eval_seconds, greedy_seconds
+    return eval_seconds, greedy_seconds
+
+def plan_optimization(data, warm_start=False):
+    """Plan GAPSO parameters for a request from its latency/evaluation budget.
+
+    Seeded requests plan from nominal evaluation costs instead of a timing
+    measurement, so the same problem and seed always search the same way.
+    A time budget is what is left of ``targetSeconds`` after calibrating.
+    """
+    calibration_seconds = 0.0
+    if data.get('seed') is not None:
+        eval_seconds, greedy_seconds = nominal_costs(data)
+    else:
+        started = time.perf_counter()
+        # Pareto mode runs its own loop on the reference operators
+        eval_seconds, greedy_seconds = measure_evaluation_cost(
+            None if data.get('mode') == 'pareto' else data.get('engine'))
+        calibration_seconds = time.perf_counter() - started
+    target_seconds = data.get('targetSeconds')
+    if data.get('maxEvaluations') is None:
+        if target_seconds is None:
+            target_seconds = DEFAULT_TARGET_SECONDS
+        target_seconds = max(float(target_seconds) - calibration_seconds, 0.0)
+    plan = plan_search(
+        n_loads,
+        eval_seconds,
+        greedy_seconds=greedy_seconds,
+        target_seconds=target_seconds,
+        max_evaluations=data.get('maxEvaluations'),
+        iterations=data.get('iterations'),
+        pop_size=data.get('populationSize'),
+        warm_start=warm_start,
+        evals_per_individual=PARETO_EVALS_PER_INDIVIDUAL if data.get('mode') == 'pareto' else EVALS_PER_INDIVIDUAL
+    )
+    plan["calibrationSeconds"] = calibration_seconds
+    return plan
+
+def operator_costs(data, plan):
+    """Fixed per-call seconds of the pso, ga and greedy operators for seeded runs, else None (measure)"""
+    if data.get('seed') is None:
+        return None
+    return (plan["evalSeconds"], plan["evalSeconds"], plan["evalSeconds"] + plan["greedySeconds"])
 
-def greedy_schedule():
-    """Create greedy initial schedule"""
+def requested_schedule():
+    """Schedule that runs every appliance in the hours the user asked for"""
     sch = [[0]*n_loads for _ in range(24)]
-    
     for i, name in enumerate(LOAD_NAMES):
-        if name in ESSENTIAL_LOADS:
-            for h in range(24):
-                sch[h][i] = 1
-            continue
-        
-        needed = MIN_ON_HOURS[name]
-        hours_with_price = [(h, hourly_price[h]) for h in range(24)]
-        non_peak = [(h, p) for h, p in hours_with_price if h not in peak_hours]
-        peak = [(h, p) for h, p in hours_with_price if h in peak_hours]
-        
-        non_peak.sort(key=lambda x: x[1])
-        peak.sort(key=lambda x: x[1])
-        
-        for h, _ in non_peak[:needed]:
+        for h in REQUESTED_HOURS.get(name, ()):
             sch[h][i] = 1
-        remaining = needed - len(non_peak[:needed])
-        if remaining > 0:
-            for h, _ in peak[:remaining]:
-                sch[h][i] = 1
-    
-    return sch
+    return repair_schedule(PROBLEM, sch)
+
+def schedule_objectives(schedules):
+    """Cost, peak demand (kW) and disruption for a list of schedules.
+
+    Disruption counts ON slots outside the appliance's requested hours. All
+    candidates are scored together as one (P, 24, n) array.
+    """
+    S = np.asarray(schedules, dtype=np.int8)
+    cost = schedule_cost(S)
+    peak = dispatch_energy(schedule_energy(S))[0].max(axis=1)
+    disruption = (S * OUTSIDE_REQUESTED).sum(axis=(1, 2))
+    return np.column_stack([cost, peak, disruption])
+
+def unique_schedule_indices(schedules):
+    """Indices of the first occurrence of every distinct schedule"""
+    flat = np.asarray(schedules, dtype=np.uint8).reshape(len(schedules), -1)
+    _, idx = np.unique(np.packbits(flat, axis=1), axis=0, return_index=True)
+    return np.sort(idx)
+
+def gapso_pareto(iterations=None, pop_size=None, k=3, initial_schedule=None,
+                 greedy_every=LEGACY_GREEDY_EVERY, archive_size=None, rng=None, on_improve=None, should_stop=None):
+    """Multi-objective GAPSO over cost, peak demand and disruption.
 
-def gapso_optimize(iterations=None, pop_size=None, k=3):
-    """Main GAPSO optimization function"""
+    Each individual keeps its own weighting of the normalized objectives, so
+    the population covers the trade-off surface. The archive is truncated
+    with non-dominated sorting and crowding distance, and ``k`` well-spread
+    solutions of its Pareto front are returned, cheapest first.
+    ``on_improve``/``should_stop`` work as in gapso_optimize, tracking the
+    cheapest schedule found.
+    """
     if iterations is None:
         iterations = max(100, 20 * n_loads)
     if pop_size is None:
         pop_size = max(20, 5 * n_loads)
+    if archive_size is None:
+        archive_size = max(10 * k, pop_size)
+    if rng is None:
+        rng = np.random.default_rng()
     
-    pop = []
-    pop.append(greedy_schedule())
-    pop.extend([random_schedule() for _ in range(pop_size - 1)])
+    # Uniform random weightings on the simplex (normalized exponentials)
+    draw = rng.exponential(size=(max(0, pop_size - 3), 3))
+    weights = np.vstack([np.eye(3)[:min(3, pop_size)], draw / draw.sum(axis=1, keepdims=True)])
+    
+    pop = [greedy_schedule(PROBLEM), requested_schedule()]
+    if initial_schedule is not None:
+        pop.extend(warm_start_population(PROBLEM, initial_schedule, pop_size - len(pop), rng))
+    else:
+        pop.extend([random_schedule(PROBLEM, rng) for _ in range(pop_size - len(pop))])
+    pop = pop[:pop_size]
+    
+    pbest = [[row[:] for row in s] for s in pop]
+    pbest_F = schedule_objectives(pbest)
+    archive = [[row[:] for row in s] for s in pop]
+    archive_F = pbest_F.copy()
+    best_cost = float(archive_F[:, 0].min())
+    if on_improve is not None:
+        on_improve(0, best_cost, archive[int(np.argmin(archive_F[:, 0]))])
     
-    pbest = [s[:] for s in pop]
-    costs = [calculate_cost(p) for p in pop]
-    archive = []
-
     for iteration in range(iterations):
-        gbest_idx = costs.index(min(costs))
-        gbest = pbest[gbest_idx]
-        new_pop = []
-
+        if should_stop is not None and should_stop():
+            break
+        lo = archive_F.min(axis=0)
+        span = np.maximum(archive_F.max(axis=0) - lo, 1e-9)
+        pbest_fit = ((pbest_F - lo) / span * weights[:, None, :]).sum(axis=2)
+        w = 0.9 - (0.5 * iteration / iterations)
+        
+        candidates = []
         for i, ind in enumerate(pop):
-            w = 0.9 - (0.5 * iteration / iterations)
-            c1 = pso_update(ind, pbest[i], gbest, w=w)
-            c2 = mutation(crossover(ind, random.choice(pop)))
-            
-            cost_c1 = calculate_cost(c1)
-            cost_c2 = calculate_cost(c2)
-            child = c1 if cost_c1 < cost_c2 else c2
-            
-            if iteration % 15 == 0 and i % 3 == 0:
-                child = greedy_improve(child)
-
+            gb = pbest[int(np.argmin(pbest_fit[i]))]
+            candidates.append(pso_update(PROBLEM, ind, pbest[i], gb, rng, w=w))
+            candidates.append(mutation(PROBLEM, crossover(PROBLEM, ind, pop[rng.integers(len(pop))], rng), rng))
+        cand_F = schedule_objectives(candidates)
+        cand_fit = ((cand_F - lo) / span * np.repeat(weights, 2, axis=0)).sum(axis=1)
+        
+        new_pop = []
+        children_F = []
+        for i in range(len(pop)):
+            j = 2 * i if cand_fit[2 * i] <= cand_fit[2 * i + 1] else 2 * i + 1
+            child, child_F = candidates[j], cand_F[j]
+            if greedy_every and iteration % greedy_every == 0 and i % 3 == 0 and weights[i, 0] >= 0.5:
+                child = greedy_improve(PROBLEM, child)
+                child_F = schedule_objectives([child])[0]
             new_pop.append(child)
-            c_cost = calculate_cost(child)
-
-            if c_cost < costs[i]:
+            if ((child_F - lo) / span) @ weights[i] < ((pbest_F[i] - lo) / span) @ weights[i]:
                 pbest[i] = [row[:] for row in child]
-                costs[i] = c_cost
-
-            archive.append({"schedule": [row[:] for row in child], "cost": c_cost})
-
+                pbest_F[i] = child_F
+            archive.append([row[:] for row in child])
+            children_F.append(child_F)
         pop = new_pop
+        archive_F = np.vstack([archive_F, children_F])
+        cheapest = int(np.argmin(archive_F[:, 0]))
+        if archive_F[cheapest, 0] < best_cost - 1e-9:
+            best_cost = float(archive_F[cheapest, 0])
+            if on_improve is not None:
+                on_improve(iteration + 1, best_cost, archive[cheapest])
         
-        if len(archive) > k * 10:
-            archive.sort(key=lambda x: x["cost"])
-            archive = archive[:int(len(archive) * 0.6)]
-
-    archive.sort(key=lambda x: x["cost"])
+        if len(archive) > archive_size:
+            unique_idx = unique_schedule_indices(archive)
+            keep = unique_idx[nsga_select(archive_F[unique_idx], archive_size)]
+            archive = [archive[j] for j in keep]
+            archive_F = archive_F[keep]
     
-    unique_archive = []
-    for item in archive:
-        is_duplicate = False
-        for existing in unique_archive:
-            diff = sum(sum(abs(item["schedule"][h][i] - existing["schedule"][h][i]) 
-                          for i in range(n_loads)) for h in range(24))
-            threshold = max(5, (24 * n_loads) * 0.05)
-            if diff < threshold:
-                is_duplicate = True
-                break
-        if not is_duplicate:
-            unique_archive.append(item)
-        if len(unique_archive) >= k * 5:
-            break
-    
-    # Create 3 distinct optimization levels
-    results = []
+    front = np.flatnonzero(fast_non_dominated_sort(archive_F) == 0)
+    front = front[unique_schedule_indices([archive[j] for j in front])]
+    chosen = [front[j] for j in spread_selection(archive_F[front], k)]
+    return [
+        {
+            "schedule": archive[j],
+            "cost": float(archive_F[j, 0]),
+            "objectives": {
+                "cost": float(archive_F[j, 0]),
+                "peakKw": float(archive_F[j, 1]),
+                "disruptionHours": int(archive_F[j, 2])
+            }
+        }
+        for j in chosen
+    ]
+
+def energy_cost_tiers(hourly_kwh):
+    """Floor on the cost of more energy in each hour at the given appliance load: ``(low, low_kwh, high)``.
+
+    Slab charges never fall as energy grows, so the time-of-use price is a
+    floor. A battery can lower it to the export credit for any amount; PV
+    alone only for what fits in the hour's surplus, the rest is imported.
+    """
+    hourly_kwh = np.asarray(hourly_kwh, dtype=float)
+    price = TARIFF.hourly_price
+    if ENERGY_SYSTEM is None:
+        return price, 0.0, price
+    credit = np.minimum(price, export_credit())
+    if ENERGY_SYSTEM.battery is not None:
+        return credit, np.inf, price
+    return credit, np.maximum(ENERGY_SYSTEM.pv_kwh - hourly_kwh, 0.0), price
+
+def exact_optimum(incumbent_cost=np.inf, time_limit=DEFAULT_TIME_LIMIT):
+    """Exact minimum-cost schedule of the current problem by branch and bound.
+
+    Every non-essential appliance runs exactly its minimum ON hours, as in
+    the repaired GAPSO schedules, so the result bounds how far GAPSO is from
+    optimal. Only small instances are supported (see exact.MAX_CANDIDATES).
+    """
+    fixed = np.zeros((24, n_loads), dtype=np.int8)
+    candidates, free = [], []
+    for i, name in enumerate(LOAD_NAMES):
+        if name in ESSENTIAL_LOADS:
+            fixed[:, i] = 1
+            continue
+        masks = subset_masks(MIN_ON_HOURS[name])
+        single = np.zeros((len(masks), 24, n_loads), dtype=np.int8)
+        single[:, :, i] = mask_bits(masks)
+        floor_kw = LOAD_PROFILES.profiles[i].min() if LOAD_PROFILES is not None else POWER_KW[i]
+        candidates.append((masks, schedule_energy(single), float(floor_kw), MIN_ON_HOURS[name]))
+        free.append(i)
     
-    if len(unique_archive) >= 1:
-        # MOST OPTIMIZED
-        best = {"schedule": [row[:] for row in unique_archive[0]["schedule"]], 
-                "cost": unique_archive[0]["cost"]}
-        best["schedule"] = greedy_improve(best["schedule"], max_iterations=20)
-        best["schedule"] = greedy_improve(best["schedule"], max_iterations=20)
-        best["cost"] = calculate_cost(best["schedule"])
-        results.append(best)
-        
-        # MODERATE OPTIMIZED
-        moderate = {"schedule": [row[:] for row in best["schedule"]], "cost": 0}
-        moderate_hours = [h for h in range(24) if 25 <= hourly_price[h] <= 30 and h not in peak_hours]
-        
-        for i, name in enumerate(LOAD_NAMES):
-            if name in ESSENTIAL_LOADS:
-                continue
-            
-            needed = MIN_ON_HOURS[name]
-            on_hours = [h for h in range(24) if moderate["schedule"][h][i] == 1]
-            cheap_on = [h for h in on_hours if hourly_price[h] <= 22]
-            cheap_on.sort(key=lambda h: hourly_price[h])
-            
-            num_to_move = max(1, int(needed * 0.35))
-            moved = 0
-            
-            for h_cheap in cheap_on[:num_to_move]:
-                if moved >= num_to_move or not moderate_hours:
-                    break
-                for h_mod in moderate_hours:
-                    if moderate["schedule"][h_mod][i] == 0:
-                        moderate["schedule"][h_cheap][i] = 0
-                        moderate["schedule"][h_mod][i] = 1
-                        moved += 1
-                        break
-        
-        moderate["schedule"] = repair_schedule(moderate["schedule"])
-        moderate["cost"] = calculate_cost(moderate["schedule"])
-        results.append(moderate)
-        
-        # LEAST OPTIMIZED
-        least = {"schedule": [row[:] for row in best["schedule"]], "cost": 0}
-        expensive_hours = [h for h in range(24) if 30 <= hourly_price[h] <= 40 and h not in peak_hours]
-        
-        for i, name in enumerate(LOAD_NAMES):
-            if name in ESSENTIAL_LOADS:
-                continue
-            
-            needed = MIN_ON_HOURS[name]
-            on_hours = [h for h in range(24) if least["schedule"][h][i] == 1]
-            cheap_on = [h for h in on_hours if hourly_price[h] <= 25]
-            cheap_on.sort(key=lambda h: hourly_price[h])
-            
-            num_to_move = max(1, int(needed * 0.55))
-            moved = 0
-            used_exp_hours = []
-            
-            for h_cheap in cheap_on[:num_to_move]:
-                if moved >= num_to_move or not expensive_hours:
-                    break
-                for h_exp in expensive_hours:
-                    if least["schedule"][h_exp][i] == 0 and h_exp not in used_exp_hours:
-                        least["schedule"][h_cheap][i] = 0
-                        least["schedule"][h_exp][i] = 1
-                        used_exp_hours.append(h_exp)
-                        moved += 1
-                        break
-        
-        for i, name in enumerate(LOAD_NAMES):
-            if name in ESSENTIAL_LOADS:
-                continue
-            needed = MIN_ON_HOURS[name]
-            current = sum(least["schedule"][h][i] for h in range(24))
-            if current < needed:
-                hours_with_price = [(h, hourly_price[h]) for h in range(24) if least["schedule"][h][i] == 0]
-                moderate = [(h, p) for h, p in hours_with_price if 25 <= p <= 30 and h not in peak_hours]
-                moderate.sort(key=lambda x: x[1])
-                if len(moderate) < (needed - current):
-                    other = [(h, p) for h, p in hours_with_price if h not in peak_hours and (h, p) not in moderate]
-                    other.sort(key=lambda x: x[1])
-                    moderate.extend(other)
-                
-                for h, _ in moderate:
-                    if current >= needed:
-                        break
-                    least["schedule"][h][i] = 1
-                    current += 1
-        
-        least["cost"] = calculate_cost(least["schedule"])
-        results.append(least)
+    result = branch_and_bound(schedule_energy(fixed), candidates, energy_cost, energy_cost_tiers,
+                              incumbent_cost=incumbent_cost, time_limit=time_limit)
+    if result["masks"] is not None:
+        for i, mask in zip(free, result["masks"]):
+            fixed[:, i] = mask_bits([mask])[0]
+        result["schedule"] = fixed.tolist()
+    del result["masks"]
+    return result
+
+def exact_seconds(data):
+    """Exact solver time limit of a debug request; ``exactSeconds`` may shorten DEFAULT_TIME_LIMIT, not extend it"""
+    return min(max(float(data.get('exactSeconds', DEFAULT_TIME_LIMIT)), 0.0), DEFAULT_TIME_LIMIT)
+
+def optimality_report(opt_results, time_limit=DEFAULT_TIME_LIMIT):
+    """Exact optimum of the current problem and the gap of every returned schedule (debug mode)"""
+    try:
+        exact = exact_optimum(min(opt["cost"] for opt in opt_results), time_limit=float(time_limit))
+    except ValueError as e:
+        return {"error": str(e)}, [None] * len(opt_results)
     
-    return results
+    bound = exact["lowerBound"]
+    gaps = [
+        {
+            "optimalityGap": opt["cost"] - bound,
+            "optimalityGapPercent": (opt["cost"] - bound) / bound * 100 if bound > 0 else None
+        }
+        for opt in opt_results
+    ]
+    return {k: v for k, v in exact.items() if k != "schedule"}, gaps
 
-def generate_baseline():
+def generate_baseline(rng):
     """Generate baseline schedule"""
-    sch = [[0]*n_loads for _ in range(24)]
-    for i, name in enumerate(LOAD_NAMES):
-        if name in ESSENTIAL_LOADS:
-            for h in range(24):
-                sch[h][i] = 1
+    sch = baseline_schedule(PROBLEM, rng)
+    return {"schedule": sch, "cost": calculate_cost(sch)}
+
+def previous_schedule_columns(previous):
+    """Map appliance id -> 24 on/off values from a previous schedule.
+
+    Accepts either the frontend schedule format returned by /api/optimize or
+    a plain ``{applianceId: [0/1 x 24]}`` mapping.
+    """
+    if isinstance(previous, dict):
+        return {app_id: [1 if v else 0 for v in col] for app_id, col in previous.items() if len(col) == 24}
+    columns = {}
+    for hour_cells in previous:
+        for cell in hour_cells:
+            hour = int(cell["hour"])
+            for app in cell["appliances"]:
+                columns.setdefault(app["id"], [0] * 24)[hour] = 1 if app["isOn"] else 0
+    return columns
+
+def map_previous_schedule(previous, appliances):
+    """Build a schedule for the current appliances from a previous solution.
+
+    Columns are matched by appliance id; new appliances start from the greedy
+    schedule. Returns None when no appliance could be matched.
+    """
+    columns = previous_schedule_columns(previous)
+    sch = greedy_schedule(PROBLEM)
+    matched = 0
+    for i, app in enumerate(appliances):
+        col = columns.get(app["id"])
+        if col is None:
             continue
+        for h in range(24):
+            sch[h][i] = col[h]
+        matched += 1
+    if matched == 0:
+        return None
+    return repair_schedule(PROBLEM, sch)
+
+def schedule_store():
+    """The persistent schedule store, or None when disabled or unavailable"""
+    global SCHEDULE_STORE
+    if SCHEDULE_STORE is None and SCHEDULE_DB:
+        with _STORE_LOCK:
+            if SCHEDULE_STORE is None:
+                try:
+                    SCHEDULE_STORE = ScheduleStore(SCHEDULE_DB)
+                    # Runs still waiting for the writer are written before the process exits
+                    atexit.register(SCHEDULE_STORE.close)
+                except sqlite3.Error as e:
+                    app.logger.warning("Schedule store disabled: %s", e)
+                    SCHEDULE_STORE = False
+    return SCHEDULE_STORE or None
+
+def tariff_hash(data):
+    """Stable hash of the tariff and objective part of a request.
+
+    The carbon blend and telescopic billing are only hashed when they differ
+    from the defaults, so plain tariffs keep the hashes they were stored with.
+    """
+    rates = sorted((int(r['hour']), float(r['rate'])) for r in data.get('tariffRates', []) or [])
+    tariff = [rates, data.get('tariffSlabs'), data.get('billingDays'), data.get('baseMonthlyKwh')]
+    carbon = data.get('carbonIntensity')
+    objective = [
+        None if carbon is None else [float(g) for g in carbon],
+        float(data.get('carbonWeight') or 0),
+        float(data.get('costWeight', 1)),
+        bool(data.get('telescopic', True))
+    ]
+    if objective != [None, 0.0, 1.0, True]:
+        tariff.append(objective)
+    return hashlib.sha256(json.dumps(tariff, sort_keys=True).encode()).hexdigest()[:32]
+
+def previous_household_schedule(household_id):
+    """Last schedule for a household: in-memory cache first, then the store"""
+    previous = HOUSEHOLD_SCHEDULES.get(household_id)
+    if previous is None and schedule_store() is not None:
+        latest = schedule_store().latest_schedule(household_id)
+        previous = latest["schedule"] if latest else None
+    return previous
 
-        needed = MIN_ON_HOURS[name]
-        hours = list(range(24))
-        random.shuffle(hours)
-        used = 0
-        for h in hours:
-            if used < needed:
-                sch[h][i] = 1
-                used += 1
-    cost = calculate_cost(sch)
-    return {"schedule": sch, "cost": cost}
+def household_request(data):
+    """Request payload for a household: the stored latest request, overridden by ``data``"""
+    if data.get('appliances') or data.get('householdId') is None:
+        return data
+    store = schedule_store()
+    stored = store.latest_request(data['householdId']) if store is not None else None
+    if stored is None:
+        raise ValueError(f"No stored request for household {data['householdId']}")
+    return dict(stored, **data)
+
+def record_run(data, appliances, opt_results, baseline_cost, plan):
+    """Queue the request and its results for the persistent store"""
+    store = schedule_store()
+    if store is None or not opt_results:
+        return
+    store.record(
+        household_id=data.get('householdId'),
+        tariff_hash=tariff_hash(data),
+        appliance_ids=[app["id"] for app in appliances],
+        schedule=opt_results[0]["schedule"],
+        cost=opt_results[0]["cost"],
+        baseline_cost=baseline_cost,
+        request={k: v for k, v in data.items() if k != 'previousSchedule'},
+        result={"costs": [opt["cost"] for opt in opt_results], "baselineCost": baseline_cost, "plan": plan}
+    )
+
+def remember_schedule(household_id, schedule, appliances):
+    """Store a household's optimized schedule for later warm starts"""
+    remember_columns(household_id, {
+        app["id"]: [schedule[h][i] for h in range(24)] for i, app in enumerate(appliances)
+    })
+
+def remember_columns(household_id, columns):
+    """Store a household's schedule, as ``{applianceId: [0/1 x 24]}``, for later warm starts"""
+    HOUSEHOLD_SCHEDULES[household_id] = columns
+    HOUSEHOLD_SCHEDULES.move_to_end(household_id)
+    while len(HOUSEHOLD_SCHEDULES) > MAX_STORED_HOUSEHOLDS:
+        HOUSEHOLD_SCHEDULES.popitem(last=False)
 
 def convert_schedule_to_frontend_format(schedule, appliances):
     """Convert backend schedule format to frontend format"""
@@ -405,82 +598,756 @@ def convert_schedule_to_frontend_format(schedule, appliances):
         schedule_cells.append(hour_data)
     return schedule_cells
 
-@app.route('/api/optimize', methods=['POST'])
-def optimize():
-    """Main optimization endpoint"""
-    try:
-        data = request.json
-        
-        # Extract data
-        appliances = data.get('appliances', [])
-        tariff_rates = data.get('tariffRates', [])
-        
-        if not appliances or not tariff_rates:
-            return jsonify({"error": "Missing appliances or tariff rates"}), 400
-        
-        # Set global variables
-        global LOAD_POWER, ESSENTIAL_LOADS, MIN_ON_HOURS, LOAD_NAMES, n_loads, hourly_price, peak_hours
-        
-        LOAD_POWER = {}
-        ESSENTIAL_LOADS = set()
-        MIN_ON_HOURS = {}
-        
-        for app in appliances:
-            name = app['name']
-            LOAD_POWER[name] = float(app['wattage'])
-            if app.get('isEssential', False):
-                ESSENTIAL_LOADS.add(name)
-                MIN_ON_HOURS[name] = 24
+def problem_key(data):
+    """Normalized key identifying an optimization problem for request coalescing"""
+    appliances = [
+        {
+            "id": app.get('id'),
+            "name": app.get('name'),
+            "wattage": float(app.get('wattage', 0)),
+            "isEssential": bool(app.get('isEssential', False)),
+            "hours": sorted(int(h) for h in app.get('hours', []) or [])
+        }
+        for app in data.get('appliances', []) or []
+    ]
+    rates = sorted((int(r['hour']), float(r['rate'])) for r in data.get('tariffRates', []) or [])
+    rest = {k: v for k, v in data.items() if k not in ('appliances', 'tariffRates')}
+    normalized = json.dumps([appliances, rates, rest], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+def nominal_costs(data):
+    """nominal_evaluation_cost for a request, from its appliance count and cost model"""
+    battery = data.get('battery')
+    appliances = data.get('appliances', []) or []
+    return nominal_evaluation_cost(
+        len(appliances),
+        soc_steps=int(battery.get('socSteps', DEFAULT_SOC_STEPS)) if battery else 0,
+        profiles=any(app.get('powerProfile') for app in appliances),
+        slabs=bool(data.get('tariffSlabs'))
+    )
+
+def planned_seconds(data):
+    """Seconds an optimization request is planned to run, for admission control.
+
+    Planned as plan_optimization does, but from nominal evaluation costs:
+    the problem is not set up before admission. Debug requests add the
+    exact solver's time limit.
+    """
+    n = len(data.get('appliances', []) or [])
+    plan = plan_search(
+        n,
+        *nominal_costs(data),
+        target_seconds=data.get('targetSeconds'),
+        max_evaluations=data.get('maxEvaluations'),
+        iterations=data.get('iterations'),
+        pop_size=data.get('populationSize'),
+        warm_start=data.get('previousSchedule') is not None,
+        evals_per_individual=PARETO_EVALS_PER_INDIVIDUAL if data.get('mode') == 'pareto' else EVALS_PER_INDIVIDUAL
+    )
+    seconds = plan["estimatedSeconds"] / (1 - FINALIZE_SHARE)
+    if data.get('debug'):
+        seconds += exact_seconds(data)
+    return seconds
+
+def fleet_seconds(data):
+    """Planned seconds of a fleet run: every household re-solved each round, spread over the workers"""
+    solves = len(data.get('households', []) or []) * int(data.get('rounds', DEFAULT_ROUNDS))
+    workers = int(data.get('workers') or os.cpu_count() or 1)
+    return solves * float(data.get('householdSeconds', DEFAULT_HOUSEHOLD_SECONDS)) / workers
+
+def set_problem(data):
+    """Set the optimizer globals from a request payload"""
+    appliances = data.get('appliances', [])
+    tariff_rates = data.get('tariffRates', [])
+    
+    if not appliances or not tariff_rates:
+        raise ValueError("Missing appliances or tariff rates")
+    
+    global LOAD_POWER, ESSENTIAL_LOADS, MIN_ON_HOURS, LOAD_NAMES, n_loads, hourly_price, peak_hours
+    global POWER_KW, TARIFF, ENERGY_SYSTEM, LOAD_PROFILES, RUN_COST_TABLE, REQUESTED_HOURS, OUTSIDE_REQUESTED
+    global PROBLEM
+    
+    LOAD_POWER = {}
+    ESSENTIAL_LOADS = set()
+    MIN_ON_HOURS = {}
+    
+    for app in appliances:
+        name = app['name']
+        LOAD_POWER[name] = float(app['wattage'])
+        if app.get('isEssential', False):
+            ESSENTIAL_LOADS.add(name)
+            MIN_ON_HOURS[name] = 24
+        else:
+            # Calculate min hours from hours array (if provided)
+            # Otherwise use a default minimum
+            hours_array = app.get('hours', [])
+            if hours_array and len(hours_array) > 0:
+                MIN_ON_HOURS[name] = len(hours_array)
             else:
-                # Calculate min hours from hours array (if provided)
-                # Otherwise use a default minimum
-                hours_array = app.get('hours', [])
-                if hours_array and len(hours_array) > 0:
-                    MIN_ON_HOURS[name] = len(hours_array)
-                else:
-                    # Default to 1 hour if no hours specified
-                    MIN_ON_HOURS[name] = 1
+                # Default to 1 hour if no hours specified
+                MIN_ON_HOURS[name] = 1
+    
+    LOAD_NAMES = [app['name'] for app in appliances]
+    n_loads = len(LOAD_NAMES)
+    
+    REQUESTED_HOURS = {
+        app['name']: sorted({int(h) % 24 for h in app.get('hours', []) or []})
+        for app in appliances if not app.get('isEssential', False)
+    }
+    OUTSIDE_REQUESTED = np.zeros((24, n_loads))
+    for i, name in enumerate(LOAD_NAMES):
+        if REQUESTED_HOURS.get(name):
+            OUTSIDE_REQUESTED[:, i] = 1
+            OUTSIDE_REQUESTED[REQUESTED_HOURS[name], i] = 0
+    
+    hourly_price, peak_hours = load_tariff_data_from_dict(tariff_rates)
+    POWER_KW = np.array([LOAD_POWER[name] for name in LOAD_NAMES]) / 1000
+    TARIFF = TariffModel(
+        hourly_price,
+        slabs=load_slabs_from_dict(data.get('tariffSlabs')),
+        billing_days=data.get('billingDays', DEFAULT_BILLING_DAYS),
+        base_monthly_kwh=data.get('baseMonthlyKwh', 0),
+        telescopic=data.get('telescopic', True),
+        carbon_kg=load_carbon_from_dict(data),
+        carbon_weight=data.get('carbonWeight', 0),
+        cost_weight=data.get('costWeight', 1)
+    )
+    if TARIFF.is_blended:
+        # The heuristics (repair, greedy moves) follow the blended price too
+        hourly_price = TARIFF.hourly_price.tolist()
+        peak_hours = [h for h, p in enumerate(hourly_price) if p == max(hourly_price)]
+    ENERGY_SYSTEM = load_energy_system_from_dict(data)
+    LOAD_PROFILES = load_profiles_from_dict(appliances)
+    RUN_COST_TABLE = None
+    if LOAD_PROFILES is not None and not TARIFF.has_slabs and ENERGY_SYSTEM is None:
+        RUN_COST_TABLE = LOAD_PROFILES.run_cost_table(TARIFF.hourly_price)
+    # With PV or a battery the tariff misranks the hours; the heuristics use the marginal cost instead
+    PROBLEM = Problem(LOAD_NAMES, ESSENTIAL_LOADS, MIN_ON_HOURS, hourly_price, peak_hours, schedule_cost,
+                      marginal_prices=ENERGY_SYSTEM is not None)
+    return appliances
+
+def open_checkpoint(data):
+    """Checkpoint writer for a request's checkpointId and the state to resume, if any.
+
+    A stored checkpoint is only resumed when it belongs to the same problem;
+    an unreadable one is ignored and overwritten.
+    """
+    path = checkpoint_path(data['checkpointId'])
+    resume = load_checkpoint(path, SNAPSHOT_KEYS + ("problem_key", "plan"))
+    if resume is not None and (str(resume.get("problem_key")) != problem_key(data)
+                               or int(resume["n_loads"]) != n_loads):
+        resume = None
+    return CheckpointWriter(path), resume
+
+def low_memory_options(data, memory_limit, plan):
+    """Search options of the low-memory profile: the compact engine under a memory cap in MB.
+
+    ``plan["popSize"]`` is shrunk until the estimated search state fits the cap.
+    """
+    if data.get('mode') == 'pareto':
+        raise ValueError("Pareto mode is not available with a memory limit")
+    if data.get('engine') not in (None, 'compact'):
+        raise ValueError("A memory limit needs the 'compact' engine")
+    if float(memory_limit) <= 0:
+        raise ValueError("memoryLimitMb must be positive")
+    limit = float(memory_limit) * 1024 * 1024
+    plan["popSize"] = fit_population(plan["popSize"], n_loads, ARCHIVE_SLOTS_PER_LEVEL * int(data.get('k', 3)), limit)
+    return {"engine": "compact", "memory_limit": limit}
+
+def run_optimization(data, on_improve=None, should_stop=None):
+    """Run the full optimization pipeline for a request payload.
+
+    The optimizer works on module globals, so runs are serialized on
+    ENGINE_LOCK. ``on_improve``/``should_stop`` are passed to the search.
+    """
+    with ENGINE_LOCK:
+        appliances = set_problem(data)
+        seed_seq = np.random.SeedSequence(data.get('seed'))
+        rng = np.random.default_rng(seed_seq)
         
-        LOAD_NAMES = [app['name'] for app in appliances]
-        n_loads = len(LOAD_NAMES)
+        # Generate baseline
+        baseline = generate_baseline(rng)
+        baseline_report = cost_report(baseline["schedule"], baseline["cost"])
+        baseline_cost = baseline_report["cost"]
         
-        hourly_price, peak_hours = load_tariff_data_from_dict(tariff_rates)
+        # Warm start from a previous solution when available
+        household_id = data.get('householdId')
+        previous = data.get('previousSchedule')
+        if previous is None and household_id is not None:
+            previous = previous_household_schedule(household_id)
+        initial_schedule = map_previous_schedule(previous, appliances) if previous else None
         
-        # Generate baseline
-        baseline = generate_baseline()
-        baseline_cost = baseline["cost"]
+        # Plan the search for the request budget and run optimization
+        plan = plan_optimization(data, warm_start=initial_schedule is not None)
+        memory_limit = data.get('memoryLimitMb', DEFAULT_MEMORY_LIMIT_MB)
+        memory_options = low_memory_options(data, memory_limit, plan) if memory_limit is not None else {}
+        options = {}
+        checkpoint = None
+        resumed_from = None
+        if data.get('checkpointId') and data.get('mode') != 'pareto':
+            checkpoint, resume = open_checkpoint(data)
+            if resume is not None:
+                plan = array_json(resume["plan"])
+                resumed_from = int(resume["generation"])
+            options = dict(checkpoint=checkpoint, resume=resume, checkpoint_extra=dict(
+                problem_key=np.array(problem_key(data)),
+                plan=json_array(plan)
+            ))
+        optimizer = gapso_pareto if data.get('mode') == 'pareto' else gapso_optimize
+        search = {}
+        if optimizer is gapso_optimize:
+            options.update(problem=PROBLEM, engine=data.get('engine'),
+                           operator_seconds=operator_costs(data, plan), stats=search)
+        options.update(memory_options)
+        stopped = False
+
+        def stop_requested():
+            nonlocal stopped
+            stopped = stopped or (should_stop is not None and should_stop())
+            return stopped
+
+        finished = False
+        try:
+            # tracemalloc is a debugging aid: it slows the whole process down while it runs
+            trace_memory = memory_limit is not None and data.get('traceMemory')
+            with memory_probe() if trace_memory else nullcontext() as memory:
+                opt_results = optimizer(
+                    iterations=plan["iterations"],
+                    pop_size=plan["popSize"],
+                    k=int(data.get('k', 3)),
+                    initial_schedule=initial_schedule,
+                    greedy_every=plan["greedyEvery"],
+                    rng=rng,
+                    on_improve=on_improve,
+                    should_stop=stop_requested,
+                    **options
+                )
+            finished = not stopped
+        finally:
+            # Keep the checkpoint unless the search ran to the end: a stopped or failed run resumes from it
+            if checkpoint is not None:
+                checkpoint.close(remove=finished)
+        if household_id is not None and opt_results:
+            remember_schedule(household_id, opt_results[0]["schedule"], appliances)
+        record_run(data, appliances, opt_results, baseline_cost, plan)
         
-        # Run optimization
-        opt_results = gapso_optimize(k=3)
+        exact, gaps = None, [None] * len(opt_results)
+        if data.get('debug'):
+            exact, gaps = optimality_report(opt_results, exact_seconds(data))
         
         # Convert results to frontend format
         results = []
-        for opt in opt_results:
+        for opt, gap in zip(opt_results, gaps):
             schedule = convert_schedule_to_frontend_format(opt["schedule"], appliances)
+            report = cost_report(opt["schedule"], opt["cost"])
+            cost = report.pop("cost")
             results.append({
                 "schedule": schedule,
                 "costBefore": baseline_cost,
-                "costAfter": opt["cost"],
-                "savings": baseline_cost - opt["cost"],
-                "savingsPercentage": ((baseline_cost - opt["cost"]) / baseline_cost * 100) if baseline_cost > 0 else 0
+                "costAfter": cost,
+                "savings": baseline_cost - cost,
+                "savingsPercentage": ((baseline_cost - cost) / baseline_cost * 100) if baseline_cost > 0 else 0,
+                "monthlyBill": calculate_monthly_bill(opt["schedule"]),
+                **report
             })
+            if "objectives" in opt:
+                results[-1]["objectives"] = opt["objectives"]
+            if ENERGY_SYSTEM is not None:
+                results[-1]["energy"] = energy_dispatch_summary(opt["schedule"])
+            if gap is not None:
+                results[-1].update(gap)
         
-        return jsonify({
+        response = {
             "success": True,
             "baseline": {
                 "schedule": convert_schedule_to_frontend_format(baseline["schedule"], appliances),
-                "cost": baseline_cost
+                "monthlyBill": calculate_monthly_bill(baseline["schedule"]),
+                **baseline_report
             },
-            "results": results
-        })
+            "results": results,
+            "warmStarted": initial_schedule is not None,
+            "plan": plan,
+            "resumedFromGeneration": resumed_from,
+            "seed": seed_seq.entropy
+        }
+        if search:
+            response["search"] = {key: search[key] for key in ("evaluations", "restarts", "operatorCalls")}
+        if memory_limit is not None:
+            response["memory"] = dict(memory or {}, limitMb=float(memory_limit), popSize=search["popSize"],
+                                      capHit=search["memoryCapHit"])
+        if exact is not None:
+            response["exact"] = exact
+        return response
+
+def solve_household(task):
+    """Optimize one household against its tariff plus a shadow price (fleet worker).
+
+    Returns the best schedule as ``{applianceId: [0/1 x 24]}``, its grid
+    energy per hour and its cost on the real tariff.
+    """
+    household, shadow_price, previous, seed = task
+    shadowed = dict(household)
+    shadowed['tariffRates'] = [
+        {"hour": r['hour'], "rate": float(r['rate']) + shadow_price[int(r['hour'])]}
+        for r in household['tariffRates']
+    ]
+    with ENGINE_LOCK:
+        appliances = set_problem(shadowed)
+        initial_schedule = map_previous_schedule(previous, appliances) if previous else None
+        plan = plan_optimization(household, warm_start=initial_schedule is not None)
+        best = gapso_optimize(
+            PROBLEM,
+            engine=household.get('engine'),
+            iterations=plan["iterations"],
+            pop_size=plan["popSize"],
+            k=1,
+            initial_schedule=initial_schedule,
+            greedy_every=plan["greedyEvery"],
+            rng=np.random.default_rng(seed),
+            operator_seconds=operator_costs(household, plan)
+        )[0]["schedule"]
+        grid = dispatch_energy(schedule_energy(np.asarray(best, dtype=np.int8)))[0]
+        cost = cost_report(best, calculate_cost(best))["cost"] - float(np.dot(shadow_price, grid))
+    return {
+        "householdId": household.get('householdId'),
+        "schedule": {app["id"]: [best[h][i] for h in range(24)] for i, app in enumerate(appliances)},
+        "gridKwh": grid.tolist(),
+        "cost": cost
+    }
+
+def run_fleet(data):
+    """Coordinate a fleet of households under a shared feeder limit"""
+    households = data.get('households', [])
+    if not households or data.get('feederLimitKw') is None:
+        raise ValueError("Missing households or feederLimitKw")
+    shared_rates = data.get('tariffRates')
+    target = data.get('householdSeconds', DEFAULT_HOUSEHOLD_SECONDS)
+    prepared = []
+    for household in households:
+        household = dict(household)
+        household.setdefault('tariffRates', shared_rates)
+        household.setdefault('targetSeconds', target)
+        if data.get('seed') is not None:
+            # Plan household searches reproducibly too
+            household.setdefault('seed', data['seed'])
+        if data.get('engine') is not None:
+            household.setdefault('engine', data['engine'])
+        if not household.get('appliances') or not household.get('tariffRates'):
+            raise ValueError("Every household needs appliances and tariff rates")
+        prepared.append(household)
+    base_price = load_tariff_data_from_dict(prepared[0]['tariffRates'])[0]
+    
+    workers = int(data.get('workers') or os.cpu_count() or 1)
+    options = dict(
+        feeder_limit=data['feederLimitKw'],
+        base_price=base_price,
+        rounds=int(data.get('rounds', DEFAULT_ROUNDS)),
+        step=float(data.get('step', DEFAULT_STEP)),
+        batches=int(data.get('batches', DEFAULT_BATCHES)),
+        seed=data.get('seed')
+    )
+    checkpoint = None
+    if data.get('checkpointId'):
+        path = checkpoint_path(data['checkpointId'])
+        resume = load_checkpoint(path, FLEET_SNAPSHOT_KEYS + ("problem_key",))
+        if resume is not None and str(resume.get("problem_key")) != problem_key(data):
+            resume = None
+        checkpoint = CheckpointWriter(path)
+        options.update(checkpoint=checkpoint, resume=resume,
+                       checkpoint_extra={"problem_key": np.array(problem_key(data))})
+    
+    finished = False
+    try:
+        if workers <= 1:
+            result = coordinate_fleet(prepared, solve_household, **options)
+        else:
+            # Spawned workers: forking a threaded server could copy a held ENGINE_LOCK
+            chunksize = max(1, len(prepared) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                result = coordinate_fleet(
+                    prepared, solve_household,
+                    map_fn=lambda fn, tasks: pool.map(fn, tasks, chunksize=chunksize),
+                    **options
+                )
+        finished = True
+        return result
+    finally:
+        if checkpoint is not None:
+            checkpoint.close(remove=finished)
+
+def is_separable():
+    """True when the cost is linear in each hour's energy (no PV/battery, no power profiles)"""
+    return ENERGY_SYSTEM is None and LOAD_PROFILES is None
+
+def search_scenario(data, rates, initial_schedule, seed):
+    """Optimize the current problem under other hourly rates; returns (schedule, cost report, grid kWh)"""
+    scenario = dict(data, tariffRates=[{"hour": h, "rate": float(r)} for h, r in enumerate(rates)])
+    scenario.setdefault('targetSeconds', DEFAULT_SCENARIO_SECONDS)
+    set_problem(scenario)
+    plan = plan_optimization(scenario, warm_start=initial_schedule is not None)
+    best = gapso_optimize(
+        PROBLEM,
+        engine=scenario.get('engine'),
+        iterations=plan["iterations"],
+        pop_size=plan["popSize"],
+        k=1,
+        initial_schedule=initial_schedule,
+        greedy_every=plan["greedyEvery"],
+        rng=np.random.default_rng(seed),
+        operator_seconds=operator_costs(scenario, plan)
+    )[0]["schedule"]
+    grid = dispatch_energy(schedule_energy(np.asarray(best, dtype=np.int8)))[0]
+    return best, cost_report(best, calculate_cost(best)), grid
+
+def sensitivity_seconds(data):
+    """Planned seconds of a sensitivity request: a search per scenario unless the problem is separable"""
+    data = household_request(data)
+    if load_energy_system_from_dict(data) is None and load_profiles_from_dict(data.get('appliances') or []) is None:
+        return 0.0
+    scenarios = scenario_count(data.get('perturbations'), data.get('hourlyDelta'))
+    if scenarios > MAX_SEARCH_SCENARIOS:
+        raise ValueError(f"At most {MAX_SEARCH_SCENARIOS} scenarios per request with PV, a battery or power profiles")
+    return (scenarios + 1) * float(data.get('targetSeconds') or DEFAULT_SCENARIO_SECONDS)
+
+def run_sensitivity(data):
+    """Optimal cost of a household under many tariff perturbations.
+
+    In the separable case every scenario is re-solved from the hour ranks of
+    one stacked price matrix, with no search. Otherwise each scenario is
+    searched, warm-started from the base optimum. The marginal cost of hour h
+    is the optimal grid energy in that hour (d cost / d price_h).
+    """
+    data = household_request(data)
+    include_schedules = bool(data.get('includeSchedules', False))
+    seed_seq = np.random.SeedSequence(data.get('seed'))
+    with ENGINE_LOCK:
+        appliances = set_problem(data)
+        base_rates = TARIFF.tariff_price.tolist()
+        separable = is_separable()
+        names, prices = scenario_prices(base_rates, data.get('perturbations'), data.get('hourlyDelta'),
+                                        max_scenarios=MAX_SCENARIOS if separable else MAX_SEARCH_SCENARIOS)
+        prices = np.vstack([base_rates, prices])
         
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        if separable:
+            on_hours = [MIN_ON_HOURS[name] for name in LOAD_NAMES]
+            schedules = separable_optimum(TARIFF.objective_price(prices), on_hours)
+            grid = schedule_energy(schedules)
+            objective = TARIFF.daily_cost(grid, prices)
+            reports = [{"cost": float(c)} for c in objective]
+            if TARIFF.is_blended:
+                bills = TARIFF.monthly_bill(grid, prices) / TARIFF.billing_days
+                reports = [{"cost": float(b), "objective": float(c)} for b, c in zip(bills, objective)]
+            if TARIFF.carbon_kg is not None:
+                for report, co2 in zip(reports, TARIFF.emissions_kg(grid)):
+                    report["co2Kg"] = float(co2)
+            method = "separable"
+        else:
+            seeds = seed_seq.spawn(len(prices))
+            base = search_scenario(data, base_rates, None, seeds[0])
+            solved = [base] + [search_scenario(data, rates, base[0], seed)
+                               for rates, seed in zip(prices[1:], seeds[1:])]
+            set_problem(data)
+            schedules = np.asarray([s for s, _, _ in solved], dtype=np.int8)
+            reports = [r for _, r, _ in solved]
+            grid = np.array([g for _, _, g in solved])
+            method = "search"
+    
+    def entry(k):
+        item = dict(
+            reports[k],
+            costChange=reports[k]["cost"] - reports[0]["cost"],
+            marginalCost=grid[k].tolist()
+        )
+        if include_schedules:
+            item["schedule"] = convert_schedule_to_frontend_format(schedules[k].tolist(), appliances)
+        return item
+    
+    return {
+        "method": method,
+        "seed": seed_seq.entropy,
+        "base": dict(entry(0), rates=base_rates),
+        "scenarios": [dict(entry(k + 1), name=name, rates=prices[k + 1].tolist()) for k, name in enumerate(names)]
+    }
+
+def resolve_household(task):
+    """Re-optimize one household for a demand-response event (event worker).
+
+    Only the flexible appliances whose current schedule is ON in an affected
+    hour are searched, warm-started from the current schedule with the
+    forbidden hours cleared; every other appliance keeps its schedule. Costs
+    before and after are both on the event tariff; ``ownTariffCost`` prices
+    the new schedule on the household's own tariff for the schedule store.
+    """
+    request, previous, event, seed = task
+    household_id = request.get('householdId')
+    event_request = dict(request, tariffRates=event.apply_rates(request['tariffRates']))
+    with ENGINE_LOCK:
+        appliances = set_problem(event_request)
+        current = map_previous_schedule(previous, appliances)
+        if current is None:
+            return {"householdId": household_id, "skipped": "stored schedule does not match its appliances"}
+        cols = event.touched_columns(current, ~PROBLEM.essential_mask)
+        cost_before = calculate_cost(current)
+        schedule = current
+        if cols:
+            fixed = np.asarray(current, dtype=np.int8)
+
+            def event_cost(schedules):
+                full = np.broadcast_to(fixed, schedules.shape[:-1] + (n_loads,)).copy()
+                full[..., cols] = schedules
+                return schedule_cost(full) + event.penalty(appliance_energy(full)[..., cols], hourly_price)
+
+            names = [LOAD_NAMES[c] for c in cols]
+            problem = Problem(names, (), {name: MIN_ON_HOURS[name] for name in names}, hourly_price,
+                              sorted(set(peak_hours) | set(event.forbidden_hours)), event_cost,
+                              marginal_prices=ENERGY_SYSTEM is not None)
+            start = repair_schedule(problem, event.curtailment_start(fixed[:, cols].tolist()))
+            plan = plan_optimization(event_request, warm_start=True)
+            best = gapso_optimize(
+                problem,
+                engine=event_request.get('engine'),
+                iterations=plan["iterations"],
+                pop_size=plan["popSize"],
+                k=1,
+                initial_schedule=start,
+                greedy_every=plan["greedyEvery"],
+                rng=np.random.default_rng(seed),
+                operator_seconds=operator_costs(event_request, plan)
+            )[0]["schedule"]
+            merged = fixed.copy()
+            merged[:, cols] = best
+            # Keep the current schedule unless fewer forbidden slots are ON or the event-tariff cost drops
+            candidate = merged.tolist()
+
+            def curtailed(s):
+                return int(np.asarray(s)[event.forbidden_hours][:, cols].sum())
+
+            if (curtailed(candidate), calculate_cost(candidate)) < (curtailed(current), cost_before):
+                schedule = candidate
+        before_kwh = schedule_energy(np.asarray(current, dtype=np.int8))
+        after_kwh = schedule_energy(np.asarray(schedule, dtype=np.int8))
+        shifted, relieved = load_shift(before_kwh, after_kwh, event.affected_hours)
+        forbidden = np.asarray(schedule)[event.forbidden_hours][:, ~PROBLEM.essential_mask]
+        cost_after = calculate_cost(schedule)
+        # What the schedule costs once the event is over, as the store keys it by the household's own tariff
+        set_problem(request)
+        own_cost = calculate_cost(schedule)
+    return {
+        "householdId": household_id,
+        "changed": schedule != current,
+        "reoptimized": [appliances[c]["id"] for c in cols],
+        "appliances": [app["id"] for app in appliances],
+        "schedule": schedule,
+        "costBefore": cost_before,
+        "costAfter": cost_after,
+        "ownTariffCost": own_cost,
+        "shiftedKwh": shifted,
+        "eventKwhReduction": relieved,
+        "forbiddenSlotsOn": int(forbidden.sum())
+    }
+
+def demand_response_seconds(data):
+    """Planned seconds of a demand-response run: one re-solve per household, spread over the workers"""
+    store = schedule_store()
+    households = len(data.get('householdIds') or (store.household_ids() if store is not None else []))
+    workers = min(int(data.get('workers') or os.cpu_count() or 1), max(1, households))
+    return households * float(data.get('householdSeconds', DEFAULT_EVENT_HOUSEHOLD_SECONDS)) / workers
+
+def run_demand_response(data):
+    """Re-optimize the affected households of a demand-response event in parallel.
+
+    Households (``householdIds``, default every stored household) are loaded
+    from their latest stored request and schedule. Changed schedules become
+    the households' new warm starts and are stored against their own tariff,
+    so the event's rates do not outlive it.
+    """
+    event = load_event_from_dict(data)
+    store = schedule_store()
+    if store is None:
+        raise ValueError("Demand-response events need the schedule store")
+    household_ids = data.get('householdIds') or store.household_ids()
+    seed_seq = np.random.SeedSequence(data.get('seed'))
+    started = time.perf_counter()
+    
+    bases, tasks, skipped = [], [], []
+    for household_id, seed in zip(household_ids, seed_seq.spawn(len(household_ids))):
+        stored = store.latest_request(household_id)
+        previous = previous_household_schedule(household_id)
+        if stored is None or previous is None or not stored.get('tariffRates'):
+            skipped.append({"householdId": household_id, "skipped": "no stored request and schedule"})
+            continue
+        stored = dict(stored, householdId=household_id)
+        task = dict(stored, targetSeconds=data.get('householdSeconds', DEFAULT_EVENT_HOUSEHOLD_SECONDS))
+        if data.get('engine') is not None:
+            task['engine'] = data['engine']
+        bases.append(stored)
+        tasks.append((task, previous, event, seed))
+    
+    workers = min(int(data.get('workers') or os.cpu_count() or 1), max(1, len(tasks)))
+    if workers <= 1:
+        results = list(map(resolve_household, tasks))
+    else:
+        # Spawned workers: forking a threaded server could copy a held ENGINE_LOCK
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(resolve_household, tasks, chunksize=chunksize))
+    
+    households = []
+    for stored, result in zip(bases, results):
+        if "skipped" in result:
+            skipped.append(result)
+            continue
+        schedule, ids, own_cost = result.pop("schedule"), result.pop("appliances"), result.pop("ownTariffCost")
+        if result["changed"]:
+            remember_columns(stored['householdId'], {
+                app_id: [schedule[h][i] for h in range(24)] for i, app_id in enumerate(ids)
+            })
+            store.record(
+                household_id=stored['householdId'],
+                tariff_hash=tariff_hash(stored),
+                appliance_ids=ids,
+                schedule=schedule,
+                cost=own_cost,
+                baseline_cost=None,
+                request=stored,
+                result={"eventId": event.event_id, "costBefore": result["costBefore"],
+                        "costAfter": result["costAfter"], "reoptimized": result["reoptimized"]}
+            )
+        households.append(result)
+    
+    return {
+        "eventId": event.event_id,
+        "affectedHours": event.affected_hours,
+        "households": households,
+        "skipped": skipped,
+        "changed": sum(1 for h in households if h["changed"]),
+        "shiftedKwh": sum(h["shiftedKwh"] for h in households),
+        "eventKwhReduction": sum(h["eventKwhReduction"] for h in households),
+        "costChange": sum(h["costAfter"] - h["costBefore"] for h in households),
+        "seconds": time.perf_counter() - started
+    }
+
+def request_data():
+    """JSON object body of the current request (ValueError, so a 400, otherwise)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    return data
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(e):
+    response = jsonify({"success": False, "error": str(e)})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
+@app.errorhandler(ValueError)
+def bad_request(e):
+    return jsonify({"success": False, "error": str(e)}), 400
+
+@app.errorhandler(Exception)
+def server_error(e):
+    # Routing and other HTTP errors keep their own status
+    if isinstance(e, HTTPException):
+        return e
+    return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/optimize', methods=['POST'])
+def optimize():
+    """Main optimization endpoint
+
+    Identical requests that arrive while one is already running share its
+    result instead of starting another GAPSO run. Runs go through admission
+    control and get 429 with Retry-After when the optimizer is saturated.
+    """
+    data = request_data()
+    payload, shared = OPTIMIZE_FLIGHTS.do(
+        problem_key(data),
+        lambda: OPTIMIZE_ADMISSION.run(planned_seconds(data), lambda: run_optimization(data))
+    )
+    response = jsonify(payload)
+    if shared:
+        response.headers['X-Coalesced'] = '1'
+    return response
+
+def compact_schedule(schedule, appliance_ids):
+    """Schedule as one 24-character 0/1 string per appliance id"""
+    return {
+        app_id: "".join("1" if schedule[h][i] else "0" for h in range(24))
+        for i, app_id in enumerate(appliance_ids)
+    }
+
+@app.route('/api/optimize/stream', methods=['POST'])
+def optimize_stream():
+    """Streaming optimization endpoint (Server-Sent Events).
+
+    Emits an ``improvement`` event (cost, generation, compact schedule)
+    whenever the best schedule improves, throttled by ImprovementStream, and
+    ends with a ``result`` event carrying the normal /api/optimize payload
+    (or an ``error`` event). Closing the connection stops the search.
+    """
+    data = request_data()
+    ticket = OPTIMIZE_ADMISSION.acquire(planned_seconds(data))
+    
+    stream = ImprovementStream()
+    appliance_ids = [app.get('id') for app in data.get('appliances', []) or []]
+    
+    def work():
+        try:
+            result = run_optimization(data, on_improve=stream.improve, should_stop=stream.should_stop)
+            stream.finish("result", result)
+        except ValueError as e:
+            stream.finish("error", {"error": str(e), "status": 400})
+        except Exception as e:
+            stream.finish("error", {"error": str(e), "status": 500})
+        finally:
+            OPTIMIZE_ADMISSION.release(ticket)
+    
+    threading.Thread(target=work, daemon=True).start()
+    events = stream.events(lambda schedule: {"schedule": compact_schedule(schedule, appliance_ids)})
+    return Response(events, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/fleet/optimize', methods=['POST'])
+def optimize_fleet():
+    """Fleet optimization endpoint: many households under a shared feeder limit"""
+    data = request_data()
+    result = OPTIMIZE_ADMISSION.run(fleet_seconds(data), lambda: run_fleet(data))
+    return jsonify(dict(result, success=True))
+
+@app.route('/api/tariff/sensitivity', methods=['POST'])
+def tariff_sensitivity():
+    """Optimal cost and per-hour marginal cost of a household under tariff perturbations"""
+    data = request_data()
+    result = OPTIMIZE_ADMISSION.run(sensitivity_seconds(data), lambda: run_sensitivity(data))
+    return jsonify(dict(result, success=True))
+
+@app.route('/api/demand-response/events', methods=['POST'])
+def demand_response_event():
+    """Re-optimize stored households around a demand-response event"""
+    data = request_data()
+    result = OPTIMIZE_ADMISSION.run(demand_response_seconds(data), lambda: run_demand_response(data))
+    return jsonify(dict(result, success=True))
+
+@app.route('/api/households/<household_id>/history', methods=['GET'])
+def household_history(household_id):
+    """Stored optimization runs for a household, newest first"""
+    store = schedule_store()
+    if store is None:
+        return jsonify({"success": False, "error": "Schedule store is disabled"}), 404
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        raise ValueError("limit must be an integer") from None
+    limit = min(max(limit, 1), 500)
+    return jsonify({"householdId": household_id, "runs": store.history(household_id, limit)})
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "optimize": dict(OPTIMIZE_ADMISSION.stats(), coalescing=OPTIMIZE_FLIGHTS.in_flight())
+    })
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,466 @@
+"""Asyncio (ASGI) entry point that runs optimizations in a warm process pool.
+
+The WSGI server runs every GAPSO search on its request thread, so open
+connections and CPU-bound searches compete for the same threads. Here HTTP
+is handled on one asyncio event loop and ``POST /api/optimize`` is sent to a
+pool of worker processes (ASYNC_WORKERS, default: CPU count), so waiting
+connections cost a coroutine each while every worker keeps a core busy.
+
+* Workers are spawned and warmed up at startup and keep the app, NumPy and
+  the optimizer loaded between tasks.
+* When the client disconnects, a queued task is cancelled and a running one
+  stops at its next generation through a shared cancel flag.
+* Identical requests in flight share one task (``X-Coalesced: 1``), and
+  beyond ASYNC_MAX_PENDING queued or running tasks requests get 429 with
+  Retry-After.
+
+``GET /api/health`` is answered on the loop; every other route is passed to
+the Flask app on a thread with a buffered response (use the WSGI server for
+``/api/optimize/stream``).
+
+Serve ``asgi:application`` with any ASGI server (one process, e.g.
+``uvicorn asgi:application``), or run this file for the built-in HTTP/1.1
+server, which needs no extra dependencies.
+"""
+import asyncio
+import io
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import unquote
+
+import app as backend
+from admission import AdmissionRejected
+
+ASYNC_WORKERS = int(os.environ.get('ASYNC_WORKERS') or os.cpu_count() or 1)
+# Optimization tasks queued or running at once (each holds a cancel flag)
+ASYNC_MAX_PENDING = int(os.environ.get('ASYNC_MAX_PENDING', 1024))
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+LISTEN_BACKLOG = 4096
+
+_CANCEL_FLAGS = None
+POOL = None
+
+
+def init_worker(cancel_flags):
+    """Pool initializer: the app is already imported with this module; keep the cancel flags"""
+    global _CANCEL_FLAGS
+    _CANCEL_FLAGS = cancel_flags
+
+
+def warm_up():
+    return os.getpid()
+
+
+def optimize_task(data, slot):
+    """Worker: one /api/optimize request, stopped early when the parent raises its cancel flag"""
+    try:
+        return 200, backend.run_optimization(data, should_stop=lambda: _CANCEL_FLAGS[slot] != 0)
+    except ValueError as e:
+        return 400, {"success": False, "error": str(e)}
+    except Exception as e:
+        return 500, {"success": False, "error": str(e)}
+
+
+class _Flight:
+    def __init__(self, future, slot):
+        self.future = future
+        self.slot = slot
+        self.waiters = 0
+
+
+class OptimizePool:
+    """Worker processes plus the event loop's bookkeeping for cancellation, coalescing and backpressure"""
+
+    def __init__(self, workers=ASYNC_WORKERS, max_pending=ASYNC_MAX_PENDING):
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.cancel_flags = self.context.RawArray('b', self.max_pending)
+        self.free_slots = deque(range(self.max_pending))
+        self.flights = {}
+        self.executor = self._new_executor()
+        self.completed = 0
+        self.cancelled = 0
+        # Smoothed seconds per task, used for Retry-After
+        self.seconds_per_task = 1.0
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=self.context,
+                                   initializer=init_worker, initargs=(self.cancel_flags,))
+
+    async def start(self):
+        """Spawn every worker now instead of on the first requests"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, warm_up) for _ in range(self.workers)))
+
+    def shutdown(self):
+        for slot in range(self.max_pending):
+            self.cancel_flags[slot] = 1
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def in_flight(self):
+        return self.max_pending - len(self.free_slots)
+
+    def retry_after(self):
+        return max(1, math.ceil(self.in_flight() * self.seconds_per_task / self.workers))
+
+    def _submit(self, data, slot):
+        try:
+            return self.executor.submit(optimize_task, data, slot)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool once
+            self.executor = self._new_executor()
+            return self.executor.submit(optimize_task, data, slot)
+
+    def _release(self, key, flight, started, cancelled):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        self.free_slots.append(flight.slot)
+        if not cancelled:
+            self.completed += 1
+            self.seconds_per_task = 0.8 * self.seconds_per_task + 0.2 * (time.monotonic() - started)
+
+    def _cancel(self, key, flight):
+        # Later identical requests start a fresh task instead of joining this one
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        self.cancel_flags[flight.slot] = 1
+        flight.future.cancel()
+        self.cancelled += 1
+
+    async def optimize(self, data, disconnected):
+        """(status, payload, shared) of run_optimization for ``data``, or None when ``disconnected`` fires first"""
+        key = backend.problem_key(data)
+        flight = self.flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            if not self.free_slots:
+                raise AdmissionRejected("Optimizer is busy, please retry later", self.retry_after())
+            slot = self.free_slots.popleft()
+            self.cancel_flags[slot] = 0
+            loop = asyncio.get_running_loop()
+            future = self._submit(data, slot)
+            flight = self.flights[key] = _Flight(asyncio.wrap_future(future), slot)
+            # The slot is only reused once the worker is done with it, not when the request gives up
+            started = time.monotonic()
+            future.add_done_callback(lambda f: loop.call_soon_threadsafe(
+                self._release, key, flight, started, f.cancelled() or self.cancel_flags[slot] != 0))
+        flight.waiters += 1
+        try:
+            done, _ = await asyncio.wait({flight.future, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            flight.waiters -= 1
+        if flight.future in done:
+            status, payload = flight.future.result()
+            return status, payload, shared
+        if flight.waiters == 0:
+            self._cancel(key, flight)
+        return None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "inFlight": self.in_flight(),
+            "maxPending": self.max_pending,
+            "coalescing": sum(1 for flight in self.flights.values() if flight.waiters > 1),
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+        }
+
+
+def optimize_pool():
+    global POOL
+    if POOL is None:
+        POOL = OptimizePool()
+    return POOL
+
+
+async def read_body(receive):
+    """Request body, or None when the client disconnected first"""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def send_json(send, status, payload, headers=()):
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"access-control-allow-origin", b"*"),
+        *headers
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def optimize(receive, send):
+    """/api/optimize on the process pool, with the WSGI endpoint's error handling"""
+    try:
+        body = await read_body(receive)
+        if body is None:
+            return
+        data = json.loads(body or b"null")
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        disconnected = asyncio.ensure_future(wait_disconnect(receive))
+        try:
+            outcome = await optimize_pool().optimize(data, disconnected)
+        finally:
+            # Wait until the watcher has stopped reading, or the next request on the connection would race it
+            disconnected.cancel()
+            await asyncio.gather(disconnected, return_exceptions=True)
+    except AdmissionRejected as e:
+        return await send_json(send, 429, {"success": False, "error": str(e)}, [(b"retry-after", str(e.retry_after).encode())])
+    except ValueError as e:
+        return await send_json(send, 400, {"success": False, "error": str(e)})
+    except Exception as e:
+        return await send_json(send, 500, {"success": False, "error": str(e)})
+    if outcome is None:
+        return
+    status, payload, shared = outcome
+    await send_json(send, status, payload, [(b"x-coalesced", b"1")] if shared else [])
+
+
+def wsgi_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key == "CONTENT_LENGTH":
+            continue
+        if key != "CONTENT_TYPE":
+            key = "HTTP_" + key
+        environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+def run_wsgi(environ):
+    """Run the Flask app on one request; returns (status, headers, body)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = int(status.split(" ", 1)[0])
+        response["headers"] = headers
+
+    result = backend.app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    headers = [(k.lower().encode("latin-1"), v.encode("latin-1"))
+               for k, v in response["headers"] if k.lower() != "content-length"]
+    return response["status"], headers + [(b"content-length", str(len(body)).encode())], body
+
+
+async def call_wsgi(scope, receive, send):
+    """Any other route: the Flask app on a thread"""
+    try:
+        body = await read_body(receive)
+    except ValueError as e:
+        return await send_json(send, 413, {"success": False, "error": str(e)})
+    if body is None:
+        return
+    status, headers, body = await asyncio.get_running_loop().run_in_executor(
+        None, run_wsgi, wsgi_environ(scope, body))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await optimize_pool().start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if POOL is not None:
+                await asyncio.get_running_loop().run_in_executor(None, POOL.shutdown)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    if scope["path"] == "/api/optimize" and scope["method"] == "POST":
+        return await optimize(receive, send)
+    if scope["path"] == "/api/health" and scope["method"] == "GET":
+        return await send_json(send, 200, {"status": "ok", "optimize": optimize_pool().stats()})
+    return await call_wsgi(scope, receive, send)
+
+
+class Connection:
+    """Buffered reads from one client connection"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.buffer = bytearray()
+
+    async def _fill(self):
+        chunk = await self.reader.read(65536)
+        if not chunk:
+            raise EOFError
+        self.buffer += chunk
+
+    async def read_head(self):
+        while b"\r\n\r\n" not in self.buffer:
+            if len(self.buffer) > MAX_HEADER_BYTES:
+                raise ValueError("Request headers too large")
+            await self._fill()
+        head, _, rest = bytes(self.buffer).partition(b"\r\n\r\n")
+        self.buffer = bytearray(rest)
+        return head.decode("latin-1")
+
+    async def read_exactly(self, size):
+        while len(self.buffer) < size:
+            await self._fill()
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    async def wait_closed(self):
+        """Return when the client closes the connection (pipelined bytes are kept for the next request)"""
+        try:
+            while len(self.buffer) <= MAX_HEADER_BYTES + MAX_BODY_BYTES:
+                await self._fill()
+        except (EOFError, ConnectionError):
+            pass
+
+
+async def handle_connection(reader, writer):
+    """Built-in server: HTTP/1.1 with keep-alive, one request at a time.
+
+    Bodies need a Content-Length; chunked requests get 411 and the connection is closed.
+    """
+    connection = Connection(reader)
+    peer = writer.get_extra_info("peername")
+    sock = writer.get_extra_info("sockname")
+    try:
+        while True:
+            head = await connection.read_head()
+            request_line, *header_lines = head.split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+            headers = [tuple(part.strip() for part in line.split(":", 1)) for line in header_lines if ":" in line]
+            fields = {name.lower(): value for name, value in headers}
+            if "transfer-encoding" in fields:
+                # Only Content-Length bodies are read; a chunked body would be parsed as the next request
+                payload = json.dumps({"success": False, "error": "Request body needs a Content-Length"}).encode()
+                writer.write(("HTTP/1.1 411 Length Required\r\nContent-Type: application/json\r\n"
+                              f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n").encode("latin-1")
+                             + payload)
+                await writer.drain()
+                return
+            if int(fields.get("content-length", 0)) > MAX_BODY_BYTES:
+                return
+            body = await connection.read_exactly(int(fields.get("content-length", 0)))
+            keep_alive = version == "HTTP/1.1" and fields.get("connection", "").lower() != "close"
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version.split("/", 1)[-1],
+                "method": method.upper(),
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode("latin-1"),
+                "query_string": query.encode("latin-1"),
+                "root_path": "",
+                "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+                "client": tuple(peer[:2]) if peer else None,
+                "server": tuple(sock[:2]) if sock else None,
+            }
+            sent = {"complete": False}
+            received = False
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {"type": "http.request", "body": body, "more_body": False}
+                await connection.wait_closed()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+                    lines += [f"{name.decode('latin-1')}: {value.decode('latin-1')}"
+                              for name, value in message.get("headers", [])]
+                    lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+                    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+                elif message["type"] == "http.response.body":
+                    writer.write(message.get("body", b""))
+                    if not message.get("more_body"):
+                        sent["complete"] = True
+                    await writer.drain()
+
+            await application(scope, receive, send)
+            if not sent["complete"] or not keep_alive:
+                return
+    except (EOFError, ValueError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    """Built-in server until SIGINT/SIGTERM; then workers finish, so their stored runs are written"""
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows event loops
+            pass
+    await optimize_pool().start()
+    server = await asyncio.start_server(handle_connection, host, port, backlog=LISTEN_BACKLOG)
+    async with server:
+        await stop.wait()
+    await loop.run_in_executor(None, POOL.shutdown)
+
+
+if __name__ == "__main__":
+    port = int(os.environ.get("PORT", 5000))
+    asyncio.run(serve("0.0.0.0", port))
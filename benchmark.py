@@ -0,0 +1,465 @@
+"""Backend benchmarks.
+
+    python benchmark.py startup [--runs 5] [--output startup.json]
+    python benchmark.py quality [--instances 10] [--seed 0] [--output quality.json]
+    python benchmark.py search [--instances 10] [--seed 0] [--output search.json]
+    python benchmark.py load [--sizes 4:0.5,10:0.3,20:0.2] [--concurrency 1,4,8] [--requests 40]
+                             [--url http://host:port | --in-process] [--output load.json]
+
+``startup`` measures cold start through the serverless entry point, each run
+in a fresh interpreter: importing the entry point, answering a health check
+before the engine is loaded, the first optimize request (which imports and
+initializes the optimizer) and a second, warm request. Medians are printed
+as JSON and the command exits with status 1 when one exceeds its budget, so
+cold-start time can be tracked in CI.
+
+``quality`` runs GAPSO on random small households in debug mode and reports
+the optimality gap of the best returned schedule against the exact
+branch-and-bound optimum, per instance family, failing when a family's mean
+gap exceeds its budget.
+
+``search`` runs the fixed GAPSO loop (PSO and GA child for everyone, greedy
+on a schedule) and the adaptive one for the same generations on larger
+random households with PV, with or without a battery (plain time-of-use
+instances are solved by the greedy seed already). It reports the
+evaluations each used and the adaptive loop's final cost relative to the
+fixed one, failing when the adaptive loop ends up more expensive on average
+or uses more than its budget share of the evaluations.
+
+``load`` drives /api/optimize with distinct random households drawn from a
+weighted mix of sizes (appliance counts), at each concurrency level in
+turn, and reports throughput, p50/p95/p99 latency, error rate and status
+codes (429 is an admission rejection) per level and per household size.
+By default the app is served on a local threaded server in this process;
+``--in-process`` calls the WSGI app directly from the client threads and
+``--url`` targets a running deployment. CPU seconds per request are the
+process CPU time over the level divided by its requests, so they include
+the client's own (small) share and are not reported with ``--url``. With
+``--max-error-rate`` the command exits with status 1 when a level exceeds it.
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# Cold-start budgets in milliseconds (medians)
+STARTUP_BUDGET_MS = {
+    "importMs": 100,
+    "coldHealthMs": 50,
+    "firstRequestMs": 3000,
+}
+
+# Mean optimality gap budgets in percent, per instance family (a family without one fails)
+QUALITY_BUDGET_PERCENT = {
+    "tou": 1.0,
+    "pv": 1.0,
+}
+QUALITY_FAMILIES = ("tou", "pv")
+
+# Evaluations the adaptive loop may use, as a share of the fixed loop's, and its largest mean final cost ratio
+SEARCH_BUDGET_SHARE = 0.6
+SEARCH_MAX_COST_RATIO = 1.0
+SEARCH_GENERATIONS = 60
+SEARCH_POP_SIZE = 30
+
+# Default load test: household sizes (appliances) with their share of requests, and concurrency levels
+LOAD_SIZES = "4:0.5,10:0.3,20:0.2"
+LOAD_CONCURRENCY = "1,4,8"
+LOAD_REQUESTS = 40
+LOAD_TARGET_SECONDS = 0.5
+LOAD_TIMEOUT = 120
+
+SAMPLE_PV_KWH = [0] * 7 + [0.5, 1, 1.5, 2, 2.5, 2.5, 2, 1.5, 1, 0.5] + [0] * 7
+
+SAMPLE_REQUEST = {
+    "appliances": [
+        {"id": "app-1", "name": "Microwave", "wattage": 800, "isEssential": False, "hours": [9, 20]},
+        {"id": "app-2", "name": "Fan", "wattage": 100, "isEssential": False, "hours": [22, 23, 0, 1, 2, 3]},
+        {"id": "app-3", "name": "AC", "wattage": 1500, "isEssential": False,
+         "hours": [13, 14, 15, 16, 17, 18, 19, 20]},
+        {"id": "app-4", "name": "Fridge", "wattage": 150, "isEssential": True, "hours": []},
+    ],
+    "tariffRates": [
+        {"hour": h, "rate": rate} for h, rate in enumerate(
+            [20, 20, 20, 20, 20, 20, 22, 22, 25, 25, 28, 28, 30, 30, 35, 35, 40, 45, 50, 50, 45, 40, 30, 25]
+        )
+    ],
+    "targetSeconds": 0.5,
+}
+
+
+def wsgi_call(application, method, path, payload=None):
+    """Call a WSGI app in-process, returning (status code, body bytes)"""
+    from wsgiref.util import setup_testing_defaults
+
+    body = json.dumps(payload).encode() if payload is not None else b""
+    environ = {}
+    setup_testing_defaults(environ)
+    environ.update({
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    })
+    status = []
+    result = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        data = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return int(status[0].split()[0]), data
+
+
+def startup_child():
+    """One cold start, run inside a fresh interpreter"""
+    started = time.perf_counter()
+    import serverless
+    imported = time.perf_counter()
+
+    timings = {"importMs": (imported - started) * 1000}
+    for name, method, path, payload in (
+        ("coldHealthMs", "GET", "/api/health", None),
+        ("firstRequestMs", "POST", "/api/optimize", SAMPLE_REQUEST),
+        ("warmRequestMs", "POST", "/api/optimize", SAMPLE_REQUEST),
+    ):
+        t = time.perf_counter()
+        code, _ = wsgi_call(serverless.application, method, path, payload)
+        timings[name] = (time.perf_counter() - t) * 1000
+        if code != 200:
+            raise SystemExit(f"{method} {path} returned {code}")
+    timings["engineLoadMs"] = serverless.STARTUP["engineLoadSeconds"] * 1000
+    print(json.dumps(timings))
+
+
+def run_startup(args):
+    env = dict(os.environ, SCHEDULE_DB="", SERVERLESS_PRELOAD="0")
+    runs = []
+    for _ in range(args.runs):
+        t = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "startup", "--child"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            check=True, capture_output=True, text=True
+        ).stdout
+        run = json.loads(out.strip().splitlines()[-1])
+        run["processMs"] = (time.perf_counter() - t) * 1000
+        runs.append(run)
+
+    medians = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    failures = {
+        key: {"medianMs": medians[key], "budgetMs": budget}
+        for key, budget in STARTUP_BUDGET_MS.items() if medians[key] > budget
+    }
+    report = {"runs": len(runs), "medianMs": medians, "budgetMs": STARTUP_BUDGET_MS, "overBudget": failures}
+    return write_report(report, args.output, failures)
+
+
+def quality_instance(rng, family):
+    """Random small household: 3-5 appliances, each ON for at most 4 hours"""
+    appliances = [{"id": "base", "name": "Fridge", "wattage": 150, "isEssential": True, "hours": []}]
+    for i in range(rng.randint(3, 5)):
+        hours = rng.sample(range(24), rng.randint(1, 4))
+        appliances.append({
+            "id": f"app-{i}", "name": f"Load{i}", "wattage": rng.choice([100, 500, 800, 1200, 1500, 2000]),
+            "isEssential": False, "hours": hours
+        })
+    # Seeded, so the search is planned from nominal evaluation costs and the gaps do not depend on the machine
+    data = dict(SAMPLE_REQUEST, appliances=appliances, debug=True, seed=rng.randrange(2 ** 32))
+    if family == "pv":
+        data.update(pvKwh=[kwh * rng.uniform(0.5, 1.5) for kwh in SAMPLE_PV_KWH], exportRate=5)
+    return data
+
+
+def run_quality(args):
+    os.environ.setdefault("SCHEDULE_DB", "")
+    import app as backend
+
+    rng = random.Random(args.seed)
+    families = {}
+    for family in QUALITY_FAMILIES:
+        gaps, proven, seconds = [], 0, []
+        for _ in range(args.instances):
+            data = quality_instance(rng, family)
+            started = time.perf_counter()
+            result = backend.run_optimization(data)
+            seconds.append(time.perf_counter() - started)
+            exact = result["exact"]
+            if "error" in exact:
+                continue
+            best = min(result["results"], key=lambda r: r["costAfter"])
+            if best["optimalityGapPercent"] is not None:
+                gaps.append(best["optimalityGapPercent"])
+            proven += exact["proven"]
+        families[family] = {
+            "instances": len(gaps),
+            "proven": proven,
+            "meanGapPercent": statistics.mean(gaps) if gaps else None,
+            "maxGapPercent": max(gaps) if gaps else None,
+            "medianSeconds": statistics.median(seconds),
+        }
+
+    failures = {
+        family: {"meanGapPercent": stats["meanGapPercent"], "budgetPercent": QUALITY_BUDGET_PERCENT.get(family)}
+        for family, stats in families.items()
+        if family not in QUALITY_BUDGET_PERCENT or (stats["meanGapPercent"] or 0.0) > QUALITY_BUDGET_PERCENT[family]
+    }
+    report = {"seed": args.seed, "families": families, "budgetPercent": QUALITY_BUDGET_PERCENT,
+              "overBudget": failures}
+    return write_report(report, args.output, failures)
+
+
+def search_instance(rng, family):
+    """Random larger household with PV: 8-14 appliances, each ON for 1-8 hours"""
+    appliances = [{"id": "base", "name": "Fridge", "wattage": 150, "isEssential": True, "hours": []}]
+    for i in range(rng.randint(8, 14)):
+        appliances.append({
+            "id": f"app-{i}", "name": f"Load{i}", "wattage": rng.choice([100, 500, 800, 1200, 1500, 2000]),
+            "isEssential": False, "hours": rng.sample(range(24), rng.randint(1, 8))
+        })
+    data = dict(SAMPLE_REQUEST, appliances=appliances)
+    data.update(pvKwh=[kwh * rng.uniform(1.0, 2.0) for kwh in SAMPLE_PV_KWH], exportRate=5)
+    if family == "battery":
+        data.update(battery={"capacityKwh": rng.choice([5, 10]), "powerKw": 2.5})
+    return data
+
+
+def run_search(args):
+    os.environ.setdefault("SCHEDULE_DB", "")
+    import numpy as np
+    import app as backend
+
+    rng = random.Random(args.seed)
+    families = {}
+    for family in ("pv", "battery"):
+        evaluations = {False: [], True: []}
+        ratios, restarts, calls = [], 0, {}
+        for n in range(args.instances):
+            backend.set_problem(search_instance(rng, family))
+            costs = {}
+            for adaptive in (False, True):
+                stats = {}
+                backend.gapso_optimize(backend.PROBLEM, iterations=SEARCH_GENERATIONS, pop_size=SEARCH_POP_SIZE, k=1,
+                                       rng=np.random.default_rng([args.seed, n]), adaptive=adaptive, stats=stats)
+                evaluations[adaptive].append(stats["evaluations"])
+                costs[adaptive] = stats["trace"][-1][1]
+            ratios.append(costs[True] / costs[False] if costs[False] > 0 else 1.0)
+            restarts += stats["restarts"]
+            for name, count in stats["operatorCalls"].items():
+                calls[name] = calls.get(name, 0) + count
+        families[family] = {
+            "instances": args.instances,
+            "medianEvaluationsFixed": statistics.median(evaluations[False]),
+            "medianEvaluationsAdaptive": statistics.median(evaluations[True]),
+            "meanFinalCostRatio": statistics.mean(ratios),
+            "worstFinalCostRatio": max(ratios),
+            "restarts": restarts,
+            "operatorCalls": calls,
+        }
+
+    failures = {}
+    for family, stats in families.items():
+        share = stats["medianEvaluationsAdaptive"] / stats["medianEvaluationsFixed"]
+        if share > SEARCH_BUDGET_SHARE or stats["meanFinalCostRatio"] > SEARCH_MAX_COST_RATIO:
+            failures[family] = {"evaluationShare": share, "meanFinalCostRatio": stats["meanFinalCostRatio"]}
+    report = {"seed": args.seed, "generations": SEARCH_GENERATIONS, "popSize": SEARCH_POP_SIZE,
+              "families": families, "budgetShare": SEARCH_BUDGET_SHARE, "maxCostRatio": SEARCH_MAX_COST_RATIO,
+              "overBudget": failures}
+    return write_report(report, args.output, failures)
+
+
+def load_instance(rng, size, engine=None):
+    """Random household with ``size`` appliances (one of them an essential fridge), PV on every third"""
+    appliances = [{"id": "base", "name": "Fridge", "wattage": 150, "isEssential": True, "hours": []}]
+    for i in range(size - 1):
+        appliances.append({
+            "id": f"app-{i}", "name": f"Load{i}", "wattage": rng.choice([100, 500, 800, 1200, 1500, 2000]),
+            "isEssential": False, "hours": rng.sample(range(24), rng.randint(1, 6))
+        })
+    data = dict(SAMPLE_REQUEST, appliances=appliances, targetSeconds=LOAD_TARGET_SECONDS)
+    if rng.random() < 1 / 3:
+        data.update(pvKwh=[kwh * rng.uniform(0.5, 1.5) for kwh in SAMPLE_PV_KWH], exportRate=5)
+    if engine is not None:
+        data["engine"] = engine
+    return data
+
+
+def parse_mix(text):
+    """"4:0.5,10:0.3" -> [(4, 0.5), (10, 0.3)]; a size without weight counts 1"""
+    mix = []
+    for part in text.split(","):
+        size, _, weight = part.partition(":")
+        mix.append((int(size), float(weight or 1)))
+    if not mix or any(size < 1 or weight < 0 for size, weight in mix) or sum(w for _, w in mix) <= 0:
+        raise SystemExit(f"invalid --sizes mix: {text}")
+    return mix
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, -(-len(ordered) * q // 100) - 1))]
+
+
+def latency_summary(samples):
+    """Count, error rate and latency percentiles (ms) of (status, seconds) samples"""
+    latencies = [seconds * 1000 for _, seconds in samples]
+    errors = sum(1 for status, _ in samples if not 200 <= status < 300)
+    summary = {"requests": len(samples), "errorRate": errors / len(samples) if samples else 0.0}
+    if latencies:
+        summary.update(p50Ms=percentile(latencies, 50), p95Ms=percentile(latencies, 95),
+                       p99Ms=percentile(latencies, 99), maxMs=max(latencies))
+    return summary
+
+
+def http_post(url):
+    """POST function for a server at ``url``: payload -> status code (0 when the connection fails)"""
+    parts = urlsplit(url)
+
+    def post(payload):
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=LOAD_TIMEOUT)
+        try:
+            conn.request("POST", "/api/optimize", body=json.dumps(payload),
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except OSError:
+            return 0
+        finally:
+            conn.close()
+    return post
+
+
+def run_load_level(post, payloads, concurrency):
+    """Send ``payloads`` with ``concurrency`` client threads; per-request (status, seconds) and totals"""
+    def send(payload):
+        started = time.perf_counter()
+        status = post(payload)
+        return status, time.perf_counter() - started
+
+    cpu, started = time.process_time(), time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(send, payloads))
+    return samples, time.perf_counter() - started, time.process_time() - cpu
+
+
+def run_load(args):
+    os.environ.setdefault("SCHEDULE_DB", "")
+    mix = parse_mix(args.sizes)
+    levels = [int(c) for c in args.concurrency.split(",")]
+    server = None
+    if args.url:
+        post = http_post(args.url)
+    elif args.in_process:
+        import app as backend
+        post = lambda payload: wsgi_call(backend.app, "POST", "/api/optimize", payload)[0]
+    else:
+        import logging
+        from werkzeug.serving import make_server
+        import app as backend
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = make_server("127.0.0.1", 0, backend.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        post = http_post(f"http://127.0.0.1:{server.server_port}")
+
+    rng = random.Random(args.seed)
+    sizes, weights = zip(*mix)
+    report_levels, failures = [], {}
+    try:
+        for concurrency in levels:
+            drawn = rng.choices(sizes, weights=weights, k=args.requests)
+            payloads = [load_instance(rng, size, args.engine) for size in drawn]
+            samples, wall, cpu = run_load_level(post, payloads, concurrency)
+            statuses = {}
+            for status, _ in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            level = dict(
+                latency_summary(samples),
+                concurrency=concurrency,
+                seconds=wall,
+                throughputPerSecond=len(samples) / wall,
+                cpuSecondsPerRequest=None if args.url else cpu / len(samples),
+                statusCodes=statuses,
+                bySize={
+                    str(size): latency_summary([s for s, n in zip(samples, drawn) if n == size])
+                    for size in sorted(set(drawn))
+                },
+            )
+            report_levels.append(level)
+            if args.max_error_rate is not None and level["errorRate"] > args.max_error_rate:
+                failures[str(concurrency)] = {"errorRate": level["errorRate"], "maxErrorRate": args.max_error_rate}
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    target = args.url or ("in-process" if args.in_process else "local-server")
+    report = {"seed": args.seed, "target": target, "sizes": dict((str(n), w) for n, w in mix),
+              "requestsPerLevel": args.requests, "engine": args.engine, "cpuCount": os.cpu_count(),
+              "levels": report_levels, "overBudget": failures}
+    return write_report(report, args.output, failures)
+
+
+def write_report(report, output, failures):
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    startup = commands.add_parser("startup", help="cold-start import and first-request latency")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--output", help="also write the JSON report to this file")
+    startup.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    quality = commands.add_parser("quality", help="GAPSO optimality gap against the exact solver")
+    quality.add_argument("--instances", type=int, default=10, help="instances per family")
+    quality.add_argument("--seed", type=int, default=0)
+    quality.add_argument("--output", help="also write the JSON report to this file")
+    search = commands.add_parser("search", help="evaluations and final cost, fixed vs adaptive GAPSO loop")
+    search.add_argument("--instances", type=int, default=10, help="instances per family")
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--output", help="also write the JSON report to this file")
+    load = commands.add_parser("load", help="throughput and tail latency of /api/optimize under concurrency")
+    load.add_argument("--sizes", default=LOAD_SIZES, help="household sizes and weights, e.g. 4:0.5,10:0.3,20:0.2")
+    load.add_argument("--concurrency", default=LOAD_CONCURRENCY, help="comma-separated concurrency levels")
+    load.add_argument("--requests", type=int, default=LOAD_REQUESTS, help="requests per concurrency level")
+    load.add_argument("--engine", help="optimizer engine to request")
+    load.add_argument("--seed", type=int, default=0)
+    target = load.add_mutually_exclusive_group()
+    target.add_argument("--url", help="running server to test instead of a local one")
+    target.add_argument("--in-process", action="store_true", help="call the WSGI app directly, without HTTP")
+    load.add_argument("--max-error-rate", type=float, help="fail when a level's error rate exceeds this")
+    load.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        if args.child:
+            startup_child()
+            return 0
+        return run_startup(args)
+    if args.command == "quality":
+        return run_quality(args)
+    if args.command == "search":
+        return run_search(args)
+    if args.command == "load":
+        return run_load(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
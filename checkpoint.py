@@ -0,0 +1,89 @@
+import os
+import queue
+import tempfile
+import threading
+import zipfile
+
+import numpy as np
+
+# The snapshot format is defined by the optimizer package; re-exported for the
+# callers that checkpoint their own state
+from optimizer.snapshot import json_array, array_json, rng_state_arrays, restore_rng_state, SNAPSHOT_KEYS
+
+CHECKPOINT_DIR = os.environ.get('CHECKPOINT_DIR', os.path.join(tempfile.gettempdir(), 'gapso-checkpoints'))
+
+
+def checkpoint_path(run_id):
+    """Checkpoint file for a run id (restricted to a safe file name)"""
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(run_id))
+    if not safe.strip("."):
+        raise ValueError("Invalid checkpointId")
+    return os.path.join(CHECKPOINT_DIR, safe + ".npz")
+
+
+class CheckpointWriter:
+    """Writes snapshots for one run to disk from a background thread.
+
+    ``submit`` only hands the arrays over: a daemon thread writes them as an
+    uncompressed ``.npz`` next to the target and renames it into place, so a
+    crash never leaves a torn checkpoint. If the writer falls behind, the
+    pending snapshot is replaced by the newer one instead of queueing up.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._pending = queue.Queue(maxsize=1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, arrays):
+        while True:
+            try:
+                self._pending.put_nowait(arrays)
+                return
+            except queue.Full:
+                try:
+                    self._pending.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        while True:
+            arrays = self._pending.get()
+            if arrays is None:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp, self.path)
+            except OSError:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+    def close(self, remove=False):
+        """Flush the last snapshot; ``remove`` deletes the file afterwards"""
+        self._pending.put(None)
+        self._thread.join()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_checkpoint(path, required=()):
+    """Load a checkpoint as a dict of arrays, or None when there is none.
+
+    A file that cannot be read or lacks one of the ``required`` arrays (a
+    truncated copy, an older format) counts as no checkpoint: the run starts
+    over and its writer replaces the file.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files}
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        return None
+    if any(key not in arrays for key in required):
+        return None
+    return arrays
@@ -0,0 +1,71 @@
+import numpy as np
+
+# Search budget per household re-solve
+DEFAULT_EVENT_HOUSEHOLD_SECONDS = 0.1
+# Price of running in a forbidden hour, as a multiple of the dearest hourly rate
+FORBIDDEN_PENALTY = 10.0
+
+
+class DemandResponseEvent:
+    """A utility demand-response event.
+
+    ``rates`` maps hours to the event's tariff rate (replacing the
+    household's own rate in that hour); ``forbidden_hours`` are curtailed:
+    flexible appliances must not run in them. ``affected_hours`` are both.
+    """
+
+    def __init__(self, rates=None, forbidden_hours=(), event_id=None):
+        self.rates = dict(rates or {})
+        self.forbidden_hours = sorted(set(forbidden_hours))
+        self.affected_hours = sorted(set(self.rates) | set(self.forbidden_hours))
+        self.event_id = event_id
+        if not self.affected_hours:
+            raise ValueError("A demand-response event needs tariffChanges or forbiddenHours")
+
+    def apply_rates(self, tariff_rates):
+        """A household's tariff rates with the event's rates in place"""
+        return [
+            dict(r, rate=self.rates.get(int(r['hour']) % 24, r['rate']))
+            for r in tariff_rates
+        ]
+
+    def touched_columns(self, schedule, flexible):
+        """Flexible appliance columns whose schedule is ON in an affected hour"""
+        s = np.asarray(schedule, dtype=np.int8)
+        touched = s[self.affected_hours].any(axis=0) & np.asarray(flexible, dtype=bool)
+        return np.flatnonzero(touched).tolist()
+
+    def curtailment_start(self, schedule):
+        """A schedule with the forbidden hours switched off"""
+        start = [row[:] for row in schedule]
+        for h in self.forbidden_hours:
+            start[h] = [0] * len(start[h])
+        return start
+
+    def penalty(self, appliance_kwh, hourly_price):
+        """Penalty that keeps the search out of forbidden hours, from per-appliance energy (..., 24, n)"""
+        forbidden_kwh = np.asarray(appliance_kwh, dtype=float)[..., self.forbidden_hours, :].sum(axis=(-2, -1))
+        return FORBIDDEN_PENALTY * max(hourly_price) * forbidden_kwh
+
+
+def load_event_from_dict(data):
+    """DemandResponseEvent from a request's tariffChanges / forbiddenHours"""
+    rates = {}
+    for change in data.get('tariffChanges') or []:
+        hour = int(change['hour'])
+        if not 0 <= hour < 24:
+            raise ValueError("tariffChanges hours must be 0-23")
+        rates[hour] = float(change['rate'])
+    forbidden = [int(h) for h in data.get('forbiddenHours') or []]
+    if any(not 0 <= h < 24 for h in forbidden):
+        raise ValueError("forbiddenHours must be 0-23")
+    return DemandResponseEvent(rates, forbidden, data.get('eventId'))
+
+
+def load_shift(before_kwh, after_kwh, hours):
+    """kWh moved between hours by a re-plan, and the net kWh taken out of ``hours``"""
+    before_kwh = np.asarray(before_kwh, dtype=float)
+    after_kwh = np.asarray(after_kwh, dtype=float)
+    shifted = float(np.maximum(before_kwh - after_kwh, 0).sum())
+    relieved = float((before_kwh[hours] - after_kwh[hours]).sum())
+    return shifted, relieved
@@ -0,0 +1,178 @@
+import math
+import time
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+# Largest number of ON-hour combinations enumerated for one appliance (C(24, 6))
+MAX_CANDIDATES = 134596
+DEFAULT_MAX_NODES = 20000
+DEFAULT_TIME_LIMIT = 10.0
+EVAL_CHUNK = 8192
+
+
+def candidate_count(on_hours):
+    return math.comb(24, on_hours)
+
+
+@lru_cache(maxsize=None)
+def subset_masks(on_hours):
+    """Every 24-bit hour mask with exactly ``on_hours`` bits set, as uint32"""
+    if candidate_count(on_hours) > MAX_CANDIDATES:
+        raise ValueError(f"{on_hours} of 24 hours has too many combinations for the exact solver")
+    masks = np.array([sum(1 << h for h in hours) for hours in combinations(range(24), on_hours)], dtype=np.uint32)
+    masks.flags.writeable = False
+    return masks
+
+
+def mask_bits(masks):
+    """Expand hour masks to (len(masks), 24) 0/1 rows"""
+    return ((np.asarray(masks, dtype=np.uint32)[:, None] >> np.arange(24, dtype=np.uint32)) & 1).astype(np.int8)
+
+
+class _TimeLimit(Exception):
+    pass
+
+
+def _chunked(fn, rows, deadline):
+    out = [np.empty(0)]
+    for i in range(0, len(rows), EVAL_CHUNK):
+        if time.perf_counter() > deadline:
+            raise _TimeLimit()
+        out.append(np.asarray(fn(rows[i:i + EVAL_CHUNK]), dtype=float))
+    return np.concatenate(out)
+
+
+def branch_and_bound(base_kwh, candidates, cost_fn, cost_tiers, incumbent_cost=np.inf,
+                     max_nodes=DEFAULT_MAX_NODES, time_limit=DEFAULT_TIME_LIMIT):
+    """Exact minimum of ``cost_fn`` over one ON-hour set per appliance.
+
+    ``candidates`` holds one ``(masks, kwh, floor_kw, on_hours)`` tuple per
+    appliance: its feasible hour masks, their hourly energy (len(masks), 24),
+    its smallest per-hour draw and its number of ON hours. ``cost_fn`` maps
+    aggregate hourly energy (..., 24) to cost. ``cost_tiers(load)`` gives
+    ``(low, low_kwh, high)``: adding energy to an hour of ``load`` costs at
+    least ``low`` per kWh for its first ``low_kwh`` and ``high`` (>= low)
+    per kWh beyond. Only ``low_kwh`` may depend on the load; the two rates
+    are fixed per hour.
+
+    Appliances are fixed one at a time, largest first, depth first. A node
+    with load L is bounded by cost(L) plus the larger of two floors on the
+    appliances still open: the sum over appliances of their cheapest
+    ``on_hours`` hours, each priced as if it alone were added at L, and
+    their total energy poured into the cheapest tiers of L, at most their
+    combined draw per hour. Of two identical appliances the second only
+    takes masks from the first one's on, as swapping them changes nothing.
+    Children of a node are kept as one block sorted by bound, so a block is
+    cut off as soon as its next bound reaches the incumbent.
+
+    Returns ``masks`` (one per appliance, None when nothing beat
+    ``incumbent_cost``), ``cost``, ``lowerBound``, ``proven`` (False when
+    ``max_nodes`` or ``time_limit`` stopped the search) and ``nodes``.
+    """
+    started = time.perf_counter()
+    deadline = started + time_limit
+    order = sorted(range(len(candidates)), key=lambda i: (-candidates[i][2] * candidates[i][3], -candidates[i][2]))
+    cands = [candidates[i] for i in order]
+    # Appliances identical to the one fixed just before them: swapping the two
+    # gives the same cost, so their masks only need to be tried in order
+    twin = [d > 0 and cands[d][2:] == cands[d - 1][2:] and cands[d][0] is cands[d - 1][0]
+            and np.array_equal(cands[d][1], cands[d - 1][1]) for d in range(len(cands))]
+    floor_kw = np.array([c[2] for c in cands], dtype=float)
+    on_hours = np.array([c[3] for c in cands], dtype=int)
+    base_kwh = np.asarray(base_kwh, dtype=float)[None]
+    low, _, high = cost_tiers(base_kwh)
+    low, high = np.broadcast_to(low, (24,)), np.broadcast_to(high, (24,))
+    # Both tiers of every hour, cheapest rate first
+    tier_order = np.argsort(np.concatenate([low, high]), kind="stable")
+    tier_rates = np.concatenate([low, high])[tier_order]
+    # With no negative rates a child already over the incumbent stays there
+    rest_nonnegative = bool(low.min() >= 0)
+
+    def bound_rest(loads, depth):
+        """Lower bound on the extra cost of appliances depth.. at each load row"""
+        if depth >= len(cands):
+            return np.zeros(len(loads))
+        low_kwh = np.broadcast_to(cost_tiers(loads)[1], loads.shape)
+        kw, hours = floor_kw[depth:], on_hours[depth:]
+        cheap = np.minimum(low_kwh[:, None], kw[:, None])
+        m = np.sort(high * kw[:, None] - (high - low) * cheap, axis=-1)
+        cum = np.concatenate([np.zeros(m.shape[:-1] + (1,)), np.cumsum(m, axis=-1)], axis=-1)
+        separate = cum[:, np.arange(len(kw)), hours].sum(axis=-1)
+
+        draw = kw.sum()
+        cheap = np.minimum(low_kwh, draw)
+        sizes = np.concatenate([cheap, draw - cheap], axis=-1)[:, tier_order]
+        filled = np.cumsum(sizes, axis=-1) - sizes
+        pooled = np.clip(kw @ hours - filled, 0.0, sizes) @ tier_rates
+        return np.maximum(separate, pooled)
+
+    best_cost = float(incumbent_cost)
+    best_masks = None
+    if not cands:
+        cost = float(cost_fn(base_kwh)[0])
+        return {"masks": [], "cost": cost, "lowerBound": cost, "proven": True, "nodes": 0, "seconds": 0.0}
+
+    root_bound = float(cost_fn(base_kwh)[0] + bound_rest(base_kwh, 0)[0])
+    # Each block: [bounds, loads, parent masks, depth, next index]
+    stack = [[np.array([root_bound]), base_kwh, np.zeros((1, 0), dtype=np.uint32), 0, 0]]
+    nodes = 0
+    proven = True
+    while stack:
+        block = stack[-1]
+        bounds, loads, chosen, depth, k = block
+        cutoff = best_cost - 1e-9 * max(1.0, abs(best_cost)) if np.isfinite(best_cost) else best_cost
+        if k >= len(bounds) or bounds[k] >= cutoff:
+            stack.pop()
+            continue
+        if nodes >= max_nodes:
+            proven = False
+            break
+
+        masks, kwh, _, _ = cands[depth]
+        if twin[depth]:
+            later = masks >= chosen[k][depth - 1]
+            masks, kwh = masks[later], kwh[later]
+        child_loads = loads[k] + kwh
+        try:
+            cost = _chunked(cost_fn, child_loads, deadline)
+            if depth + 1 < len(cands):
+                keep = np.flatnonzero(cost < cutoff) if rest_nonnegative else np.arange(len(cost))
+                child_bounds = cost[keep] + _chunked(lambda rows: bound_rest(rows, depth + 1), child_loads[keep],
+                                                     deadline)
+        except _TimeLimit:
+            # The node stays open, so its bound still counts for lowerBound
+            proven = False
+            break
+        block[4] += 1
+        nodes += 1
+        child_chosen = np.column_stack([np.broadcast_to(chosen[k], (len(masks), depth)), masks])
+        if depth + 1 == len(cands):
+            j = int(np.argmin(cost))
+            if cost[j] < cutoff:
+                best_cost = float(cost[j])
+                best_masks = child_chosen[j]
+            continue
+        below = np.flatnonzero(child_bounds < cutoff)
+        if below.size:
+            below = below[np.argsort(child_bounds[below], kind="stable")]
+            keep = keep[below]
+            stack.append([child_bounds[below], child_loads[keep], child_chosen[keep], depth + 1, 0])
+
+    lower = best_cost
+    if not proven:
+        lower = min([best_cost] + [float(b[0][b[4]]) for b in stack if b[4] < len(b[0])])
+    result_masks = None
+    if best_masks is not None:
+        result_masks = [None] * len(cands)
+        for position, i in enumerate(order):
+            result_masks[i] = int(best_masks[position])
+    return {
+        "masks": result_masks,
+        "cost": best_cost,
+        "lowerBound": lower,
+        "proven": proven,
+        "nodes": nodes,
+        "seconds": time.perf_counter() - started,
+    }
@@ -0,0 +1,165 @@
+import math
+import time
+
+import numpy as np
+
+from checkpoint import rng_state_arrays, restore_rng_state, json_array, array_json
+
+DEFAULT_ROUNDS = 30
+DEFAULT_STEP = 0.2
+DEFAULT_BATCHES = 8
+DEFAULT_DITHER = 0.02
+DEFAULT_HOUSEHOLD_SECONDS = 0.1
+# Arrays every fleet snapshot holds; a file without them is not resumable
+FLEET_SNAPSHOT_KEYS = ("rng_state", "seed", "round", "updates", "shadow", "grid", "previous", "solutions", "history", "best")
+
+
+def feeder_limit_vector(limit):
+    """Per-hour feeder limit (kW) from a scalar or a 24-value list"""
+    limit = np.broadcast_to(np.asarray(limit, dtype=float), (24,)).copy()
+    if np.any(limit <= 0):
+        raise ValueError("feederLimitKw must be positive")
+    return limit
+
+
+def household_seed(household_seq, round_index):
+    """Independent seed for one household in one round, whichever worker solves it"""
+    return np.random.SeedSequence(household_seq.entropy, spawn_key=household_seq.spawn_key + (round_index,))
+
+
+def coordinate_fleet(households, solve, feeder_limit, base_price, rounds=DEFAULT_ROUNDS,
+                     step=DEFAULT_STEP, batches=DEFAULT_BATCHES, dither=DEFAULT_DITHER, map_fn=map,
+                     on_round=None, checkpoint=None, resume=None, checkpoint_extra=None, seed=None):
+    """Schedule many households under a shared per-hour feeder limit.
+
+    Uses price-signal (dual) decomposition. Households are optimized
+    independently against their tariff plus a common per-hour shadow price,
+    and the shadow price rises in hours where the aggregate load exceeds the
+    limit, in proportion to the relative overload, scaled by the mean tariff
+    price and shrinking as 1/sqrt(update). Prices are never lowered again:
+    with on/off appliances a symmetric subgradient step keeps the fleet
+    oscillating between hours, while the ratchet settles once every hour fits.
+
+    The first round solves everyone at a zero shadow price. After that each
+    round re-solves the households in ``batches`` random groups, updating the
+    shadow price between groups, so the whole fleet does not jump to the same
+    cheap hours at once. Every household also sees a small fixed random
+    offset (``dither`` times the mean price) on its signal so that equally
+    priced hours are not all broken the same way.
+
+    Each group is solved in parallel through ``map_fn`` (e.g. a process
+    pool's ``map``), calling ``solve`` with ``(household, shadow_price,
+    previous_schedule, seed)`` tuples; it returns a dict with ``schedule``,
+    ``gridKwh`` (24 values) and ``cost``. Households are warm-started from
+    their previous solution. The round with the smallest overload (then
+    lowest cost) is returned.
+
+    All randomness derives from ``seed``: the offsets and group shuffles use
+    their own streams and every household gets a separate SeedSequence per
+    round, so results do not depend on how work is spread over workers.
+
+    After every round the coordination state is handed to ``checkpoint``
+    (a CheckpointWriter); ``resume`` continues from such a snapshot.
+    """
+    limit = feeder_limit_vector(feeder_limit)
+    price_scale = float(np.mean(base_price)) or 1.0
+    if resume is not None:
+        seed = int(array_json(resume["seed"]))
+    root = np.random.SeedSequence(seed)
+    offset_seq, order_seq, solve_seq = root.spawn(3)
+    household_seqs = solve_seq.spawn(len(households))
+    order_rng = np.random.default_rng(order_seq)
+    shadow = np.zeros(24)
+    offsets = np.random.default_rng(offset_seq).uniform(0, dither * price_scale, (len(households), 24))
+    previous = [household.get('previousSchedule') for household in households]
+    solutions = [None] * len(households)
+    grid = np.zeros((len(households), 24))
+    history = []
+    best = None
+
+    def solve_group(indices, round_index):
+        tasks = [
+            (households[j], (shadow + offsets[j]).tolist(), previous[j],
+             household_seed(household_seqs[j], round_index))
+            for j in indices
+        ]
+        for j, solution in zip(indices, map_fn(solve, tasks)):
+            solutions[j] = solution
+            previous[j] = solution["schedule"]
+            grid[j] = solution["gridKwh"]
+
+    updates = 0
+    start = 0
+    if resume is not None:
+        start = int(resume["round"])
+        updates = int(resume["updates"])
+        shadow = resume["shadow"].copy()
+        grid = resume["grid"].copy()
+        previous = array_json(resume["previous"])
+        solutions = array_json(resume["solutions"])
+        history = array_json(resume["history"])
+        best = array_json(resume["best"])
+        best["load"] = np.array(best["load"])
+        best["key"] = tuple(best["key"])
+        restore_rng_state(order_rng, resume)
+
+    for r in range(start, rounds):
+        started = time.perf_counter()
+        order = list(range(len(households)))
+        groups = [order]
+        if r > 0:
+            order_rng.shuffle(order)
+            groups = [order[g::batches] for g in range(min(batches, len(order)))]
+        for group in groups:
+            solve_group(group, r)
+            load = grid.sum(axis=0)
+            if r > 0 or len(groups) == 1:
+                updates += 1
+                alpha = step / math.sqrt(updates)
+                shadow = shadow + alpha * price_scale * np.maximum(load - limit, 0.0) / limit
+
+        load = grid.sum(axis=0)
+        overload = np.maximum(load - limit, 0.0)
+        total_cost = float(sum(s["cost"] for s in solutions))
+        stats = {
+            "round": r + 1,
+            "peakKw": float(load.max()),
+            "maxOverloadKw": float(overload.max()),
+            "overloadKwh": float(overload.sum()),
+            "totalCost": total_cost,
+            "shadowPrice": shadow.tolist(),
+            "seconds": time.perf_counter() - started,
+        }
+        history.append(stats)
+        if on_round is not None:
+            on_round(stats)
+
+        key = (stats["overloadKwh"], total_cost)
+        if best is None or key < best["key"]:
+            best = {"key": key, "solutions": list(solutions), "load": load, "round": r + 1}
+        if checkpoint is not None:
+            checkpoint.submit(dict(
+                rng_state_arrays(order_rng),
+                seed=json_array(str(root.entropy)),
+                round=np.array(r + 1),
+                updates=np.array(updates),
+                shadow=shadow.copy(),
+                grid=grid.copy(),
+                previous=json_array(previous),
+                solutions=json_array(solutions),
+                history=json_array(history),
+                best=json_array(dict(best, load=best["load"].tolist())),
+                **(checkpoint_extra or {})
+            ))
+        if stats["maxOverloadKw"] <= 1e-9:
+            break
+
+    return {
+        "seed": root.entropy,
+        "converged": best["key"][0] <= 1e-9,
+        "rounds": history,
+        "bestRound": best["round"],
+        "aggregateLoadKw": best["load"].tolist(),
+        "feederLimitKw": limit.tolist(),
+        "households": best["solutions"],
+    }
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class LoadProfiles:
+    """Per-appliance power profiles over a continuous run.
+
+    ``profiles_kw[i]`` lists the draw of appliance ``i`` in the first, second,
+    ... hour of each contiguous ON block; the last value holds for the rest
+    of the run. Schedules are arrays of shape (..., 24, n) so a whole
+    population is handled in one call.
+    """
+
+    def __init__(self, profiles_kw):
+        length = max(len(p) for p in profiles_kw)
+        self.n_loads = len(profiles_kw)
+        self.length = length
+        self.profiles = np.array([list(p) + [p[-1]] * (length - len(p)) for p in profiles_kw], dtype=float)
+        self._loads = np.arange(self.n_loads)
+        self._hours = np.arange(24)[:, None]
+
+    def run_position(self, on):
+        """Hours since the current run started (0 in its first hour)"""
+        last_off = np.maximum.accumulate(np.where(on, -1, self._hours), axis=-2)
+        return self._hours - last_off - 1
+
+    def appliance_kwh(self, schedules):
+        """Energy of each appliance per hour of the day, shape (..., 24, n)"""
+        on = np.asarray(schedules).astype(bool)
+        pos = np.minimum(self.run_position(on), self.length - 1)
+        kw = self.profiles[self._loads, np.maximum(pos, 0)]
+        return kw * on
+
+    def hourly_kwh(self, schedules):
+        """Energy per hour of the day, shape (..., 24)"""
+        return self.appliance_kwh(schedules).sum(axis=-1)
+
+    def run_cost_table(self, price):
+        """Cost of every run: table[i, start, hours] for appliance i.
+
+        This is the convolution of each profile with the hourly price, so
+        scoring a schedule only needs its run starts and lengths.
+        """
+        price = np.asarray(price, dtype=float)
+        steps = np.arange(24)
+        kw = self.profiles[:, np.minimum(steps, self.length - 1)]
+        hour = self._hours + steps[None, :]
+        step_cost = kw[:, None, :] * np.where(hour < 24, price[np.minimum(hour, 23)], 0.0)[None]
+        table = np.zeros((self.n_loads, 24, 25))
+        table[:, :, 1:] = np.cumsum(step_cost, axis=-1)
+        return table
+
+    def run_cost(self, schedules, table):
+        """Cost of schedules (..., 24, n) from a precomputed run cost table"""
+        on = np.asarray(schedules).astype(bool)
+        prev = np.zeros_like(on)
+        prev[..., 1:, :] = on[..., :-1, :]
+        starts = on & ~prev
+        off_at = np.where(on, 24, self._hours)
+        next_off = np.flip(np.minimum.accumulate(np.flip(off_at, axis=-2), axis=-2), axis=-2)
+        length = np.where(starts, next_off - self._hours, 0)
+        return table[self._loads, self._hours, length].sum(axis=(-2, -1))
+
+
+def load_profiles_from_dict(appliances):
+    """Build LoadProfiles from appliance ``powerProfile`` fields (watts per run hour).
+
+    Returns None when no appliance declares a profile, so constant loads keep
+    using the plain wattage.
+    """
+    if not any(app.get('powerProfile') for app in appliances):
+        return None
+    profiles = []
+    for app in appliances:
+        profile = app.get('powerProfile') or [app['wattage']]
+        profiles.append([float(w) / 1000 for w in profile])
+    return LoadProfiles(profiles)
@@ -0,0 +1,12 @@
+"""GAPSO appliance scheduling shared by the web backend and the CLI.
+
+A Problem describes the appliances, prices and cost function; an engine
+runs the search on it. Engines are selected by name (see ENGINES) and
+checked against the reference engine by ``python -m optimizer.conformance``.
+"""
+
+from optimizer.problem import Problem, tariff_cost_fn
+from optimizer.engines import (Engine, Operators, ENGINES, DEFAULT_ENGINE, get_engine, register_engine, gapso_optimize,
+                               optimization_levels)
+from optimizer.operators import (repair_schedule, random_schedule, crossover, mutation, pso_update,
+                                 greedy_improve, greedy_schedule, warm_start_population, baseline_schedule)
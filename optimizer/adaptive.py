@@ -0,0 +1,96 @@
+import numpy as np
+
+# Variation operators of the GAPSO loop, in index order
+OPERATORS = ("pso", "ga", "greedy")
+PSO, GA, GREEDY = range(len(OPERATORS))
+
+# Smallest selection probability of an enabled operator, so an operator that
+# is not paying off right now is still tried now and then
+MIN_PROBABILITY = 0.02
+# Weight of the latest generation in the running reward averages
+ADAPTATION_RATE = 0.3
+
+# Restart part of the population when its diversity falls below this share
+# of the initial population's diversity
+DIVERSITY_FLOOR = 0.25
+RESTART_SHARE = 0.3
+# Generations to wait after a restart before checking again
+RESTART_COOLDOWN = 5
+
+
+class OperatorScheduler:
+    """Adaptive operator selection by probability matching.
+
+    Every generation each individual gets one operator, drawn with
+    probability proportional to that operator's quality: the running average
+    of the personal-best improvement it produced per second of work. Each operator
+    keeps at least MIN_PROBABILITY. With ``costs`` (seconds per call of each
+    operator) work is counted from those fixed costs instead of the clock,
+    so seeded runs stay reproducible.
+    """
+
+    def __init__(self, enabled=(True, True, True), costs=None):
+        self.enabled = np.asarray(enabled, dtype=bool)
+        self.costs = None if costs is None else np.asarray(costs, dtype=float)
+        self.quality = np.zeros(len(OPERATORS))
+        self.calls = np.zeros(len(OPERATORS), dtype=np.int64)
+        self._gain = np.zeros(len(OPERATORS))
+        self._seconds = np.zeros(len(OPERATORS))
+
+    def probabilities(self):
+        k = int(self.enabled.sum())
+        p_min = min(MIN_PROBABILITY, 1.0 / k)
+        quality = np.where(self.enabled, self.quality, 0.0)
+        total = quality.sum()
+        share = quality / total if total > 0 else self.enabled / k
+        return np.where(self.enabled, p_min + (1 - k * p_min) * share, 0.0)
+
+    def choose(self, rng, size):
+        """Operator index for each of ``size`` individuals"""
+        return rng.choice(len(OPERATORS), size=size, p=self.probabilities())
+
+    def record(self, op, gain, seconds):
+        """One operator call: how far its child improved on the personal best, and its run time"""
+        self._gain[op] += max(gain, 0.0)
+        self._seconds[op] += seconds if self.costs is None else self.costs[op]
+        self.calls[op] += 1
+
+    def update(self):
+        """Fold the generation's rewards into the operator qualities"""
+        used = self._seconds > 0
+        reward = np.divide(self._gain, self._seconds, out=np.zeros_like(self._gain), where=used)
+        self.quality[used] += ADAPTATION_RATE * (reward[used] - self.quality[used])
+        self._gain[:] = 0.0
+        self._seconds[:] = 0.0
+
+    def call_counts(self):
+        return {name: int(n) for name, n in zip(OPERATORS, self.calls)}
+
+    def state_arrays(self):
+        return {"operator_quality": self.quality.copy(), "operator_calls": self.calls.copy()}
+
+    def restore(self, arrays):
+        self.quality = np.asarray(arrays["operator_quality"], dtype=float).copy()
+        self.calls = np.asarray(arrays["operator_calls"], dtype=np.int64).copy()
+
+
+def population_diversity(pop, columns):
+    """Mean gene diversity 4p(1-p) of a population over the given appliance columns.
+
+    p is the share of individuals with a load ON in an hour, so the value is
+    1 when every gene is split half and half and 0 when all agree.
+    """
+    bits = np.asarray(pop, dtype=np.int8)[:, :, columns]
+    if bits.size == 0:
+        return 0.0
+    p = bits.mean(axis=0)
+    return float((4 * p * (1 - p)).mean())
+
+
+def restart_indices(costs, share=RESTART_SHARE):
+    """The worst ``share`` of the population by personal-best cost, never the best one"""
+    costs = np.asarray(costs, dtype=float)
+    count = min(int(len(costs) * share), len(costs) - 1)
+    if count <= 0:
+        return []
+    return np.argsort(costs, kind="stable")[::-1][:count].tolist()
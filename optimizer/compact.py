@@ -0,0 +1,155 @@
+import contextlib
+import tracemalloc
+
+import numpy as np
+
+from optimizer.engines import Engine, Archive
+from optimizer.vectorized import PopulationOperators
+
+# Archive slots per requested optimization level (only the best entry seeds the levels)
+ARCHIVE_SLOTS_PER_LEVEL = 2
+# Smallest population the memory cap may shrink the search to
+MIN_POP_SIZE = 4
+# Scratch space of one operator call, in 24 x n float64 arrays (random draws, probabilities)
+WORKING_ARRAYS = 16
+# Allowance for NumPy array headers and the Python objects around the state
+OVERHEAD_BYTES = 80 * 1024
+
+
+def list_schedule_bytes(n_loads):
+    """Size of one schedule as 24 Python lists of n ints (how the archive is handed back)"""
+    return 56 + 8 * 24 + 24 * (56 + 8 * n_loads)
+
+
+def state_bytes(pop_size, n_loads, archive_size):
+    """Estimated search memory of the compact engine for a population and archive size"""
+    row = -(-24 * n_loads // 8)
+    # Population, personal bests, a generation's children and the accepted ones
+    schedules = (4 * pop_size + archive_size) * row
+    costs = 8 * (4 * pop_size + archive_size)
+    result = (archive_size + 3) * list_schedule_bytes(n_loads)
+    return schedules + costs + result + WORKING_ARRAYS * 24 * n_loads * 8 + OVERHEAD_BYTES
+
+
+def fit_population(pop_size, n_loads, archive_size, memory_limit):
+    """Largest population up to ``pop_size`` whose search state fits ``memory_limit`` bytes"""
+    if state_bytes(MIN_POP_SIZE, n_loads, archive_size) > memory_limit:
+        raise ValueError(f"Memory limit of {memory_limit / 1024:.0f} KB is too small for {n_loads} appliances "
+                         f"(needs {state_bytes(MIN_POP_SIZE, n_loads, archive_size) / 1024:.0f} KB)")
+    while pop_size > MIN_POP_SIZE and state_bytes(pop_size, n_loads, archive_size) > memory_limit:
+        pop_size -= 1
+    return pop_size
+
+
+@contextlib.contextmanager
+def memory_probe():
+    """Measure the block's peak traced memory in KB (a debugging aid: tracing slows Python down several times).
+
+    Yields a dict that is filled in when the block ends. tracemalloc is only
+    started (and stopped again) when it is not already running.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    report = {}
+    try:
+        yield report
+    finally:
+        report["peakTracedKb"] = (tracemalloc.get_traced_memory()[1] - base) / 1024
+        if started:
+            tracemalloc.stop()
+
+
+class CompactEngine(Engine):
+    """Memory-bounded GAPSO for small devices such as home gateways.
+
+    Population, personal bests, children and archive are kept as bit-packed
+    rows (one bit per appliance-hour) and the archive has a fixed number of
+    slots, so memory does not grow with the number of generations. The
+    operators run on one individual at a time, so only that individual and
+    its child are ever unpacked.
+
+    With ``memory_limit`` (bytes) the population is shrunk until the
+    estimated search state fits. Only when tracemalloc is already running
+    (memory_probe, for debugging) does the search also reset its peak and
+    stop early once the peak exceeds the limit (``stats["memoryCapHit"]``).
+    ``stats["popSize"]`` is the population used.
+    """
+
+    name = "compact"
+    batched = False
+
+    def operators(self, problem):
+        return PackedOperators(problem)
+
+    def new_archive(self, ops, k):
+        return SlotArchive(ARCHIVE_SLOTS_PER_LEVEL * k, -(-24 * ops.problem.n_loads // 8))
+
+    def search(self, problem, iterations, pop_size, k, stats=None, should_stop=None, memory_limit=None,
+               resume=None, **options):
+        stats = {} if stats is None else stats
+        stats["memoryCapHit"] = False
+        if memory_limit is not None:
+            pop_size = fit_population(pop_size, problem.n_loads, ARCHIVE_SLOTS_PER_LEVEL * k, memory_limit)
+        stats["popSize"] = pop_size if resume is None else len(resume["costs"])
+
+        if memory_limit is not None and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            traced_base = tracemalloc.get_traced_memory()[0]
+
+            def stop():
+                if tracemalloc.get_traced_memory()[1] - traced_base > memory_limit:
+                    stats["memoryCapHit"] = True
+                    return True
+                return should_stop is not None and should_stop()
+        else:
+            stop = should_stop
+        return super().search(problem, iterations, pop_size, k, stats=stats, should_stop=stop, resume=resume,
+                              **options)
+
+
+class PackedOperators(PopulationOperators):
+    """PopulationOperators on populations stored as bit-packed rows"""
+
+    def pack(self, pop):
+        return np.packbits(np.asarray(pop, dtype=np.uint8).reshape(len(pop), -1), axis=1)
+
+    def unpack(self, rows):
+        flat = np.unpackbits(rows, axis=1, count=24 * self.problem.n_loads)
+        return flat.view(np.int8).reshape(-1, 24, self.problem.n_loads)
+
+
+class SlotArchive(Archive):
+    """Fixed number of distinct bit-packed schedules; a full archive replaces its worst entry"""
+
+    def __init__(self, size, row_bytes):
+        self.slots = np.zeros((size, row_bytes), dtype=np.uint8)
+        self.slot_costs = np.full(size, np.inf)
+        self.count = 0
+
+    @property
+    def rows(self):
+        return self.slots[:self.count]
+
+    @property
+    def costs(self):
+        return self.slot_costs[:self.count]
+
+    def add(self, rows, costs):
+        for row, cost in zip(rows, costs):
+            if (self.rows == row).all(axis=1).any():
+                continue
+            if self.count < len(self.slots):
+                slot = self.count
+                self.count += 1
+            else:
+                slot = int(self.slot_costs.argmax())
+                if cost >= self.slot_costs[slot]:
+                    continue
+            self.slots[slot] = row
+            self.slot_costs[slot] = cost
+
+    def trim(self):
+        pass
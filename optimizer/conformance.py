@@ -0,0 +1,141 @@
+"""Conformance suite for optimizer engines.
+
+    python -m optimizer.conformance [--engine NAME ...] [--problems 6] [--seed 0] [--output conformance.json]
+
+Every engine (default: all registered ones) solves the same seeded random
+problems, plain time-of-use and with rooftop PV, and is checked for:
+
+* feasible schedules: essential loads ON all day, every other load ON for
+  exactly its minimum hours;
+* reported costs equal to the problem's cost of the returned schedule;
+* a best schedule no dearer than the greedy cheapest-hours schedule;
+* a mean best cost per family within COST_TOLERANCE of the reference engine;
+* the same result twice from the same seed (with fixed operator costs).
+
+The report is printed as JSON and the command exits with status 1 when a
+check fails, so a new backend can be gated in CI.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from optimizer.engines import ENGINES, gapso_optimize
+from optimizer.operators import greedy_schedule
+from optimizer.problem import Problem, tariff_cost_fn
+
+# Engine every other one is compared against
+REFERENCE_ENGINE = "reference"
+# Mean best cost of an engine may exceed the reference engine's by this share
+COST_TOLERANCE = 0.02
+ITERATIONS = 40
+POP_SIZE = 20
+# Fixed seconds per pso, ga and greedy call, so adaptive runs are reproducible
+OPERATOR_SECONDS = (1e-4, 1e-4, 5e-4)
+
+FAMILIES = ("tou", "pv")
+WATTAGES = (100, 500, 800, 1200, 1500, 2000)
+
+
+def random_problem(rng, family):
+    """Random household: a fridge plus 4-10 loads ON for 1-8 hours, TOU prices with an evening peak"""
+    n_free = int(rng.integers(4, 11))
+    load_names = ["Fridge"] + [f"Load{i}" for i in range(n_free)]
+    power_kw = np.array([0.15] + [w / 1000 for w in rng.choice(WATTAGES, n_free)])
+    min_on_hours = {name: int(rng.integers(1, 9)) for name in load_names[1:]}
+    min_on_hours["Fridge"] = 24
+    price = np.round(rng.uniform(15, 25, 24), 2)
+    price[17:22] += rng.uniform(10, 20)
+    peak_hours = [h for h in range(24) if price[h] >= np.percentile(price, 85)]
+
+    cost_fn = tariff_cost_fn(power_kw, price)
+    if family == "pv":
+        pv_kwh = np.clip(np.sin((np.arange(24) - 6) / 12 * np.pi), 0, None) * rng.uniform(1.0, 3.0)
+        cost_fn = lambda schedules: np.maximum(schedules @ power_kw - pv_kwh, 0) @ price
+    return Problem(load_names, ["Fridge"], min_on_hours, price.tolist(), peak_hours, cost_fn)
+
+
+def solve(problem, engine, seed):
+    stats = {}
+    started = time.perf_counter()
+    results = gapso_optimize(problem, engine=engine, iterations=ITERATIONS, pop_size=POP_SIZE,
+                             rng=np.random.default_rng(seed), operator_seconds=OPERATOR_SECONDS, stats=stats)
+    return results, stats["evaluations"], time.perf_counter() - started
+
+
+def check_results(problem, results):
+    """Failed checks of one engine's optimization levels"""
+    failures = []
+    for level, result in enumerate(results):
+        if not problem.is_feasible(result["schedule"]):
+            failures.append(f"level {level} infeasible")
+        if not np.isclose(result["cost"], problem.cost(result["schedule"])):
+            failures.append(f"level {level} cost {result['cost']} != {problem.cost(result['schedule'])}")
+    if not results:
+        failures.append("no schedules returned")
+    elif results[0]["cost"] > problem.cost(greedy_schedule(problem)) + 1e-9:
+        failures.append("best schedule dearer than the greedy schedule")
+    return failures
+
+
+def run_conformance(engines, problems, seed):
+    rng = np.random.default_rng(seed)
+    instances = [(family, n, random_problem(rng, family)) for family in FAMILIES for n in range(problems)]
+    best = {engine: {family: [] for family in FAMILIES} for engine in engines}
+    report = {engine: {"evaluations": 0, "seconds": 0.0, "failures": []} for engine in engines}
+
+    for family, n, problem in instances:
+        for engine in engines:
+            results, evaluations, seconds = solve(problem, engine, [seed, n])
+            entry = report[engine]
+            entry["evaluations"] += evaluations
+            entry["seconds"] += seconds
+            failures = check_results(problem, results)
+            if results:
+                best[engine][family].append(results[0]["cost"])
+                again, _, _ = solve(problem, engine, [seed, n])
+                if again != results:
+                    failures.append("not reproducible from its seed")
+            entry["failures"].extend(f"{family} #{n}: {failure}" for failure in failures)
+
+    for engine in engines:
+        entry = report[engine]
+        entry["meanBestCost"] = {family: statistics.mean(best[engine][family]) for family in FAMILIES}
+        entry["costRatio"] = {}
+        for family in FAMILIES:
+            reference = statistics.mean(best[REFERENCE_ENGINE][family])
+            ratio = entry["meanBestCost"][family] / reference if reference > 0 else 1.0
+            entry["costRatio"][family] = ratio
+            if ratio > 1 + COST_TOLERANCE:
+                entry["failures"].append(f"{family}: mean best cost {ratio:.3f}x the reference engine")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                        help="engine to check (repeatable, default: all)")
+    parser.add_argument("--problems", type=int, default=6, help="problems per family")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # The reference engine always runs: it is what costs are compared against
+    engines = [REFERENCE_ENGINE] + [e for e in (args.engine or sorted(ENGINES)) if e != REFERENCE_ENGINE]
+    engines = run_conformance(engines, args.problems, args.seed)
+    failed = {engine: entry["failures"] for engine, entry in engines.items() if entry["failures"]}
+    report = {"seed": args.seed, "problems": args.problems, "iterations": ITERATIONS, "popSize": POP_SIZE,
+              "costTolerance": COST_TOLERANCE, "engines": engines, "failed": failed}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
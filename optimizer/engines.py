@@ -0,0 +1,495 @@
+import importlib
+import time
+
+import numpy as np
+
+from optimizer.adaptive import (OperatorScheduler, population_diversity, restart_indices, OPERATORS, PSO, GA,
+                                DIVERSITY_FLOOR, RESTART_COOLDOWN)
+from optimizer.operators import greedy_improve, greedy_schedule, local_search, repair_schedule, warm_start_population
+from optimizer.snapshot import unpack_schedules, restore_rng_state, search_snapshot, DEFAULT_CHECKPOINT_EVERY
+
+# Engines selectable by name. Built-in backends are given as "module:Class"
+# and only imported when first used; register_engine adds more.
+ENGINES = {
+    "reference": "optimizer.reference:ReferenceEngine",
+    "vectorized": "optimizer.vectorized:VectorizedEngine",
+    "compact": "optimizer.compact:CompactEngine",
+}
+DEFAULT_ENGINE = "reference"
+_INSTANCES = {}
+
+# Generations between greedy_improve passes of the non-adaptive search
+LEGACY_GREEDY_EVERY = 15
+# Trial schedules the final local search may score, as a share of the
+# search's generations times population
+POLISH_SHARE = 0.25
+
+
+class Engine:
+    """Base class of optimizer backends: the GAPSO search loop.
+
+    ``search`` runs the GAPSO search on a Problem and returns its archive:
+    a list of ``{"schedule", "cost"}`` dicts (24 x n lists) that includes
+    the best schedule found. All randomness comes from ``rng``. The options
+    mean the same for every backend (see gapso_optimize).
+
+    The loop (resume, acceptance, diversity restarts, archive, checkpoints)
+    is shared; a backend supplies its Operators through ``operators`` and
+    may keep its archive differently (``new_archive``). With ``batched``
+    each operator is applied to all individuals assigned to it at once,
+    otherwise to one individual at a time in population order.
+    """
+
+    name = None
+    batched = True
+
+    def operators(self, problem):
+        """The Operators this backend applies to ``problem``"""
+        raise NotImplementedError
+
+    def new_archive(self, ops, k):
+        return Archive(ops.pack(np.zeros((0, 24, ops.problem.n_loads), dtype=np.int8)), k)
+
+    def search(self, problem, iterations, pop_size, k, initial_schedule=None, patience=None,
+               greedy_every=LEGACY_GREEDY_EVERY, checkpoint=None, checkpoint_every=DEFAULT_CHECKPOINT_EVERY,
+               resume=None, checkpoint_extra=None, rng=None, on_improve=None, should_stop=None,
+               adaptive=True, operator_seconds=None, stats=None):
+        n_loads = problem.n_loads
+        ops = self.operators(problem)
+        archive = self.new_archive(ops, k)
+        scheduler = OperatorScheduler(enabled=(True, True, bool(greedy_every)), costs=operator_seconds)
+        free = problem.free
+        stats = {} if stats is None else stats
+        stats.update(evaluations=0, restarts=0, trace=[])
+
+        def groups(members):
+            """Batches the operators are applied to, in the order they draw random numbers"""
+            return [members] if self.batched else [members[i:i + 1] for i in range(len(members))]
+
+        def evaluate(schedules):
+            stats["evaluations"] += len(schedules)
+            return ops.evaluate(schedules)
+
+        def score(rows):
+            return np.concatenate([evaluate(ops.unpack(rows[g])) for g in groups(np.arange(len(rows)))])
+
+        def fresh(count):
+            """``count`` random individuals as stored rows, and their costs"""
+            batches = [ops.random(rng, len(g)) for g in groups(np.arange(count))]
+            if not batches:
+                return ops.pack(np.zeros((0, 24, n_loads), dtype=np.int8)), np.zeros(0)
+            return (np.concatenate([ops.pack(b) for b in batches]),
+                    np.concatenate([evaluate(b) for b in batches]))
+
+        def offspring(op, members, gbest, w):
+            parents = ops.unpack(pop[members])
+            if op == PSO:
+                return ops.pso(parents, ops.unpack(pbest[members]), gbest, rng, w=w)
+            if op == GA:
+                partners = ops.unpack(pop[rng.integers(size, size=len(members))])
+                return ops.mutation(ops.crossover(parents, partners, rng), rng)
+            return ops.greedy(parents)
+
+        def best_schedule():
+            best_idx = int(costs.argmin())
+            return ops.unpack(pbest[best_idx:best_idx + 1])[0]
+
+        if resume is not None:
+            pop = ops.pack(unpack_schedules(resume["population"], n_loads))
+            pbest = ops.pack(unpack_schedules(resume["pbest"], n_loads))
+            costs = np.asarray(resume["costs"], dtype=float).copy()
+            archive.add(ops.pack(unpack_schedules(resume["archive"], n_loads)),
+                        np.asarray(resume["archive_costs"], dtype=float))
+            best_cost = float(resume["best_cost"])
+            stall = int(resume["stall"])
+            start = int(resume["generation"])
+            restore_rng_state(rng, resume)
+            if "operator_quality" in resume:
+                scheduler.restore(resume)
+                pop_costs = np.asarray(resume["pop_costs"], dtype=float).copy()
+                diversity_ref = float(resume["diversity_ref"])
+                last_restart = int(resume["last_restart"])
+                stats.update(evaluations=int(resume["evaluations"]), restarts=int(resume["restarts"]))
+            else:
+                pop_costs = score(pop)
+                diversity_ref = population_diversity(ops.unpack(pbest), free)
+                last_restart = start
+        else:
+            first = np.asarray([greedy_schedule(problem)], dtype=np.int8)
+            if initial_schedule is not None:
+                rest = np.asarray(warm_start_population(problem, initial_schedule, pop_size - 1, rng),
+                                  dtype=np.int8).reshape(-1, 24, n_loads)
+                rest, rest_costs = ops.pack(rest), evaluate(rest)
+            else:
+                rest, rest_costs = fresh(pop_size - 1)
+            pop = np.concatenate([ops.pack(first), rest])
+            costs = np.concatenate([evaluate(first), rest_costs])
+            pbest = pop.copy()
+            pop_costs = costs.copy()
+            best_cost = float(costs.min())
+            stall = 0
+            start = 0
+            diversity_ref = population_diversity(ops.unpack(pbest), free)
+            last_restart = 0
+        size = len(pop)
+        stats["trace"].append((stats["evaluations"], best_cost))
+        if on_improve is not None:
+            on_improve(start, best_cost, best_schedule().tolist())
+
+        for iteration in range(start, iterations):
+            if should_stop is not None and should_stop():
+                break
+            gbest = best_schedule()
+            w = 0.9 - (0.5 * iteration / iterations)
+            children = pop.copy()
+            child_costs = np.zeros(size)
+
+            if adaptive:
+                chosen = scheduler.choose(rng, size)
+                if self.batched:
+                    batches = [(op, np.flatnonzero(chosen == op)) for op in range(len(OPERATORS))]
+                else:
+                    batches = [(int(op), np.array([i])) for i, op in enumerate(chosen)]
+                for op, members in batches:
+                    if len(members) == 0:
+                        continue
+                    started = time.perf_counter()
+                    batch = offspring(op, members, gbest, w)
+                    batch_costs = evaluate(batch)
+                    seconds = (time.perf_counter() - started) / len(members)
+                    for i, c_cost in zip(members.tolist(), batch_costs.tolist()):
+                        scheduler.record(op, costs[i] - c_cost, seconds)
+                    children[members] = ops.pack(batch)
+                    child_costs[members] = batch_costs
+                # Elitist acceptance: a child only replaces its parent when it is not worse
+                kept = child_costs <= pop_costs
+                pop[kept] = children[kept]
+                pop_costs[kept] = child_costs[kept]
+                children, child_costs = children[kept], child_costs[kept]
+            else:
+                for members in groups(np.arange(size)):
+                    c1 = offspring(PSO, members, gbest, w)
+                    c2 = offspring(GA, members, gbest, w)
+                    cost_c1, cost_c2 = evaluate(c1), evaluate(c2)
+                    pso_wins = cost_c1 < cost_c2
+                    batch = np.where(pso_wins[:, None, None], c1, c2)
+                    batch_costs = np.where(pso_wins, cost_c1, cost_c2)
+                    polish = members % 3 == 0
+                    if greedy_every and iteration % greedy_every == 0 and polish.any():
+                        batch[polish] = ops.greedy(batch[polish])
+                        batch_costs[polish] = evaluate(batch[polish])
+                    children[members] = ops.pack(batch)
+                    child_costs[members] = batch_costs
+                pop = children
+                pop_costs = child_costs
+
+            # Personal bests follow the accepted children, which are what gets archived
+            better = pop_costs < costs
+            pbest[better] = pop[better]
+            costs[better] = pop_costs[better]
+            archive.add(children, child_costs)
+
+            if adaptive:
+                scheduler.update()
+                # Diversity collapse: re-seed the worst individuals (the best is kept)
+                if (iteration + 1 - last_restart >= RESTART_COOLDOWN
+                        and population_diversity(ops.unpack(pbest), free) < DIVERSITY_FLOOR * diversity_ref):
+                    worst = np.asarray(restart_indices(costs), dtype=int)
+                    pop[worst], pop_costs[worst] = fresh(len(worst))
+                    pbest[worst] = pop[worst]
+                    costs[worst] = pop_costs[worst]
+                    last_restart = iteration + 1
+                    stats["restarts"] += 1
+
+            archive.trim()
+
+            if costs.min() < best_cost - 1e-9:
+                best_cost = float(costs.min())
+                stall = 0
+                stats["trace"].append((stats["evaluations"], best_cost))
+                if on_improve is not None:
+                    on_improve(iteration + 1, best_cost, best_schedule().tolist())
+            else:
+                stall += 1
+                if patience is not None and stall >= patience:
+                    break
+
+            if checkpoint is not None and (iteration + 1) % checkpoint_every == 0:
+                search = dict(
+                    scheduler.state_arrays(),
+                    pop_costs=np.array(pop_costs, dtype=float),
+                    diversity_ref=np.array(diversity_ref),
+                    last_restart=np.array(last_restart),
+                    evaluations=np.array(stats["evaluations"]),
+                    restarts=np.array(stats["restarts"])
+                )
+                snapshot = search_snapshot(problem, iteration + 1, ops.unpack(pop), ops.unpack(pbest), costs,
+                                           ops.unpack(archive.rows), archive.costs, best_cost, stall, rng, search)
+                checkpoint.submit(dict(snapshot, **(checkpoint_extra or {})))
+        stats["operatorCalls"] = scheduler.call_counts()
+
+        # The global best may come from the initial population, which is not archived
+        best_idx = int(costs.argmin())
+        archive.add(pbest[best_idx:best_idx + 1], costs[best_idx:best_idx + 1])
+        return archive.entries(ops)
+
+
+class Operators:
+    """The GAPSO operators of a backend, on batches of (m, 24, n) int8 schedules.
+
+    ``pack`` and ``unpack`` convert such a batch to and from the rows the
+    search keeps its population, personal bests and archive in (by default
+    the schedules themselves).
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+
+    def random(self, rng, count):
+        raise NotImplementedError
+
+    def pso(self, pop, pbest, gbest, rng, w=0.5):
+        raise NotImplementedError
+
+    def crossover(self, parents, partners, rng):
+        raise NotImplementedError
+
+    def mutation(self, pop, rng):
+        raise NotImplementedError
+
+    def greedy(self, pop):
+        raise NotImplementedError
+
+    def evaluate(self, pop):
+        return self.problem.costs(pop)
+
+    def pack(self, pop):
+        return pop
+
+    def unpack(self, rows):
+        return rows
+
+
+class Archive:
+    """Every archived child; once it holds more than ``k * 10`` entries only the best 60% are kept"""
+
+    def __init__(self, rows, k):
+        self.rows = rows
+        self.costs = np.zeros(0)
+        self.k = k
+
+    def add(self, rows, costs):
+        self.rows = np.concatenate([self.rows, rows])
+        self.costs = np.concatenate([self.costs, costs])
+
+    def trim(self):
+        if len(self.costs) > self.k * 10:
+            order = np.argsort(self.costs, kind="stable")[:int(len(self.costs) * 0.6)]
+            self.rows, self.costs = self.rows[order], self.costs[order]
+
+    def entries(self, ops):
+        return [{"schedule": s, "cost": c} for s, c in zip(ops.unpack(self.rows).tolist(), self.costs.tolist())]
+
+
+def register_engine(name, engine):
+    """Make a backend selectable by name: an Engine instance or class, or a "module:Class" path"""
+    ENGINES[name] = engine
+    _INSTANCES.pop(name, None)
+
+
+def get_engine(name=None):
+    """The engine registered under ``name`` (default: DEFAULT_ENGINE)"""
+    name = name or DEFAULT_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown optimizer engine '{name}' (available: {', '.join(sorted(ENGINES))})")
+    if name not in _INSTANCES:
+        engine = ENGINES[name]
+        if isinstance(engine, str):
+            module, _, attr = engine.partition(":")
+            engine = getattr(importlib.import_module(module), attr)
+        if isinstance(engine, type):
+            engine = engine()
+        _INSTANCES[name] = engine
+    return _INSTANCES[name]
+
+
+def gapso_optimize(problem, engine=None, iterations=None, pop_size=None, k=3, initial_schedule=None,
+                   patience=None, **options):
+    """Main GAPSO optimization function
+
+    Runs the search on ``engine`` (a registered name, default
+    DEFAULT_ENGINE) and turns its archive into up to three optimization
+    levels (most, moderately and least optimized).
+
+    All randomness comes from ``rng`` (a NumPy Generator, fresh entropy when
+    omitted), so a seeded generator reproduces the run exactly.
+    ``on_improve(generation, cost, schedule)`` is called whenever the global
+    best improves, and the search ends early once ``should_stop()`` is true.
+
+    With ``adaptive`` (the default) every individual gets one child per
+    generation from a single operator (PSO update, crossover + mutation or
+    greedy_improve) chosen by an OperatorScheduler that favours the operator
+    with the most improvement per second (``operator_seconds`` fixes the
+    per-call costs instead of timing them). A child replaces its parent
+    only when it is not worse, and the worst part of the population is
+    restarted when the diversity of the personal bests collapses. Otherwise
+    every individual gets both a PSO and a GA child, the better one is kept
+    and greedy_improve runs on a fixed schedule.
+
+    With ``initial_schedule`` (warm start) the population is seeded from that
+    schedule, fewer generations are run by default and the search stops once
+    the best cost has not improved for ``patience`` generations.
+    ``greedy_every`` sets how often greedy_improve runs (None disables it;
+    in adaptive mode it only switches the greedy operator on or off).
+    ``stats`` (a dict) receives the number of evaluations, restarts,
+    operator calls and the (evaluations, best cost) trace.
+
+    With a ``checkpoint`` writer the search state is handed to it every
+    ``checkpoint_every`` generations (plus ``checkpoint_extra`` arrays);
+    ``resume`` continues from such a snapshot.
+    """
+    n_loads = problem.n_loads
+    if initial_schedule is not None:
+        if iterations is None:
+            iterations = max(30, 5 * n_loads)
+        if patience is None:
+            patience = 10
+    if iterations is None:
+        iterations = max(100, 20 * n_loads)
+    if pop_size is None:
+        pop_size = max(20, 5 * n_loads)
+    if options.get('rng') is None:
+        options['rng'] = np.random.default_rng()
+
+    archive = get_engine(engine).search(problem, iterations, pop_size, k, initial_schedule=initial_schedule,
+                                        patience=patience, **options)
+    return optimization_levels(problem, archive, k, polish_evaluations=int(POLISH_SHARE * iterations * pop_size))
+
+
+def optimization_levels(problem, archive, k, polish_evaluations=None):
+    """Most, moderately and least optimized schedules from a search archive.
+
+    With marginal load prices the best schedule is finished by a local search
+    on the cost itself, scoring at most ``polish_evaluations`` trials.
+    """
+    n_loads = problem.n_loads
+    price, peak_hours = problem.hourly_price, problem.peak_hours
+    archive = sorted(archive, key=lambda x: x["cost"])
+
+    unique_archive = []
+    for item in archive:
+        is_duplicate = False
+        for existing in unique_archive:
+            diff = sum(sum(abs(item["schedule"][h][i] - existing["schedule"][h][i])
+                          for i in range(n_loads)) for h in range(24))
+            threshold = max(5, (24 * n_loads) * 0.05)
+            if diff < threshold:
+                is_duplicate = True
+                break
+        if not is_duplicate:
+            unique_archive.append(item)
+        if len(unique_archive) >= k * 5:
+            break
+
+    # Create 3 distinct optimization levels
+    results = []
+
+    if len(unique_archive) >= 1:
+        # MOST OPTIMIZED
+        best = {"schedule": [row[:] for row in unique_archive[0]["schedule"]],
+                "cost": unique_archive[0]["cost"]}
+        # greedy_improve only looks at the load prices, which with PV or a
+        # battery estimate the cost of each hour alone; there a local search
+        # on the cost itself finishes the job. Keep the result only when it is
+        # really cheaper.
+        polished = greedy_improve(problem, [row[:] for row in best["schedule"]], max_iterations=20)
+        polished = greedy_improve(problem, polished, max_iterations=20)
+        if problem.marginal_prices:
+            polished = local_search(problem, polished, max_evaluations=polish_evaluations)
+        polished_cost = problem.cost(polished)
+        if polished_cost <= best["cost"]:
+            best = {"schedule": polished, "cost": polished_cost}
+        results.append(best)
+
+        # MODERATE OPTIMIZED
+        moderate = {"schedule": [row[:] for row in best["schedule"]], "cost": 0}
+        moderate_hours = [h for h in range(24) if 25 <= price[h] <= 30 and h not in peak_hours]
+
+        for i, name in enumerate(problem.load_names):
+            if name in problem.essential:
+                continue
+
+            needed = problem.min_on_hours[name]
+            on_hours = [h for h in range(24) if moderate["schedule"][h][i] == 1]
+            cheap_on = [h for h in on_hours if price[h] <= 22]
+            cheap_on.sort(key=lambda h: price[h])
+
+            num_to_move = max(1, int(needed * 0.35))
+            moved = 0
+
+            for h_cheap in cheap_on[:num_to_move]:
+                if moved >= num_to_move or not moderate_hours:
+                    break
+                for h_mod in moderate_hours:
+                    if moderate["schedule"][h_mod][i] == 0:
+                        moderate["schedule"][h_cheap][i] = 0
+                        moderate["schedule"][h_mod][i] = 1
+                        moved += 1
+                        break
+
+        moderate["schedule"] = repair_schedule(problem, moderate["schedule"])
+        moderate["cost"] = problem.cost(moderate["schedule"])
+        results.append(moderate)
+
+        # LEAST OPTIMIZED
+        least = {"schedule": [row[:] for row in best["schedule"]], "cost": 0}
+        expensive_hours = [h for h in range(24) if 30 <= price[h] <= 40 and h not in peak_hours]
+
+        for i, name in enumerate(problem.load_names):
+            if name in problem.essential:
+                continue
+
+            needed = problem.min_on_hours[name]
+            on_hours = [h for h in range(24) if least["schedule"][h][i] == 1]
+            cheap_on = [h for h in on_hours if price[h] <= 25]
+            cheap_on.sort(key=lambda h: price[h])
+
+            num_to_move = max(1, int(needed * 0.55))
+            moved = 0
+            used_exp_hours = []
+
+            for h_cheap in cheap_on[:num_to_move]:
+                if moved >= num_to_move or not expensive_hours:
+                    break
+                for h_exp in expensive_hours:
+                    if least["schedule"][h_exp][i] == 0 and h_exp not in used_exp_hours:
+                        least["schedule"][h_cheap][i] = 0
+                        least["schedule"][h_exp][i] = 1
+                        used_exp_hours.append(h_exp)
+                        moved += 1
+                        break
+
+        for i, name in enumerate(problem.load_names):
+            if name in problem.essential:
+                continue
+            needed = problem.min_on_hours[name]
+            current = sum(least["schedule"][h][i] for h in range(24))
+            if current < needed:
+                hours_with_price = [(h, price[h]) for h in range(24) if least["schedule"][h][i] == 0]
+                moderate = [(h, p) for h, p in hours_with_price if 25 <= p <= 30 and h not in peak_hours]
+                moderate.sort(key=lambda x: x[1])
+                if len(moderate) < (needed - current):
+                    other = [(h, p) for h, p in hours_with_price if h not in peak_hours and (h, p) not in moderate]
+                    other.sort(key=lambda x: x[1])
+                    moderate.extend(other)
+
+                for h, _ in moderate:
+                    if current >= needed:
+                        break
+                    least["schedule"][h][i] = 1
+                    current += 1
+
+        least["cost"] = problem.cost(least["schedule"])
+        results.append(least)
+
+    return results
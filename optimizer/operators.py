@@ -0,0 +1,272 @@
+"""Reference (pure-Python) GAPSO operators on 24 x n list schedules.
+
+Every operator takes the Problem first and draws its randomness from a
+NumPy Generator in blocks, so a seeded generator reproduces a run exactly.
+"""
+
+import numpy as np
+
+
+def repair_schedule(problem, schedule):
+    """Repair schedule to meet minimum hour requirements"""
+    price, peak_hours = problem.load_price, problem.peak_hours
+    for i, name in enumerate(problem.load_names):
+        if name in problem.essential:
+            for h in range(24):
+                schedule[h][i] = 1
+            continue
+
+        needed = problem.min_on_hours[name]
+        current = sum(schedule[h][i] for h in range(24))
+
+        if current < needed:
+            hours_with_price = [(h, price[h][i]) for h in range(24) if schedule[h][i] == 0]
+            non_peak = [(h, p) for h, p in hours_with_price if h not in peak_hours]
+            peak = [(h, p) for h, p in hours_with_price if h in peak_hours]
+
+            non_peak.sort(key=lambda x: x[1])
+            peak.sort(key=lambda x: x[1])
+
+            hours_to_use = [h for h, _ in non_peak] + [h for h, _ in peak]
+
+            for h in hours_to_use:
+                if current >= needed:
+                    break
+                schedule[h][i] = 1
+                current += 1
+
+        elif current > needed:
+            on_hours = [(h, price[h][i]) for h in range(24) if schedule[h][i] == 1]
+            on_hours.sort(key=lambda x: x[1], reverse=True)
+
+            for h, _ in on_hours:
+                if current <= needed:
+                    break
+                schedule[h][i] = 0
+                current -= 1
+
+    return schedule
+
+
+def random_schedule(problem, rng):
+    """Generate random initial schedule"""
+    price, peak_hours, essential = problem.load_price, problem.peak_hours, problem.essential
+    mean_price = [sum(column) / 24 for column in zip(*price)]
+    draws = rng.random((24, problem.n_loads)).tolist()
+    sch = []
+    for h in range(24):
+        row = []
+        for i, name in enumerate(problem.load_names):
+            if name in essential:
+                row.append(1)
+            elif h in peak_hours:
+                row.append(0)
+            else:
+                prob_on = 0.7 if price[h][i] < mean_price[i] else 0.3
+                row.append(1 if draws[h][i] < prob_on else 0)
+        sch.append(row)
+    return repair_schedule(problem, sch)
+
+
+def crossover(problem, a, b, rng):
+    """Crossover operation"""
+    p = int(rng.integers(1, 24))
+    return repair_schedule(problem, [row[:] for row in a[:p] + b[p:]])
+
+
+def mutation(problem, s, rng, rate=0.1):
+    """Mutation operation"""
+    peak_hours, essential = problem.peak_hours, problem.essential
+    draws = rng.random((24, problem.n_loads)).tolist()
+    for h in range(24):
+        for i, name in enumerate(problem.load_names):
+            if name in essential or h in peak_hours:
+                continue
+            if draws[h][i] < rate:
+                s[h][i] ^= 1
+    return repair_schedule(problem, s)
+
+
+def pso_update(problem, p, pb, gb, rng, w=0.5, c1=1.5, c2=1.5):
+    """PSO update operation"""
+    price, peak_hours, essential = problem.load_price, problem.peak_hours, problem.essential
+    max_price = [max(column) for column in zip(*price)]
+    r_pb, r_gb, r_p, r_on = rng.random((4, 24, problem.n_loads)).tolist()
+    new = []
+    for h in range(24):
+        row = p[h][:]
+        for i, name in enumerate(problem.load_names):
+            if name in essential:
+                row[i] = 1
+                continue
+            if h in peak_hours:
+                row[i] = 0
+                continue
+
+            prob_on = 0.0
+            if pb[h][i] == 1:
+                prob_on += c1 * r_pb[h][i]
+            if gb[h][i] == 1:
+                prob_on += c2 * r_gb[h][i]
+            if p[h][i] == 1:
+                prob_on += w * r_p[h][i]
+
+            prob_on = min(prob_on / (w + c1 + c2), 1.0)
+
+            price_factor = 1.0 - (price[h][i] / max_price[i]) if max_price[i] > 0 else 0.0
+            prob_on = prob_on * 0.7 + price_factor * 0.3
+
+            if r_on[h][i] < prob_on:
+                row[i] = 1
+            else:
+                row[i] = 0
+        new.append(row)
+    return repair_schedule(problem, new)
+
+
+def greedy_improve(problem, schedule, max_iterations=10):
+    """Local search improvement"""
+    price, peak_hours = problem.load_price, problem.peak_hours
+    improved = True
+    iteration = 0
+
+    while improved and iteration < max_iterations:
+        improved = False
+        iteration += 1
+
+        for i, name in enumerate(problem.load_names):
+            if name in problem.essential:
+                continue
+
+            on_hours = [h for h in range(24) if schedule[h][i] == 1]
+            off_hours = [h for h in range(24) if schedule[h][i] == 0 and h not in peak_hours]
+
+            if not on_hours or not off_hours:
+                continue
+
+            on_hours.sort(key=lambda h: price[h][i], reverse=True)
+            off_hours.sort(key=lambda h: price[h][i])
+
+            for h_on in on_hours:
+                for h_off in off_hours:
+                    if price[h_off][i] < price[h_on][i]:
+                        schedule[h_on][i] = 0
+                        schedule[h_off][i] = 1
+
+                        current_on = sum(schedule[h][i] for h in range(24))
+                        if current_on >= problem.min_on_hours[name]:
+                            improved = True
+                            break
+                        else:
+                            schedule[h_on][i] = 1
+                            schedule[h_off][i] = 0
+                if improved:
+                    break
+
+    return schedule
+
+
+def local_search(problem, schedule, max_passes=10, max_evaluations=None):
+    """Best-improvement hill climbing on the cost itself.
+
+    Each pass tries, for every load, all moves of one of its ON hours to one
+    of its OFF hours and all exchanges of an hour with another load (each
+    takes the other's hour), scored in one ``problem.costs`` call, and keeps
+    the cheapest if it lowers the cost. Unlike greedy_improve it sees how
+    loads share PV surplus and a battery, at one batch evaluation per load.
+    It stops early once ``max_evaluations`` trial schedules have been scored.
+    """
+    s = np.asarray(schedule, dtype=np.int8).copy()
+    cost = problem.cost(s)
+    free = np.asarray(problem.free, dtype=int)
+    evaluations = 0
+    for _ in range(max_passes):
+        improved = False
+        for i in free:
+            if max_evaluations is not None and evaluations >= max_evaluations:
+                return s.tolist()
+            on, off = s[:, i] == 1, s[:, i] == 0
+            # (hour i leaves, hour i takes, other load, -1 for a plain move)
+            h_out, h_in = np.nonzero(on[:, None] & off[None, :])
+            moves = [(h_out, h_in, np.full(h_out.size, -1))]
+            for j in free[free > i]:
+                a, b = np.nonzero((on & (s[:, j] == 0))[:, None] & (off & (s[:, j] == 1))[None, :])
+                moves.append((a, b, np.full(a.size, j)))
+            h_out, h_in, other = (np.concatenate(m) for m in zip(*moves))
+            if not h_out.size:
+                continue
+            rows = np.arange(h_out.size)
+            trial = np.repeat(s[None], rows.size, axis=0)
+            trial[rows, h_out, i] = 0
+            trial[rows, h_in, i] = 1
+            swap = other >= 0
+            trial[rows[swap], h_out[swap], other[swap]] = 1
+            trial[rows[swap], h_in[swap], other[swap]] = 0
+            costs = problem.costs(trial)
+            evaluations += rows.size
+            best = int(costs.argmin())
+            if costs[best] < cost:
+                s, cost = trial[best], float(costs[best])
+                improved = True
+        if not improved:
+            break
+    return s.tolist()
+
+
+def greedy_schedule(problem):
+    """Create greedy initial schedule"""
+    sch = [[0]*problem.n_loads for _ in range(24)]
+
+    for i, name in enumerate(problem.load_names):
+        if name in problem.essential:
+            for h in range(24):
+                sch[h][i] = 1
+            continue
+
+        needed = problem.min_on_hours[name]
+        hours_with_price = [(h, problem.load_price[h][i]) for h in range(24)]
+        non_peak = [(h, p) for h, p in hours_with_price if h not in problem.peak_hours]
+        peak = [(h, p) for h, p in hours_with_price if h in problem.peak_hours]
+
+        non_peak.sort(key=lambda x: x[1])
+        peak.sort(key=lambda x: x[1])
+
+        for h, _ in non_peak[:needed]:
+            sch[h][i] = 1
+        remaining = needed - len(non_peak[:needed])
+        if remaining > 0:
+            for h, _ in peak[:remaining]:
+                sch[h][i] = 1
+
+    return sch
+
+
+def warm_start_population(problem, schedule, count, rng):
+    """Seed population from a previous solution plus perturbations of it"""
+    pop = [[row[:] for row in schedule]]
+    n_perturbed = max(0, min(count - 1, (count * 2) // 3))
+    for j in range(n_perturbed):
+        rate = 0.05 + 0.15 * j / max(1, n_perturbed - 1)
+        pop.append(mutation(problem, [row[:] for row in schedule], rng, rate=rate))
+    pop.extend([random_schedule(problem, rng) for _ in range(count - len(pop))])
+    return pop[:count]
+
+
+def baseline_schedule(problem, rng):
+    """Unoptimized baseline: every appliance ON for its minimum hours at random hours"""
+    sch = [[0]*problem.n_loads for _ in range(24)]
+    for i, name in enumerate(problem.load_names):
+        if name in problem.essential:
+            for h in range(24):
+                sch[h][i] = 1
+            continue
+
+        needed = problem.min_on_hours[name]
+        hours = list(range(24))
+        rng.shuffle(hours)
+        used = 0
+        for h in hours:
+            if used < needed:
+                sch[h][i] = 1
+                used += 1
+    return sch
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Trial schedules scored per cost call when pricing the loads' hours
+MARGINAL_BATCH = 256
+
+
+class Problem:
+    """One scheduling problem as seen by the optimizer engines.
+
+    Appliances are columns of a 24 x n on/off schedule. ``cost_fn`` maps an
+    int8 array of schedules shaped (..., 24, n) to their costs, so engines
+    can score one schedule or a whole population in a single call; the
+    operators only use ``load_price`` (24 x n) to bias where loads go.
+
+    ``load_price`` is the hourly price for every load, unless
+    ``marginal_prices`` is set: then it is what one hour of each load adds
+    to ``cost_fn`` on top of the essential loads. Use that when the cost is
+    not the plain tariff (PV surplus, a battery), where the hourly price
+    ranks the hours wrongly.
+    """
+
+    def __init__(self, load_names, essential, min_on_hours, hourly_price, peak_hours, cost_fn,
+                 marginal_prices=False):
+        self.load_names = list(load_names)
+        self.n_loads = len(self.load_names)
+        self.essential = set(essential)
+        self.min_on_hours = dict(min_on_hours)
+        self.hourly_price = list(hourly_price)
+        self.peak_hours = list(peak_hours)
+        self.cost_fn = cost_fn
+
+        # Array views for the vectorized engine and the feasibility checks
+        self.essential_mask = np.array([name in self.essential for name in self.load_names], dtype=bool)
+        self.free = np.flatnonzero(~self.essential_mask).tolist()
+        self.needed = np.array([24 if name in self.essential else int(self.min_on_hours[name])
+                                for name in self.load_names], dtype=int)
+        self.peak_mask = np.zeros(24, dtype=bool)
+        self.peak_mask[self.peak_hours] = True
+
+        # Price each load's hours are ranked by (24 x n lists)
+        self.marginal_prices = bool(marginal_prices)
+        load_price = np.repeat(np.asarray(self.hourly_price, dtype=float)[:, None], self.n_loads, axis=1)
+        if self.marginal_prices:
+            load_price[:, self.free] = self.marginal_price(self.free)
+        self.load_price = load_price.tolist()
+
+    def marginal_price(self, columns):
+        """Cost added by each of ``columns`` running alone in each hour over the essential loads, (24, len)"""
+        base = np.zeros((24, self.n_loads), dtype=np.int8)
+        base[:, self.essential_mask] = 1
+        base_cost = self.cost(base)
+        columns = np.asarray(columns, dtype=int)
+        hours = np.arange(24)
+        price = np.zeros((24, len(columns)))
+        step = max(1, MARGINAL_BATCH // 24)
+        for start in range(0, len(columns), step):
+            chunk = columns[start:start + step]
+            trial = np.repeat(base[None, None], len(chunk), axis=0).repeat(24, axis=1)
+            trial[np.arange(len(chunk))[:, None], hours, hours, chunk[:, None]] = 1
+            costs = self.costs(trial.reshape(-1, 24, self.n_loads)).reshape(len(chunk), 24)
+            price[:, start:start + len(chunk)] = (costs - base_cost).T
+        return price
+
+    def cost(self, schedule):
+        """Cost of one schedule (24 rows of n 0/1 values)"""
+        return float(self.cost_fn(np.asarray(schedule, dtype=np.int8)))
+
+    def costs(self, schedules):
+        """Costs of a population of schedules, shape (P, 24, n)"""
+        return np.asarray(self.cost_fn(np.asarray(schedules, dtype=np.int8)), dtype=float)
+
+    def is_feasible(self, schedule):
+        """Every essential load ON all day, every other one ON exactly its minimum hours"""
+        s = np.asarray(schedule)
+        if s.shape != (24, self.n_loads) or not np.isin(s, (0, 1)).all():
+            return False
+        return bool((s.sum(axis=0) == np.minimum(self.needed, 24)).all())
+
+
+def tariff_cost_fn(power_kw, hourly_price):
+    """Plain time-of-use cost: kWh per hour times the hourly price"""
+    power_kw = np.asarray(power_kw, dtype=float)
+    price = np.asarray(hourly_price, dtype=float)
+    return lambda schedules: (schedules @ power_kw) @ price
@@ -0,0 +1,46 @@
+import numpy as np
+
+from optimizer.engines import Engine, Operators
+from optimizer.operators import random_schedule, crossover, mutation, pso_update, greedy_improve
+
+
+class ReferenceEngine(Engine):
+    """GAPSO on 24 x n list schedules, one individual at a time.
+
+    This is the engine the other backends are checked against: its
+    operators are the list operators of optimizer.operators, applied in
+    population order, and a seeded run always returns the same schedules.
+    """
+
+    name = "reference"
+    batched = False
+
+    def operators(self, problem):
+        return ListOperators(problem)
+
+
+class ListOperators(Operators):
+    """The optimizer.operators functions, called on each schedule of a batch as lists"""
+
+    def _batch(self, schedules):
+        return np.asarray(schedules, dtype=np.int8).reshape(-1, 24, self.problem.n_loads)
+
+    def random(self, rng, count):
+        return self._batch([random_schedule(self.problem, rng) for _ in range(count)])
+
+    def pso(self, pop, pbest, gbest, rng, w=0.5):
+        gbest = gbest.tolist()
+        return self._batch([pso_update(self.problem, ind, best, gbest, rng, w=w)
+                            for ind, best in zip(pop.tolist(), pbest.tolist())])
+
+    def crossover(self, parents, partners, rng):
+        return self._batch([crossover(self.problem, a, b, rng) for a, b in zip(parents.tolist(), partners.tolist())])
+
+    def mutation(self, pop, rng):
+        return self._batch([mutation(self.problem, s, rng) for s in pop.tolist()])
+
+    def greedy(self, pop):
+        return self._batch([greedy_improve(self.problem, s) for s in pop.tolist()])
+
+    def evaluate(self, pop):
+        return np.array([self.problem.cost(s) for s in pop], dtype=float)
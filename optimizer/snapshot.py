@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+
+DEFAULT_CHECKPOINT_EVERY = 10
+# Arrays every search snapshot holds; a file without them is not resumable
+SNAPSHOT_KEYS = ("rng_state", "generation", "n_loads", "population", "pbest", "costs", "archive", "archive_costs",
+                 "best_cost", "stall")
+
+
+def pack_schedules(schedules, n_loads):
+    """Bit-pack a list of 24 x n schedules into a (count, bytes) uint8 array"""
+    flat = np.asarray(schedules, dtype=np.uint8).reshape(len(schedules), 24 * n_loads)
+    return np.packbits(flat, axis=1)
+
+
+def unpack_schedules(packed, n_loads):
+    """Inverse of pack_schedules, as a (count, 24, n) int8 array"""
+    flat = np.unpackbits(packed, axis=1, count=24 * n_loads)
+    return flat.reshape(-1, 24, n_loads).astype(np.int8)
+
+
+def json_array(value):
+    """Store a JSON-serializable value as a uint8 array inside a checkpoint"""
+    return np.frombuffer(json.dumps(value).encode(), dtype=np.uint8)
+
+
+def array_json(array):
+    return json.loads(array.tobytes().decode())
+
+
+def rng_state_arrays(rng):
+    """Bit generator state of a NumPy Generator as checkpoint arrays"""
+    return {"rng_state": json_array(rng.bit_generator.state)}
+
+
+def restore_rng_state(rng, arrays):
+    """Put a Generator back into the state saved by rng_state_arrays"""
+    rng.bit_generator.state = array_json(arrays["rng_state"])
+
+
+def search_snapshot(problem, generation, pop, pbest, costs, archive, archive_costs, best_cost, stall, rng,
+                    search=None):
+    """Search state after ``generation`` generations as checkpoint arrays"""
+    return dict(
+        rng_state_arrays(rng),
+        **(search or {}),
+        generation=np.array(generation),
+        n_loads=np.array(problem.n_loads),
+        population=pack_schedules(pop, problem.n_loads),
+        pbest=pack_schedules(pbest, problem.n_loads),
+        costs=np.array(costs, dtype=float),
+        archive=pack_schedules(archive, problem.n_loads),
+        archive_costs=np.array(archive_costs, dtype=float),
+        best_cost=np.array(best_cost),
+        stall=np.array(stall)
+    )
@@ -0,0 +1,91 @@
+import numpy as np
+
+from optimizer.engines import Engine, Operators
+from optimizer.operators import greedy_improve
+
+
+class VectorizedEngine(Engine):
+    """GAPSO on whole populations at once, as (P, 24, n) int8 arrays.
+
+    Each operator builds the children of every individual assigned to it in
+    a few array operations and the population is scored with one
+    ``problem.costs`` call, so a generation costs a handful of NumPy calls
+    instead of P Python loops. The search is the reference engine's, but
+    random numbers are drawn per operator batch instead of per individual,
+    so a seed gives a different (equally reproducible) run.
+    """
+
+    name = "vectorized"
+
+    def operators(self, problem):
+        return PopulationOperators(problem)
+
+
+class PopulationOperators(Operators):
+    """The GAPSO operators applied to a whole (P, 24, n) population.
+
+    repair follows repair_schedule: missing hours are added in the cheapest
+    off-peak hours first, surplus hours are dropped from the dearest ones.
+    Both orders are fixed per problem and load, so a repair is a ranking by
+    cumulative sums over the hours instead of a sort per appliance.
+    """
+
+    def __init__(self, problem):
+        super().__init__(problem)
+        price = np.asarray(problem.load_price, dtype=float)
+        hours = np.broadcast_to(np.arange(24), price.T.shape)
+        peak = np.broadcast_to(problem.peak_mask, price.T.shape)
+        top = price.max(axis=0)
+        self.price = price
+        self.mean_price = price.mean(axis=0)
+        self.price_factor = 1.0 - np.divide(price, top, out=np.ones_like(price), where=top > 0)
+        # Hours of each load (columns) in the order repair adds and drops them
+        self.add_order = np.lexsort((hours, price.T, peak)).T
+        self.remove_order = np.lexsort((hours, -price.T)).T
+        self.add_rank = np.argsort(self.add_order, axis=0)
+        self.remove_rank = np.argsort(self.remove_order, axis=0)
+        self.essential = problem.essential_mask
+        self.peak = problem.peak_mask[:, None]
+        self.needed = np.minimum(problem.needed, 24)
+        # Genes the operators may flip: non-essential loads outside peak hours
+        self.mutable = ~self.peak & ~self.essential[None, :]
+
+    def repair(self, pop):
+        pop[:, :, self.essential] = 1
+        deficit = self.needed[None, :] - pop.sum(axis=1, dtype=int)
+        off = np.take_along_axis(pop, self.add_order[None], axis=1) == 0
+        add = off & (np.cumsum(off, axis=1) <= deficit[:, None, :])
+        on = np.take_along_axis(pop, self.remove_order[None], axis=1) == 1
+        drop = on & (np.cumsum(on, axis=1) <= -deficit[:, None, :])
+        pop |= np.take_along_axis(add, self.add_rank[None], axis=1).astype(np.int8)
+        pop &= ~np.take_along_axis(drop, self.remove_rank[None], axis=1).astype(np.int8)
+        return pop
+
+    def random(self, rng, count):
+        draws = rng.random((count, 24, self.problem.n_loads))
+        prob_on = np.where(self.price < self.mean_price, 0.7, 0.3)
+        pop = (self.mutable & (draws < prob_on)).astype(np.int8)
+        return self.repair(pop)
+
+    def crossover(self, parents, partners, rng):
+        points = rng.integers(1, 24, size=len(parents))
+        head = np.arange(24)[None, :] < points[:, None]
+        return self.repair(np.where(head[:, :, None], parents, partners).astype(np.int8))
+
+    def mutation(self, pop, rng, rate=0.1):
+        flips = self.mutable & (rng.random(pop.shape) < rate)
+        return self.repair(pop ^ flips.astype(np.int8))
+
+    def pso(self, pop, pbest, gbest, rng, w=0.5, c1=1.5, c2=1.5):
+        r_pb, r_gb, r_p, r_on = rng.random((4,) + pop.shape)
+        prob_on = (c1 * r_pb * pbest + c2 * r_gb * gbest + w * r_p * pop) / (w + c1 + c2)
+        prob_on = np.minimum(prob_on, 1.0) * 0.7 + self.price_factor * 0.3
+        new = (r_on < prob_on) & ~self.peak
+        new[:, :, self.essential] = True
+        return self.repair(new.astype(np.int8))
+
+    def greedy(self, pop):
+        # Hill climbing is sequential per schedule; run the reference operator on each
+        return np.asarray([greedy_improve(self.problem, s.tolist()) for s in pop],
+                          dtype=np.int8).reshape(pop.shape)
+
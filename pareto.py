@@ -0,0 +1,84 @@
+import numpy as np
+
+
+def dominance_matrix(F):
+    """D[i, j] is True when solution i dominates solution j (minimization)"""
+    F = np.asarray(F, dtype=float)
+    le = (F[:, None, :] <= F[None, :, :]).all(axis=2)
+    lt = (F[:, None, :] < F[None, :, :]).any(axis=2)
+    return le & lt
+
+
+def fast_non_dominated_sort(F):
+    """Front rank of every row of the objective matrix F (0 = Pareto front).
+
+    Dominance is computed for all pairs at once; fronts are then peeled off
+    by decrementing the domination counts of everything the current front
+    dominates, one vector operation per front.
+    """
+    D = dominance_matrix(F)
+    n = D.shape[0]
+    counts = D.sum(axis=0)
+    ranks = np.full(n, -1, dtype=int)
+    front = np.flatnonzero(counts == 0)
+    rank = 0
+    while front.size:
+        ranks[front] = rank
+        counts = counts - D[front].sum(axis=0)
+        counts[ranks >= 0] = -1
+        front = np.flatnonzero(counts == 0)
+        rank += 1
+    return ranks
+
+
+def crowding_distance(F):
+    """Crowding distance of each row of F within its own front"""
+    F = np.asarray(F, dtype=float)
+    n, m = F.shape
+    if n <= 2:
+        return np.full(n, np.inf)
+    order = np.argsort(F, axis=0, kind="stable")
+    sorted_F = np.take_along_axis(F, order, axis=0)
+    span = sorted_F[-1] - sorted_F[0]
+    span[span == 0] = 1.0
+    gaps = np.zeros_like(F)
+    gaps[1:-1] = (sorted_F[2:] - sorted_F[:-2]) / span
+    gaps[0] = gaps[-1] = np.inf
+    distance = np.zeros_like(F)
+    np.put_along_axis(distance, order, gaps, axis=0)
+    return distance.sum(axis=1)
+
+
+def nsga_select(F, size):
+    """Indices of the ``size`` best rows by front rank, then crowding distance"""
+    F = np.asarray(F, dtype=float)
+    if F.shape[0] <= size:
+        return np.arange(F.shape[0])
+    ranks = fast_non_dominated_sort(F)
+    crowding = np.zeros(F.shape[0])
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        crowding[members] = crowding_distance(F[members])
+    order = np.lexsort((-crowding, ranks))
+    return order[:size]
+
+
+def spread_selection(F, k):
+    """Pick ``k`` well-spread rows of a front by farthest-point sampling.
+
+    Starts from the lowest first objective (cost) and repeatedly adds the
+    solution farthest, in normalized objective space, from those chosen.
+    """
+    F = np.asarray(F, dtype=float)
+    if F.shape[0] <= k:
+        return list(np.argsort(F[:, 0], kind="stable"))
+    lo, hi = F.min(axis=0), F.max(axis=0)
+    span = np.where(hi > lo, hi - lo, 1.0)
+    Z = (F - lo) / span
+    chosen = [int(np.argmin(F[:, 0]))]
+    nearest = np.linalg.norm(Z - Z[chosen[0]], axis=1)
+    while len(chosen) < k:
+        nxt = int(np.argmax(nearest))
+        chosen.append(nxt)
+        nearest = np.minimum(nearest, np.linalg.norm(Z - Z[nxt], axis=1))
+    return sorted(chosen, key=lambda i: F[i, 0])
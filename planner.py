@@ -0,0 +1,119 @@
+import math
+
+from optimizer.engines import LEGACY_GREEDY_EVERY
+
+DEFAULT_TARGET_SECONDS = 2.0
+
+# Share of the budget kept for baseline generation and the final level builders
+FINALIZE_SHARE = 0.2
+# Share of the search budget that periodic greedy_improve calls may use
+GREEDY_SHARE = 0.2
+# Candidate evaluations per individual per generation: one child from the
+# adaptively chosen operator, or a PSO and a GA child (Pareto search)
+EVALS_PER_INDIVIDUAL = 1
+PARETO_EVALS_PER_INDIVIDUAL = 2
+# Generations per population member; the legacy defaults (20n vs 5n) use 4
+GENERATIONS_PER_MEMBER = 4
+
+MIN_POP_SIZE = 8
+MIN_ITERATIONS = 10
+
+# Reference cost per appliance of one candidate evaluation and of one
+# greedy_improve call, used instead of a measurement for reproducible runs
+NOMINAL_EVAL_SECONDS_PER_LOAD = 2.5e-5
+NOMINAL_GREEDY_SECONDS_PER_LOAD = 3e-5
+# How the cost model changes that evaluation cost: power profiles and slab
+# tiers scale it, a battery adds one dispatch per candidate whatever the
+# appliance count, growing with its state-of-charge steps
+NOMINAL_PROFILE_FACTOR = 1.15
+NOMINAL_SLAB_FACTOR = 1.05
+NOMINAL_DISPATCH_SECONDS = 8e-4
+NOMINAL_DISPATCH_SECONDS_PER_STEP = 1.2e-5
+
+
+def legacy_limits(n_loads):
+    """The previous fixed defaults, kept as upper bounds for the planner"""
+    return max(100, 20 * n_loads), max(20, 5 * n_loads)
+
+
+def nominal_evaluation_cost(n_loads, soc_steps=0, profiles=False, slabs=False):
+    """Machine-independent (eval_seconds, greedy_seconds) for plan_search.
+
+    ``soc_steps`` is the battery's number of state-of-charge steps (0
+    without one), ``profiles``/``slabs`` whether the cost model has power
+    profiles and slab tiers.
+    """
+    eval_seconds = NOMINAL_EVAL_SECONDS_PER_LOAD * n_loads
+    if profiles:
+        eval_seconds *= NOMINAL_PROFILE_FACTOR
+    if slabs:
+        eval_seconds *= NOMINAL_SLAB_FACTOR
+    if soc_steps:
+        eval_seconds += NOMINAL_DISPATCH_SECONDS + NOMINAL_DISPATCH_SECONDS_PER_STEP * soc_steps
+    return eval_seconds, NOMINAL_GREEDY_SECONDS_PER_LOAD * n_loads
+
+
+def plan_search(n_loads, eval_seconds, greedy_seconds=0.0, target_seconds=None,
+                max_evaluations=None, iterations=None, pop_size=None, warm_start=False,
+                evals_per_individual=EVALS_PER_INDIVIDUAL):
+    """Choose population size, generation count and greedy frequency for a budget.
+
+    ``eval_seconds`` is the measured cost of producing and scoring one
+    candidate, ``greedy_seconds`` the cost of one greedy_improve call. The
+    budget is ``max_evaluations`` when given, otherwise whatever fits in
+    ``target_seconds``. Explicit ``iterations``/``pop_size`` are honoured as
+    upper limits. ``evals_per_individual`` is the number of candidates the
+    search scores per individual and generation. Total work is then roughly
+    constant per request instead of growing with n^3.
+    """
+    if target_seconds is None and max_evaluations is None:
+        target_seconds = DEFAULT_TARGET_SECONDS
+    eval_seconds = max(eval_seconds, 1e-7)
+
+    if max_evaluations is not None:
+        budget = int(max_evaluations)
+        search_seconds = budget * eval_seconds
+    else:
+        search_seconds = target_seconds * (1 - FINALIZE_SHARE)
+        budget = int(search_seconds / eval_seconds)
+
+    max_iterations, max_pop = legacy_limits(n_loads)
+    if iterations is not None:
+        max_iterations = max(1, int(iterations))
+    if pop_size is not None:
+        max_pop = max(2, int(pop_size))
+
+    # Keep the legacy generations-to-population ratio: E = e * P * (4P)
+    pop = int(math.sqrt(budget / (evals_per_individual * GENERATIONS_PER_MEMBER)))
+    pop = max(min(MIN_POP_SIZE, max_pop), min(pop, max_pop))
+    gens = budget // (evals_per_individual * pop)
+    if warm_start:
+        gens = gens // 4
+    gens = max(min(MIN_ITERATIONS, max_iterations), min(gens, max_iterations))
+
+    # Greedy is applied to a third of the population every `greedy_every`
+    # generations; space it out so it stays within its share of the budget.
+    greedy_every = LEGACY_GREEDY_EVERY
+    if greedy_seconds > 0:
+        greedy_total = gens * (pop / 3) * greedy_seconds
+        allowed = GREEDY_SHARE * max(search_seconds, gens * pop * evals_per_individual * eval_seconds)
+        greedy_every = max(LEGACY_GREEDY_EVERY, math.ceil(greedy_total / max(allowed, 1e-9)))
+        if greedy_every > gens:
+            greedy_every = None
+
+    planned = gens * pop * evals_per_individual
+    estimated = planned * eval_seconds
+    if greedy_every:
+        estimated += math.ceil(gens / greedy_every) * math.ceil(pop / 3) * greedy_seconds
+
+    return {
+        "iterations": gens,
+        "popSize": pop,
+        "greedyEvery": greedy_every,
+        "evaluationBudget": budget,
+        "plannedEvaluations": planned,
+        "evalSeconds": eval_seconds,
+        "greedySeconds": greedy_seconds,
+        "targetSeconds": target_seconds,
+        "estimatedSeconds": estimated,
+    }
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+SCHEDULE_DB = os.environ.get('SCHEDULE_DB', 'schedules.db')
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_SECONDS = 0.5
+# Runs waiting to be written; beyond this, record() drops runs instead of growing without bound
+DEFAULT_MAX_QUEUED = 10000
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS optimization_runs (
+    id INTEGER PRIMARY KEY,
+    household_id TEXT,
+    tariff_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    n_loads INTEGER NOT NULL,
+    appliance_ids TEXT NOT NULL,
+    schedule BLOB NOT NULL,
+    cost REAL NOT NULL,
+    baseline_cost REAL,
+    request TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_household_time ON optimization_runs (household_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_tariff_time ON optimization_runs (tariff_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_time ON optimization_runs (created_at);
+"""
+
+
+def pack_schedule(schedule):
+    """Bit-pack a 24 x n on/off schedule (24 * n bits)"""
+    return np.packbits(np.asarray(schedule, dtype=np.uint8).ravel()).tobytes()
+
+
+def unpack_schedule(blob, n_loads):
+    bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8), count=24 * n_loads)
+    return bits.reshape(24, n_loads).astype(int).tolist()
+
+
+class ScheduleStore:
+    """SQLite store for optimization requests and results.
+
+    ``record`` only enqueues: a background thread drains the queue and
+    writes in batches, one transaction per batch, so the optimize path never
+    waits on disk. Schedules are stored bit-packed; runs are indexed by
+    household, tariff hash and time, so "latest schedule for a household" is
+    an index lookup. A batch that fails to write is logged and dropped (the
+    writer keeps running), as are runs recorded while ``max_queued`` runs are
+    already waiting; ``dropped`` counts both.
+    """
+
+    def __init__(self, path=SCHEDULE_DB, batch_size=DEFAULT_BATCH_SIZE, flush_seconds=DEFAULT_FLUSH_SECONDS,
+                 max_queued=DEFAULT_MAX_QUEUED):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self._closed = False
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record(self, household_id, tariff_hash, appliance_ids, schedule, cost, baseline_cost, request, result):
+        """Queue one optimization run for writing"""
+        row = (
+            household_id,
+            tariff_hash,
+            time.time(),
+            len(appliance_ids),
+            json.dumps(appliance_ids),
+            pack_schedule(schedule),
+            float(cost),
+            None if baseline_cost is None else float(baseline_cost),
+            json.dumps(request, separators=(',', ':')),
+            json.dumps(result, separators=(',', ':')),
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Schedule store queue is full, dropping a run for household %s", household_id)
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            rows = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_seconds
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = None in rows
+            rows = [row for row in rows if row is not None]
+            try:
+                if rows:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO optimization_runs (household_id, tariff_hash, created_at, n_loads,"
+                            " appliance_ids, schedule, cost, baseline_cost, request, result)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            rows
+                        )
+            except sqlite3.Error:
+                self.dropped += len(rows)
+                logger.exception("Schedule store failed to write %d runs", len(rows))
+            finally:
+                # flush() must return even when a batch is lost
+                for _ in range(len(rows) + stop):
+                    self._queue.task_done()
+            if stop:
+                conn.close()
+                return
+
+    def flush(self):
+        """Block until everything queued so far is written"""
+        self._queue.join()
+
+    def close(self):
+        """Write everything queued and stop the writer (later calls do nothing)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def _row_to_run(self, row):
+        run_id, household_id, tariff_hash, created_at, n_loads, appliance_ids, blob, cost = row
+        ids = json.loads(appliance_ids)
+        schedule = unpack_schedule(blob, n_loads)
+        return {
+            "id": run_id,
+            "householdId": household_id,
+            "tariffHash": tariff_hash,
+            "createdAt": created_at,
+            "cost": cost,
+            "schedule": {app_id: [schedule[h][i] for h in range(24)] for i, app_id in enumerate(ids)},
+        }
+
+    def latest_schedule(self, household_id):
+        """Most recent stored run for a household, or None"""
+        row = self._reader().execute(
+            "SELECT id, household_id, tariff_hash, created_at, n_loads, appliance_ids, schedule, cost"
+            " FROM optimization_runs WHERE household_id = ? ORDER BY created_at DESC LIMIT 1",
+            (household_id,)
+        ).fetchone()
+        return self._row_to_run(row) if row else None
+
+    def history(self, household_id, limit=50):
+        """Most recent runs for a household, newest first"""
+        rows = self._reader().execute(
+            "SELECT id, household_id, tariff_hash, created_at, n_loads, appliance_ids, schedule, cost"
+            " FROM optimization_runs WHERE household_id = ? ORDER BY created_at DESC LIMIT ?",
+            (household_id, int(limit))
+        ).fetchall()
+        return [self._row_to_run(row) for row in rows]
+
+    def household_ids(self):
+        """Every household with a stored run"""
+        rows = self._reader().execute(
+            "SELECT DISTINCT household_id FROM optimization_runs WHERE household_id IS NOT NULL"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def latest_request(self, household_id):
+        """Request payload of the household's most recent run, or None"""
+        row = self._reader().execute(
+            "SELECT request FROM optimization_runs WHERE household_id = ? ORDER BY created_at DESC LIMIT 1",
+            (household_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
@@ -0,0 +1,67 @@
+import numpy as np
+
+MAX_SCENARIOS = 2000
+# Search budget per scenario when the problem is not separable, and the
+# scenario limit then (every scenario is a separate search)
+DEFAULT_SCENARIO_SECONDS = 0.2
+MAX_SEARCH_SCENARIOS = 50
+
+
+def scenario_count(perturbations=None, hourly_delta=None):
+    """Number of scenarios scenario_prices builds from the same arguments"""
+    return len(perturbations or []) + (24 if hourly_delta is not None else 0)
+
+
+def scenario_prices(base_price, perturbations=None, hourly_delta=None, max_scenarios=MAX_SCENARIOS):
+    """Stack tariff perturbations into a (S, 24) price matrix.
+
+    Each perturbation is a dict with an optional ``name`` and either
+    ``rates`` (24 absolute prices) or ``delta``: a number added to the
+    listed ``hours`` (all hours when omitted) or 24 per-hour additions.
+    ``hourly_delta`` adds one scenario per hour with that hour raised by the
+    given amount. At most ``max_scenarios`` are accepted. Returns (names, prices).
+    """
+    base = np.asarray(base_price, dtype=float)
+    names, rows = [], []
+    for k, p in enumerate(perturbations or []):
+        if p.get('rates') is not None:
+            row = np.asarray(p['rates'], dtype=float)
+        else:
+            delta = p.get('delta', 0)
+            row = base.copy()
+            if p.get('hours') is not None:
+                row[[int(h) % 24 for h in p['hours']]] += float(delta)
+            else:
+                row = row + np.broadcast_to(np.asarray(delta, dtype=float), (24,))
+        if row.shape != (24,):
+            raise ValueError("Perturbation rates and deltas need 24 values")
+        names.append(p.get('name', f"scenario-{k + 1}"))
+        rows.append(row)
+    if hourly_delta is not None:
+        raised = base + float(hourly_delta) * np.eye(24)
+        names.extend(f"hour-{h}+{hourly_delta}" for h in range(24))
+        rows.extend(raised)
+    if not rows:
+        raise ValueError("No tariff perturbations given")
+    if len(rows) > max_scenarios:
+        raise ValueError(f"At most {max_scenarios} scenarios per request")
+    return names, np.array(rows)
+
+
+def hour_ranks(prices):
+    """Rank of every hour by price per scenario (0 = cheapest), ties by hour"""
+    order = np.argsort(prices, axis=-1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(prices.shape[-1]), axis=-1)
+    return ranks
+
+
+def separable_optimum(prices, on_hours):
+    """Optimal schedules (S, 24, n) when cost is linear in each hour's energy.
+
+    With constant appliance power and a fixed number of ON hours per
+    appliance, every appliance simply takes its ``on_hours[i]`` cheapest
+    hours, so all scenarios are solved from one rank matrix.
+    """
+    ranks = hour_ranks(np.asarray(prices, dtype=float))
+    return (ranks[:, :, None] < np.asarray(on_hours)[None, None, :]).astype(np.int8)
@@ -0,0 +1,60 @@
+"""Cold-start friendly WSGI entry point.
+
+Importing this module is cheap: Flask, NumPy and the optimizer are only
+imported (from ``app``) by the first request that needs them, and
+``/api/health`` is answered directly until then, so platform health checks
+and scale-to-zero wake-ups do not pay for the import.
+
+Serve ``serverless:application`` with any WSGI server, or run this file for a
+single-process server. SERVERLESS_PRELOAD=1 starts loading the engine in a
+background thread right away instead of on the first request.
+"""
+import json
+import os
+import threading
+import time
+
+_APP = None
+_APP_LOCK = threading.Lock()
+STARTUP = {"engineLoaded": False, "engineLoadSeconds": None}
+
+
+def load_engine():
+    """Import the Flask app and optimizer once, returning the WSGI app"""
+    global _APP
+    if _APP is None:
+        with _APP_LOCK:
+            if _APP is None:
+                started = time.perf_counter()
+                import app as backend
+                STARTUP["engineLoadSeconds"] = time.perf_counter() - started
+                STARTUP["engineLoaded"] = True
+                _APP = backend.app
+    return _APP
+
+
+def cold_health(start_response):
+    body = json.dumps({"status": "ok", "engine": "cold"}).encode()
+    start_response("200 OK", [
+        ("Content-Type", "application/json"),
+        ("Content-Length", str(len(body))),
+        ("Access-Control-Allow-Origin", "*"),
+    ])
+    return [body]
+
+
+def application(environ, start_response):
+    if _APP is None and environ.get("PATH_INFO") == "/api/health" and environ.get("REQUEST_METHOD") == "GET":
+        return cold_health(start_response)
+    return load_engine()(environ, start_response)
+
+
+if os.environ.get("SERVERLESS_PRELOAD") == "1":
+    threading.Thread(target=load_engine, daemon=True).start()
+
+
+if __name__ == "__main__":
+    from wsgiref.simple_server import make_server
+
+    port = int(os.environ.get("PORT", 5000))
+    make_server("0.0.0.0", port, application).serve_forever()
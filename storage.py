@@ -0,0 +1,113 @@
+import numpy as np
+
+DEFAULT_SOC_STEPS = 21
+
+
+class BatteryModel:
+    """Home battery: usable capacity, charge/discharge power and round-trip efficiency"""
+
+    def __init__(self, capacity_kwh, power_kw, efficiency=0.9, initial_soc=0.5, min_soc=0.0,
+                 soc_steps=DEFAULT_SOC_STEPS):
+        if capacity_kwh <= 0 or power_kw <= 0:
+            raise ValueError("Battery capacity and power must be positive")
+        if not 0 < efficiency <= 1:
+            raise ValueError("Battery efficiency must be in (0, 1]")
+        self.capacity_kwh = float(capacity_kwh)
+        self.power_kw = float(power_kw)
+        self.efficiency = float(efficiency)
+        self.levels = np.linspace(min_soc * capacity_kwh, capacity_kwh, int(soc_steps))
+        self.start_index = int(np.argmin(np.abs(self.levels - initial_soc * capacity_kwh)))
+
+        # Energy moved into (positive) or out of (negative) the battery for
+        # every transition between discretized states, and what the meter
+        # sees for it. Losses are split evenly between charge and discharge.
+        one_way = np.sqrt(self.efficiency)
+        delta = self.levels[None, :] - self.levels[:, None]
+        self.meter_flow = np.where(delta > 0, delta / one_way, delta * one_way)
+        self.allowed = np.abs(delta) <= self.power_kw + 1e-9
+
+
+class HomeEnergySystem:
+    """Rooftop PV and an optional battery between the appliances and the grid.
+
+    ``grid_exchange`` turns appliance load profiles into grid imports and
+    exports, dispatching the battery optimally for the given prices by
+    dynamic programming over discretized state of charge. The recursion is
+    vectorized across states and across all candidate schedules at once, so
+    scoring a population costs 24 small array minimizations.
+    """
+
+    def __init__(self, pv_kwh=None, battery=None, export_price=0.0):
+        self.pv_kwh = np.zeros(24) if pv_kwh is None else np.asarray(pv_kwh, dtype=float)
+        if self.pv_kwh.shape != (24,):
+            raise ValueError("PV generation must have 24 hourly values")
+        self.battery = battery
+        self.export_price = float(export_price)
+
+    def grid_exchange(self, hourly_kwh, prices, export_price=None):
+        """Grid import and export (each shaped like ``hourly_kwh``) and SoC path.
+
+        ``prices`` is the per-kWh import price used to steer the battery,
+        either one 24-hour vector or one per schedule, and ``export_price``
+        the export credit it is weighed against (default: the real one). The
+        SoC path has 25 entries per schedule (None without a battery).
+        """
+        net = np.asarray(hourly_kwh, dtype=float) - self.pv_kwh
+        if self.battery is None:
+            return np.maximum(net, 0.0), np.maximum(-net, 0.0), None
+
+        single = net.ndim == 1
+        net = np.atleast_2d(net)
+        prices = np.broadcast_to(np.asarray(prices, dtype=float), net.shape)
+        meter, soc = self._dispatch(net, prices, self.export_price if export_price is None else export_price)
+        imports, exports = np.maximum(meter, 0.0), np.maximum(-meter, 0.0)
+        if single:
+            return imports[0], exports[0], soc[0]
+        return imports, exports, soc
+
+    def _dispatch(self, net, prices, export_price):
+        battery = self.battery
+        n_states = battery.levels.size
+        batch = net.shape[0]
+        rows = np.arange(batch)
+
+        # Terminal condition: end the day with at least the starting charge
+        value = np.where(np.arange(n_states) >= battery.start_index, 0.0, np.inf)
+        value = np.broadcast_to(value, (batch, n_states))
+        policy = np.empty((24, batch, n_states), dtype=np.intp)
+        for t in range(23, -1, -1):
+            meter = net[:, t, None, None] + battery.meter_flow[None]
+            step = np.where(meter > 0, prices[:, t, None, None] * meter, export_price * meter)
+            total = np.where(battery.allowed[None], step + value[:, None, :], np.inf)
+            policy[t] = np.argmin(total, axis=2)
+            value = np.take_along_axis(total, policy[t][:, :, None], axis=2)[:, :, 0]
+
+        state = np.full(batch, battery.start_index)
+        soc = np.empty((batch, 25))
+        meter = np.empty_like(net)
+        soc[:, 0] = battery.levels[state]
+        for t in range(24):
+            nxt = policy[t][rows, state]
+            meter[:, t] = net[:, t] + battery.meter_flow[state, nxt]
+            state = nxt
+            soc[:, t + 1] = battery.levels[state]
+        return meter, soc
+
+
+def load_energy_system_from_dict(data):
+    """Build a HomeEnergySystem from request fields, or None when not configured"""
+    pv = data.get('pvKwh')
+    battery_data = data.get('battery')
+    if pv is None and not battery_data:
+        return None
+    battery = None
+    if battery_data:
+        battery = BatteryModel(
+            capacity_kwh=float(battery_data['capacityKwh']),
+            power_kw=float(battery_data['powerKw']),
+            efficiency=float(battery_data.get('efficiency', 0.9)),
+            initial_soc=float(battery_data.get('initialSoc', 0.5)),
+            min_soc=float(battery_data.get('minSoc', 0.0)),
+            soc_steps=int(battery_data.get('socSteps', DEFAULT_SOC_STEPS))
+        )
+    return HomeEnergySystem(pv_kwh=pv, battery=battery, export_price=float(data.get('exportRate', 0)))
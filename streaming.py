@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+
+# At most one improvement event per interval, keep-alive comments when idle
+DEFAULT_MIN_INTERVAL = 0.1
+DEFAULT_KEEPALIVE = 5.0
+
+
+def sse_event(event, payload):
+    """One Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+class ImprovementStream:
+    """Hand-off between an optimizer run and a Server-Sent Events response.
+
+    The optimizer thread calls ``improve`` with every new global best, which
+    only swaps a reference under a lock. ``events`` (the response side) sends
+    the first improvement right away and afterwards at most one per
+    ``min_interval``, always the latest, so serialization stays a small,
+    bounded share of the run however often the best improves. ``cancel`` is
+    called when the client goes away; the optimizer polls ``should_stop``.
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, keepalive=DEFAULT_KEEPALIVE):
+        self.min_interval = min_interval
+        self.keepalive = keepalive
+        self._cond = threading.Condition()
+        self._latest = None
+        self._version = 0
+        self._final = None
+        self._cancelled = threading.Event()
+
+    def improve(self, generation, cost, schedule):
+        with self._cond:
+            self._latest = (generation, cost, schedule)
+            self._version += 1
+            self._cond.notify_all()
+
+    def finish(self, event, payload):
+        """End the stream with a final event (e.g. the result or an error)"""
+        with self._cond:
+            self._final = (event, payload)
+            self._cond.notify_all()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def should_stop(self):
+        return self._cancelled.is_set()
+
+    def events(self, format_improvement):
+        """Yield SSE text until the final event; ``format_improvement`` builds each payload"""
+        started = time.perf_counter()
+        sent_version = 0
+        next_allowed = 0.0
+        try:
+            while True:
+                with self._cond:
+                    deadline = time.perf_counter() + self.keepalive
+                    while self._final is None:
+                        now = time.perf_counter()
+                        if self._version != sent_version and now >= next_allowed:
+                            break
+                        wait = deadline - now
+                        if self._version != sent_version:
+                            wait = min(wait, next_allowed - now)
+                        if wait <= 0:
+                            break
+                        self._cond.wait(wait)
+                    latest, version, final = self._latest, self._version, self._final
+
+                if version != sent_version:
+                    generation, cost, schedule = latest
+                    payload = dict(format_improvement(schedule), generation=generation, cost=cost,
+                                   elapsed=time.perf_counter() - started)
+                    yield sse_event("improvement", payload)
+                    sent_version = version
+                    next_allowed = time.perf_counter() + self.min_interval
+                elif final is None:
+                    yield ": keep-alive\n\n"
+                if final is not None:
+                    yield sse_event(*final)
+                    return
+        finally:
+            # Client disconnected (or the stream ended): stop the search early
+            self.cancel()
@@ -0,0 +1,159 @@
+import numpy as np
+
+DEFAULT_BILLING_DAYS = 30
+
+
+class TariffModel:
+    """Time-of-use prices combined with monthly consumption slabs.
+
+    The hourly (time-of-use) price is charged on every unit as before. When
+    slabs are given, the tiered energy charge is applied on top of the total
+    monthly units, where the daily schedule is assumed to repeat for
+    ``billing_days`` days and ``base_monthly_kwh`` covers unscheduled usage.
+
+    Slab boundaries and the cumulative charge at each boundary are computed
+    once, so pricing any number of candidate schedules is a handful of array
+    operations (a ``searchsorted`` plus a gather) instead of a Python loop
+    over slabs.
+
+    An hourly grid carbon intensity (kg CO2 per kWh) can be weighted in:
+    ``hourly_price`` is then the blended objective price
+    ``cost_weight * tariff + carbon_weight * intensity``, folded in once so
+    scoring a candidate costs exactly the same. ``tariff_price`` keeps the
+    plain rates for the bill.
+    """
+
+    def __init__(self, hourly_price, slabs=None, billing_days=DEFAULT_BILLING_DAYS,
+                 base_monthly_kwh=0.0, telescopic=True, carbon_kg=None, carbon_weight=0.0, cost_weight=1.0):
+        self.tariff_price = np.asarray(hourly_price, dtype=float)
+        self.billing_days = int(billing_days)
+        self.base_monthly_kwh = float(base_monthly_kwh)
+        self.telescopic = telescopic
+        self.carbon_kg = None if carbon_kg is None else np.asarray(carbon_kg, dtype=float)
+        self.carbon_weight = float(carbon_weight)
+        self.cost_weight = float(cost_weight)
+
+        if self.billing_days <= 0:
+            raise ValueError("billingDays must be positive")
+        if self.carbon_kg is not None and self.carbon_kg.shape != (24,):
+            raise ValueError("Carbon intensity must have 24 hourly values")
+        if self.carbon_weight < 0 or self.cost_weight < 0:
+            raise ValueError("carbonWeight and costWeight must not be negative")
+        if self.carbon_weight and self.carbon_kg is None:
+            raise ValueError("carbonWeight needs carbonIntensity")
+        self.hourly_price = self.objective_price(self.tariff_price)
+
+        slabs = slabs or []
+        upper = np.array([u for u, _ in slabs], dtype=float)
+        rates = np.array([r for _, r in slabs], dtype=float)
+        if np.isinf(upper[:-1]).any():
+            raise ValueError("Only the last tariff slab may be open-ended")
+        if upper.size and np.any(np.diff(upper) <= 0):
+            raise ValueError("Tariff slabs must have increasing upper limits")
+
+        self.slab_upper = upper
+        self.slab_rates = rates
+        # Lower edge of every slab and the charge accumulated below it
+        self.slab_lower = np.concatenate(([0.0], upper[:-1])) if upper.size else upper
+        widths = self.slab_upper - self.slab_lower
+        widths[-1:] = 0.0
+        self.slab_cum_cost = np.concatenate(([0.0], np.cumsum(widths * rates)[:-1])) if upper.size else upper
+
+    @property
+    def has_slabs(self):
+        return self.slab_rates.size > 0
+
+    @property
+    def is_blended(self):
+        """True when the objective is not simply the bill"""
+        return self.carbon_weight != 0 or self.cost_weight != 1
+
+    def objective_price(self, prices):
+        """Blended objective price for tariff rates of shape (..., 24)"""
+        prices = np.asarray(prices, dtype=float)
+        if not self.is_blended:
+            return prices
+        blended = self.cost_weight * prices
+        if self.carbon_weight:
+            blended = blended + self.carbon_weight * self.carbon_kg
+        return blended
+
+    def emissions_kg(self, hourly_kwh):
+        """Daily kg CO2 of per-hour grid energy of shape (..., 24)"""
+        return np.asarray(hourly_kwh, dtype=float) @ self.carbon_kg
+
+    def slab_charge(self, monthly_kwh):
+        """Tiered energy charge for an array (or scalar) of monthly kWh"""
+        kwh = np.asarray(monthly_kwh, dtype=float)
+        if not self.has_slabs:
+            return np.zeros_like(kwh)
+        idx = np.searchsorted(self.slab_upper, kwh, side="left")
+        idx = np.minimum(idx, self.slab_rates.size - 1)
+        if not self.telescopic:
+            return kwh * self.slab_rates[idx]
+        return self.slab_cum_cost[idx] + (kwh - self.slab_lower[idx]) * self.slab_rates[idx]
+
+    def marginal_rate(self, monthly_kwh):
+        """Slab rate charged on the next unit at the given monthly consumption"""
+        kwh = np.asarray(monthly_kwh, dtype=float)
+        if not self.has_slabs:
+            return np.zeros_like(kwh)
+        idx = np.minimum(np.searchsorted(self.slab_upper, kwh, side="right"), self.slab_rates.size - 1)
+        return self.slab_rates[idx]
+
+    def monthly_kwh(self, hourly_kwh):
+        """Monthly units from per-hour daily energy of shape (..., 24)"""
+        return np.asarray(hourly_kwh, dtype=float).sum(axis=-1) * self.billing_days + self.base_monthly_kwh
+
+    def monthly_bill(self, hourly_kwh, prices=None):
+        """Monthly bill for per-hour daily energy of shape (..., 24).
+
+        ``prices`` replaces the tariff rates as in daily_cost.
+        """
+        hourly_kwh = np.asarray(hourly_kwh, dtype=float)
+        if prices is None:
+            bill = (hourly_kwh @ self.tariff_price) * self.billing_days
+        else:
+            bill = (hourly_kwh * np.asarray(prices, dtype=float)).sum(axis=-1) * self.billing_days
+        if self.has_slabs:
+            bill = bill + self.slab_charge(self.monthly_kwh(hourly_kwh))
+        return bill
+
+    def daily_cost(self, hourly_kwh, prices=None):
+        """Daily share of the monthly bill, comparable to the flat hourly cost.
+
+        This is the optimization objective, so carbon is included when weighted
+        in. ``prices`` replaces the tariff rates, e.g. with one row of a
+        scenario price matrix per row of ``hourly_kwh``.
+        """
+        hourly_kwh = np.asarray(hourly_kwh, dtype=float)
+        if prices is None:
+            cost = hourly_kwh @ self.hourly_price
+        else:
+            cost = (hourly_kwh * self.objective_price(prices)).sum(axis=-1)
+        if self.has_slabs:
+            cost = cost + self.cost_weight * self.slab_charge(self.monthly_kwh(hourly_kwh)) / self.billing_days
+        return cost
+
+
+def load_carbon_from_dict(data):
+    """Hourly carbon intensity in kg CO2/kWh from ``carbonIntensity`` (24 values in g CO2/kWh), or None"""
+    intensity = data.get('carbonIntensity')
+    if intensity is None:
+        return None
+    return np.asarray(intensity, dtype=float) / 1000
+
+
+def load_slabs_from_dict(tariff_slabs):
+    """Load slab definitions ([{"upTo": 100, "rate": 13.48}, ...]) sorted by limit.
+
+    The last slab may omit ``upTo`` (or set it to null) to cover all
+    remaining units; otherwise the last listed rate is applied beyond it.
+    """
+    slabs = []
+    for slab in tariff_slabs or []:
+        upper = slab.get('upTo')
+        upper = float('inf') if upper is None else float(upper)
+        slabs.append((upper, float(slab['rate'])))
+    slabs.sort(key=lambda s: s[0])
+    return slabs